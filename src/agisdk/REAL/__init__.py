@@ -1,5 +1,6 @@
 from . import browsergym, tasks
 from .harness import AbstractAgentArgs, Agent, harness
+from .sharding import merge_runs
 
 
 def hello(name="World"):
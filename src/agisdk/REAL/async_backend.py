@@ -0,0 +1,157 @@
+"""
+Asyncio execution backend: many episodes in one process, on one event loop and one browser.
+
+The event loop drives a single Chromium process (Playwright async API), in which each episode
+gets its own browser contexts. Each episode runs in a thread of its own, so that its agent's LLM
+calls and its waits on the browser overlap with those of the other episodes, instead of each
+worker process paying for its own browser. See browsergym/core/async_env.py.
+"""
+
+import asyncio
+import contextlib
+import logging
+import queue
+import threading
+import traceback
+from typing import Any, AsyncIterator, Callable, Iterable, Iterator, Optional
+
+from agisdk.REAL.browsergym.core.async_env import (
+    SharedBrowser,
+    run_in_thread,
+    run_with_shared_browser,
+)
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+class AsyncEpisodePool:
+    """
+    Runs jobs concurrently on one event loop, sharing one browser, with per-job timeouts.
+
+    Args:
+        num_workers: Maximum number of concurrent jobs
+        fn: Function run for each job, called as fn(*args) in a thread of its own, where the
+            environments it creates use the shared browser
+        task_timeout: Maximum duration of a job, in seconds (None for no limit). The browser
+                      contexts of a timed out job are closed, which makes it fail promptly
+        headless: Whether to run the shared browser in headless mode
+        launch_kwargs: Extra parameters for launching the shared browser
+        max_running: Optional function called with the number of running jobs while jobs are
+                     pending, returning how many jobs may run at the same time (at most
+                     num_workers), to adapt the concurrency during the run
+    """
+
+    def __init__(
+        self,
+        num_workers: int,
+        fn: Callable,
+        task_timeout: Optional[float] = None,
+        headless: bool = True,
+        launch_kwargs: Optional[dict] = None,
+        max_running: Optional[Callable[[int], int]] = None,
+    ):
+        self.num_workers = max(1, num_workers)
+        self.fn = fn
+        self.task_timeout = task_timeout
+        self.headless = headless
+        self.launch_kwargs = launch_kwargs
+        self.max_running = max_running
+
+    async def arun(
+        self, jobs: Iterable[tuple[Any, tuple]]
+    ) -> AsyncIterator[tuple[Any, bool, Any]]:
+        """
+        Run the jobs, yielding their results as they complete.
+
+        Args:
+            jobs: Iterable of (job_id, args) tuples
+
+        Yields:
+            (job_id, ok, value) tuples: the return value of the job if ok, otherwise an error
+            message (exception raised or timeout)
+        """
+        pending = list(reversed(list(jobs)))
+        running = set()
+        shared_browser = SharedBrowser(headless=self.headless, launch_kwargs=self.launch_kwargs)
+        async with shared_browser as shared:
+            try:
+                while pending or running:
+                    limit = self.num_workers
+                    if pending and self.max_running is not None:
+                        limit = min(self.max_running(len(running)), self.num_workers)
+                    while pending and len(running) < limit:
+                        job_id, args = pending.pop()
+                        running.add(asyncio.ensure_future(self._run_job(shared, job_id, args)))
+                    if not running:
+                        await asyncio.sleep(1.0)
+                        continue
+                    done, running = await asyncio.wait(
+                        running, timeout=1.0, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for job in done:
+                        yield job.result()
+            finally:
+                for job in running:
+                    job.cancel()
+                await asyncio.gather(*running, return_exceptions=True)
+
+    async def _run_job(self, shared: SharedBrowser, job_id, args: tuple) -> tuple[Any, bool, Any]:
+        session = shared.session()
+        future = run_in_thread(
+            run_with_shared_browser, session, self.fn, *args, name=f"episode-{job_id}"
+        )
+        try:
+            return job_id, True, await asyncio.wait_for(future, self.task_timeout)
+        except asyncio.TimeoutError:
+            err_msg = f"TimeoutError: task exceeded {self.task_timeout}s"
+            logger.warning(f"Job {job_id} failed: {err_msg}")
+            return job_id, False, err_msg
+        except Exception as e:
+            stack_trace = "".join(traceback.format_exception(type(e), e, e.__traceback__))
+            err_msg = f"{type(e).__name__}: {e}\n{stack_trace}"
+            return job_id, False, err_msg
+        finally:
+            # close whatever the episode left open (all of its contexts if it timed out)
+            await session.aclose()
+
+    def imap_unordered(
+        self, jobs: Iterable[tuple[Any, tuple]]
+    ) -> Iterator[tuple[Any, bool, Any]]:
+        """
+        Same as arun, for synchronous callers: the event loop runs in a background thread.
+        """
+        results = queue.Queue()
+        loop = asyncio.new_event_loop()
+
+        async def produce():
+            try:
+                async for result in self.arun(jobs):
+                    results.put(result)
+            except BaseException as e:
+                results.put(e)
+            finally:
+                results.put(_DONE)
+
+        main = loop.create_task(produce())
+
+        def run_loop():
+            with contextlib.suppress(asyncio.CancelledError):
+                loop.run_until_complete(main)
+
+        thread = threading.Thread(target=run_loop, name="harness-event-loop", daemon=True)
+        thread.start()
+        try:
+            while True:
+                result = results.get()
+                if result is _DONE:
+                    break
+                if isinstance(result, BaseException):
+                    raise result
+                yield result
+        finally:
+            if thread.is_alive():
+                loop.call_soon_threadsafe(main.cancel)
+            thread.join()
+            loop.close()
@@ -1,5 +1,6 @@
 __version__ = "0.8.0"
 
+import contextvars
 import importlib.resources
 import os
 from pathlib import Path
@@ -24,6 +25,23 @@ def _get_global_playwright():
     return _PLAYWRIGHT
 
 
+# browser shared by the environments created in the current context (see async_env.py and
+# reused_browser.py)
+_SHARED_BROWSER = contextvars.ContextVar("browsergym_shared_browser", default=None)
+
+
+def _set_shared_browser(shared_browser) -> contextvars.Token:
+    return _SHARED_BROWSER.set(shared_browser)
+
+
+def _reset_shared_browser(token: contextvars.Token):
+    _SHARED_BROWSER.reset(token)
+
+
+def _get_shared_browser():
+    return _SHARED_BROWSER.get()
+
+
 # Define chat_files directory to avoid circular import
 # This needs to happen BEFORE any modules that import chat_files
 current_dir = os.path.dirname(os.path.abspath(__file__))
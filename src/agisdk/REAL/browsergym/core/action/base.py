@@ -37,6 +37,8 @@ def execute_python_code(
     page: playwright.sync_api.Page,
     send_message_to_user: callable,
     report_infeasible_instructions: callable,
+    element_properties: dict = None,
+    precheck_stats: dict = None,
 ):
     """
     Executes Python code in a new context, except for a playwright `page` object and a `send_message_to_user` function.
@@ -49,12 +51,16 @@ def execute_python_code(
         page: the playwright page that will be made accessible to the code.
         send_message_to_user: utility function that will be made accessible to the code. It should take one text argument.
         report_infeasible_instructions: utility function that will be made accessible to the code. It should take one text argument.
+        element_properties: the extra element properties from the last observation, used by the actionability pre-check.
+        precheck_stats: counters updated by the actionability pre-check, if any.
     """
 
     globals = {
         "page": page,
         "send_message_to_user": send_message_to_user,
         "report_infeasible_instructions": report_infeasible_instructions,
+        "element_properties": element_properties,
+        "precheck_stats": precheck_stats if precheck_stats is not None else {},
     }
 
     exec(code, globals)
@@ -7,7 +7,9 @@ import playwright.sync_api
 from .utils import (
     add_demo_mode_effects,
     get_elem_by_bid,
+    get_frame_by_bid,
     highlight_by_box,
+    precheck_actionability,
     smooth_move_visual_cursor_to,
 )
 
@@ -16,6 +18,11 @@ send_message_to_user: callable = None
 report_infeasible_instructions: callable = None
 demo_mode: Literal["off", "default", "all_blue", "only_visible_elements"] = None
 retry_with_force: bool = False
+actionability_precheck: bool = False
+element_properties: dict = None
+precheck_stats: dict = None
+dom_batch_script: str = None
+dom_batch_bid_attr: str = None
 
 """IMPORTANT
 The following primitives are meant to be included in the browsergym action using
@@ -71,7 +78,12 @@ def fill(bid: str, value: str):
         elem.clear()
         delay = max(2000 / len(value), 10)
         elem.type(value, delay=delay)
-    if retry_with_force:
+    force = actionability_precheck and precheck_actionability(
+        elem, bid, element_properties, precheck_stats, pointer=False, allow_force=retry_with_force
+    )
+    if force:
+        elem.fill(value, force=True, timeout=500)
+    elif retry_with_force:
         try:
             elem.fill(value, timeout=500)
         except Exception:
@@ -90,7 +102,12 @@ def check(bid: str):
     """
     elem = get_elem_by_bid(page, bid, demo_mode != "off")
     add_demo_mode_effects(page, elem, bid, demo_mode=demo_mode, move_cursor=True)
-    if retry_with_force:
+    force = actionability_precheck and precheck_actionability(
+        elem, bid, element_properties, precheck_stats, pointer=True, allow_force=retry_with_force
+    )
+    if force:
+        elem.check(force=True, timeout=500)
+    elif retry_with_force:
         try:
             elem.check(timeout=500)
         except Exception:
@@ -109,7 +126,12 @@ def uncheck(bid: str):
     """
     elem = get_elem_by_bid(page, bid, demo_mode != "off")
     add_demo_mode_effects(page, elem, bid, demo_mode=demo_mode, move_cursor=True)
-    if retry_with_force:
+    force = actionability_precheck and precheck_actionability(
+        elem, bid, element_properties, precheck_stats, pointer=True, allow_force=retry_with_force
+    )
+    if force:
+        elem.uncheck(force=True, timeout=500)
+    elif retry_with_force:
         try:
             elem.uncheck(timeout=500)
         except Exception:
@@ -130,7 +152,12 @@ def select_option(bid: str, options: str | list[str]):
     """
     elem = get_elem_by_bid(page, bid, demo_mode != "off")
     add_demo_mode_effects(page, elem, bid, demo_mode=demo_mode, move_cursor=False)
-    if retry_with_force:
+    force = actionability_precheck and precheck_actionability(
+        elem, bid, element_properties, precheck_stats, pointer=False, allow_force=retry_with_force
+    )
+    if force:
+        elem.select_option(options, force=True, timeout=500)
+    elif retry_with_force:
         try:
             elem.select_option(options, timeout=500)
         except Exception:
@@ -157,7 +184,12 @@ def click(
         modifiers = []
     elem = get_elem_by_bid(page, bid, demo_mode != "off")
     add_demo_mode_effects(page, elem, bid, demo_mode=demo_mode, move_cursor=True)
-    if retry_with_force:
+    force = actionability_precheck and precheck_actionability(
+        elem, bid, element_properties, precheck_stats, pointer=True, allow_force=retry_with_force
+    )
+    if force:
+        elem.click(button=button, modifiers=modifiers, force=True, timeout=500)
+    elif retry_with_force:
         try:
             elem.click(button=button, modifiers=modifiers, timeout=500)
         except Exception:
@@ -184,7 +216,12 @@ def dblclick(
         modifiers = []
     elem = get_elem_by_bid(page, bid, demo_mode != "off")
     add_demo_mode_effects(page, elem, bid, demo_mode=demo_mode, move_cursor=True)
-    if retry_with_force:
+    force = actionability_precheck and precheck_actionability(
+        elem, bid, element_properties, precheck_stats, pointer=True, allow_force=retry_with_force
+    )
+    if force:
+        elem.dblclick(button=button, modifiers=modifiers, force=True, timeout=500)
+    elif retry_with_force:
         try:
             elem.dblclick(button=button, modifiers=modifiers, timeout=500)
         except Exception:
@@ -210,7 +247,12 @@ def hover(bid: str):
                 box["y"] + box["height"] / 2,
             )
             smooth_move_visual_cursor_to(page, center_x, center_y)
-    if retry_with_force:
+    force = actionability_precheck and precheck_actionability(
+        elem, bid, element_properties, precheck_stats, pointer=True, allow_force=retry_with_force
+    )
+    if force:
+        elem.hover(force=True, timeout=500)
+    elif retry_with_force:
         try:
             elem.hover(timeout=500)
         except Exception:
@@ -616,3 +658,30 @@ def mouse_upload_file(x: float, y: float, file: str | list[str]):
 
     file_chooser = fc_info.value
     file_chooser.set_files(file)
+
+
+# not an action, used by HighLevelActionSet to execute groups of consecutive DOM-level actions
+def batch_dom_actions(actions: list[tuple[str, dict]]):
+    """
+    Execute a group of DOM-level actions that target the same frame in a single in-page script.
+    The script stops at the first action it cannot safely perform (missing, hidden, covered or
+    disabled element etc.). That action and all the following ones are then executed through
+    the regular Playwright path, so that any error is raised by the action that caused it.
+    """
+    frame = get_frame_by_bid(page, actions[0][1]["bid"])
+    results = frame.evaluate(dom_batch_script, [actions, dom_batch_bid_attr])
+
+    for i, result in enumerate(results):
+        if not result["ok"]:
+            break
+    else:
+        return
+
+    for j, (name, kwargs) in enumerate(actions[i:], start=i):
+        try:
+            globals()[name](**kwargs)
+        except Exception as e:
+            call = f"{name}({', '.join(repr(v) for v in kwargs.values())})"
+            raise ValueError(
+                f"Action {j + 1}/{len(actions)} {call} failed. {type(e).__name__}: {e}"
+            ) from e
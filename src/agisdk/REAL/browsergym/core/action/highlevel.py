@@ -1,9 +1,11 @@
 import inspect
+import pkgutil
 import random
 from dataclasses import dataclass
 from typing import Literal, Optional
 
-from . import utils
+from ..constants import BROWSERGYM_ID_ATTRIBUTE
+from . import functions, utils
 from .base import AbstractActionSet
 from .functions import (
     clear,
@@ -41,7 +43,7 @@ from .functions import (
     tab_focus,
     upload_file,
 )
-from .parsers import action_docstring_parser, highlevel_action_parser
+from .parsers import NamedArgument, action_docstring_parser, highlevel_action_parser
 
 CHAT_ACTIONS = [send_msg_to_user]
 
@@ -88,6 +90,15 @@ TAB_ACTIONS = [
     new_tab,
 ]
 
+# DOM-level actions that can be grouped and executed in a single in-page script (multiaction only)
+DOM_BATCH_ACTIONS = [
+    fill,
+    select_option,
+    focus,
+    clear,
+    click,
+]
+
 
 @dataclass
 class HighLevelAction:
@@ -108,6 +119,8 @@ class HighLevelActionSet(AbstractActionSet):
         demo_mode: Literal["off", "default", "all_blue", "only_visible_elements"] = "off",
         strict: bool = False,
         retry_with_force: bool = False,
+        batch_dom_actions: bool = False,
+        actionability_precheck: bool = False,
     ):
         if subsets is None:
             subsets = ["chat", "infeas", "bid", "nav", "tab"]
@@ -115,6 +128,12 @@ class HighLevelActionSet(AbstractActionSet):
         self.multiaction = multiaction
         self.demo_mode = demo_mode
         self.retry_with_force = retry_with_force
+        # bid-based actions check the last DOM snapshot (and the live page if needed) before
+        # acting, to fail fast on non-actionable elements or go straight to the forced path
+        self.actionability_precheck = actionability_precheck
+        # consecutive DOM-level actions on the same frame are executed in a single round trip,
+        # only relevant for multi-actions, and incompatible with the visual effects of demo_mode
+        self.batch_dom_actions = batch_dom_actions and multiaction and demo_mode == "off"
 
         if not subsets:
             raise ValueError("'action_subsets' is empty.")
@@ -155,19 +174,36 @@ class HighLevelActionSet(AbstractActionSet):
 
         # parse the actions and build the action space
         self.action_set: dict[str, HighLevelAction] = {}
+        self.dom_batch_actions = {
+            func.__name__: func for func in DOM_BATCH_ACTIONS if func in allowed_actions
+        }
         self.python_includes = ""
 
-        # include playwright imports
+        # include playwright (and utility functions) imports
         self.python_includes += """\
+import time
 import playwright.sync_api
 from typing import Literal
 
 
 """
-        # include demo_mode and retry_with_force flags
+        # include demo_mode, retry_with_force and actionability_precheck flags
         self.python_includes += f"""\
 demo_mode={repr(demo_mode)}
 retry_with_force={repr(retry_with_force)}
+actionability_precheck={repr(actionability_precheck)}
+"""
+        # include the in-page script for batched DOM-level actions
+        if self.batch_dom_actions:
+            dom_batch_script = pkgutil.get_data(
+                "agisdk.REAL.browsergym.core", "javascript/frame_batch_actions.js"
+            ).decode("utf-8")
+            self.python_includes += f"""\
+dom_batch_script={repr(dom_batch_script)}
+dom_batch_bid_attr={repr(BROWSERGYM_ID_ATTRIBUTE)}
+
+{inspect.getsource(functions.batch_dom_actions)}
+
 """
 
         # include utility functions
@@ -326,12 +362,89 @@ Only a single action can be provided at once."""
         python_code += self.python_includes
 
         # function calls
-        for function_name, function_args in function_calls:
+        for function_name, _ in function_calls:
             if function_name not in self.action_set:
                 raise NameError(f"Invalid action type '{function_name}'.")
-            python_code += (
-                function_name + "(" + ", ".join([repr(arg) for arg in function_args]) + ")\n"
-            )
+
+        for group in self._group_function_calls(function_calls):
+            # a group of consecutive DOM-level actions, executed in a single round trip
+            if len(group) > 1:
+                python_code += f"batch_dom_actions({repr(group)})\n"
+            else:
+                ((function_name, function_args),) = group
+                python_code += (
+                    function_name + "(" + ", ".join([repr(arg) for arg in function_args]) + ")\n"
+                )
 
         # return the constructed python code
         return python_code
+
+    def _batchable_call(self, function_name: str, function_args: list) -> Optional[tuple]:
+        """
+        Returns the (function_name, kwargs) form of a DOM-level action call that can be batched,
+        along with the bid of the frame it targets, or None if the call should be executed alone.
+        """
+        if function_name not in self.dom_batch_actions:
+            return None
+
+        args = [arg for arg in function_args if not isinstance(arg, NamedArgument)]
+        kwargs = {arg.name: arg.value for arg in function_args if isinstance(arg, NamedArgument)}
+        try:
+            bound_args = inspect.signature(self.dom_batch_actions[function_name]).bind(
+                *args, **kwargs
+            )
+        except TypeError:
+            return None  # invalid call, let it fail on its own
+        bound_args.apply_defaults()
+        kwargs = dict(bound_args.arguments)
+
+        if not isinstance(kwargs["bid"], str):
+            return None
+        # only plain left clicks can be emulated from within the page
+        if function_name == "click" and (kwargs["button"] != "left" or kwargs["modifiers"]):
+            return None
+
+        # bids are prefixed with the bid of their (nested) frame, e.g. "ab12" is in frame "ab"
+        frame_bid = kwargs["bid"].rstrip("0123456789")
+
+        return (function_name, kwargs), frame_bid
+
+    def _group_function_calls(self, function_calls: list) -> list[list]:
+        """
+        Groups consecutive DOM-level actions that target the same frame, in their
+        (function_name, kwargs) form. Every other call is returned as a group of its own, in its
+        original (function_name, function_args) form. A click always ends a group, since it
+        might trigger a navigation.
+        """
+        groups = []
+        pending, pending_frame_bid = [], None
+
+        def flush():
+            if len(pending) == 1:
+                # a single DOM-level action goes through the regular path
+                groups.append([pending[0][1]])
+            elif pending:
+                groups.append([call for call, _ in pending])
+            pending.clear()
+
+        for function_name, function_args in function_calls:
+            batchable = None
+            if self.batch_dom_actions:
+                batchable = self._batchable_call(function_name, function_args)
+
+            if batchable is None:
+                flush()
+                groups.append([(function_name, function_args)])
+                continue
+
+            call, frame_bid = batchable
+            if pending and frame_bid != pending_frame_bid:
+                flush()
+            pending.append((call, (function_name, function_args)))
+            pending_frame_bid = frame_bid
+            if function_name == "click":
+                flush()
+
+        flush()
+
+        return groups
@@ -141,3 +141,91 @@ def execute_openai_cua_action(
     except Exception as e:
         print(f"[bold red]Error executing action {action_type}: {e}[/bold red]")
         report_infeasible_instructions(f"Error executing action {action_type}: {e}")
+
+
+def execute_openai_cua_actions(
+    actions: list[dict],
+    page: Page,
+    send_message_to_user: Callable[[str], None],
+    report_infeasible_instructions: Callable[[str], None],
+) -> dict:
+    """
+    Execute a batch of CUA (Computer Use Assistant) actions using the OpenAI format, as emitted
+    in bursts by Operator-style agents. Adjacent `type` actions are coalesced into a single
+    `keyboard.insert_text` call, and `wait` actions are not executed but folded into a single
+    wait, to be applied by the caller once the whole batch has been executed.
+
+    Args:
+        actions: The list of action dictionaries in OpenAI CUA format
+        page: The Playwright page to interact with
+        send_message_to_user: Function to send messages to the user
+        report_infeasible_instructions: Function to report infeasible instructions
+
+    Returns:
+        A dict with the total requested wait time in milliseconds ("wait_ms"), and the timings
+        of each executed sub-action ("timings"), as a list of dicts with the sub-action type,
+        the number of batched actions it covers, and its start (relative to the start of the
+        batch) and elapsed time in seconds.
+    """
+    batch_start = time.time()
+    wait_ms = 0
+    timings = []
+
+    def record(action_type: str, n_actions: int, start: float):
+        timings.append(
+            {
+                "type": action_type,
+                "n_actions": n_actions,
+                "start": start - batch_start,
+                "elapsed": time.time() - start,
+            }
+        )
+
+    i = 0
+    while i < len(actions):
+        action = actions[i]
+        action_type = action.get("type") if isinstance(action, dict) else None
+        start = time.time()
+
+        if action_type == "wait":
+            wait_ms += action.get("ms", 5000)
+            i += 1
+        elif action_type == "type":
+            # coalesce adjacent typing, unless new lines are involved (insert_text does not
+            # press Enter, which would change the behaviour of forms)
+            texts = []
+            while (
+                i < len(actions)
+                and isinstance(actions[i], dict)
+                and actions[i].get("type") == "type"
+                and "\n" not in actions[i].get("text", "")
+            ):
+                texts.append(actions[i].get("text", ""))
+                i += 1
+            if len(texts) > 1:
+                try:
+                    page.keyboard.insert_text("".join(texts))
+                except Exception as e:
+                    report_infeasible_instructions(f"Error executing action type: {e}")
+                record("type", len(texts), start)
+            else:
+                if not texts:  # single typing action with new lines
+                    i += 1
+                execute_openai_cua_action(
+                    action,
+                    page,
+                    send_message_to_user=send_message_to_user,
+                    report_infeasible_instructions=report_infeasible_instructions,
+                )
+                record("type", 1, start)
+        else:
+            execute_openai_cua_action(
+                action,
+                page,
+                send_message_to_user=send_message_to_user,
+                report_infeasible_instructions=report_infeasible_instructions,
+            )
+            record(str(action_type), 1, start)
+            i += 1
+
+    return {"wait_ms": wait_ms, "timings": timings}
@@ -1,3 +1,4 @@
+import time
 from typing import Literal
 
 import playwright.sync_api
@@ -49,6 +50,117 @@ def get_elem_by_bid(
     return elem
 
 
+def get_frame_by_bid(page: playwright.sync_api.Page, bid: str) -> playwright.sync_api.Frame:
+    """
+    Parse the given bid to sequentially locate every nested frame leading to the bid, and
+    return the frame in which the bid element is located (see `get_elem_by_bid()`). Unlike
+    frame locators, the returned frame can be used to evaluate scripts.
+
+    Args:
+        bid: the browsergym id (playwright testid) of the page element.
+
+    Returns:
+        Playwright frame.
+    """
+    if not isinstance(bid, str):
+        raise ValueError(f"expected a string, got {repr(bid)}")
+
+    current_frame = page.main_frame
+
+    # dive into each nested frame, to the frame where the element is located
+    i = 0
+    while bid[i:] and not bid[i:].isnumeric():
+        i += 1
+        # allow multi-character frame ids such as aA, bCD etc.
+        while bid[i:] and bid[i].isalpha() and bid[i].isupper():
+            i += 1
+        frame_bid = bid[:i]  # bid of the next frame to select
+        frame_elem = current_frame.get_by_test_id(frame_bid)
+        if not frame_elem.count():
+            raise ValueError(f'Could not find element with bid "{bid}"')
+        content_frame = frame_elem.element_handle(timeout=500).content_frame()
+        if content_frame is None:
+            raise ValueError(f'Could not find frame with bid "{frame_bid}"')
+        current_frame = content_frame
+
+    return current_frame
+
+
+def precheck_actionability(
+    elem: playwright.sync_api.Locator,
+    bid: str,
+    element_properties: dict,
+    stats: dict,
+    pointer: bool = True,
+    allow_force: bool = False,
+) -> bool:
+    """
+    Cheap actionability pre-check of an element before acting on it, to avoid waiting for
+    Playwright's actionability timeout (and the forced retry) on elements that are obviously
+    not actionable. The properties extracted from the last DOM snapshot (visibility, bbox,
+    clickable) are checked first, and a live `elementFromPoint` probe is only performed when
+    they suggest the element might not be actionable.
+
+    Args:
+        elem: the element to be acted upon.
+        bid: the browsergym id of the element.
+        element_properties: the extra element properties from the last observation.
+        stats: counters to be updated with the pre-check outcome.
+        pointer: whether the action is a pointer action (the element must receive the pointer).
+        allow_force: whether the action may go straight to its forced variant.
+
+    Returns:
+        True if the action should be performed with force=True, False otherwise.
+    """
+    t_start = time.time()
+    try:
+        props = (element_properties or {}).get(bid)
+        if (
+            props
+            and props.get("bbox") is not None
+            and (props.get("visibility") or 0) >= 0.5
+            and (props.get("clickable") or not pointer)
+        ):
+            stats["n_precheck_ok"] = stats.get("n_precheck_ok", 0) + 1
+            return False
+
+        # the last snapshot is not conclusive (or might be outdated), probe the live page
+        stats["n_precheck_probed"] = stats.get("n_precheck_probed", 0) + 1
+        state = elem.evaluate(
+            """elem => {
+    const rect = elem.getBoundingClientRect();
+    if (!elem.isConnected || rect.width === 0 || rect.height === 0) {
+        return "hidden";
+    }
+    const x = rect.left + rect.width / 2;
+    const y = rect.top + rect.height / 2;
+    if (x < 0 || y < 0 || x >= window.innerWidth || y >= window.innerHeight) {
+        return "offscreen";
+    }
+    const top_elem = elem.getRootNode().elementFromPoint(x, y);
+    if (top_elem && (top_elem === elem || elem.contains(top_elem))) {
+        return "ok";
+    }
+    return "covered";
+}""",
+            timeout=500,
+        )
+        if state == "hidden":
+            stats["n_precheck_failed"] = stats.get("n_precheck_failed", 0) + 1
+            raise ValueError(f'Element with bid "{bid}" is not visible')
+        if state == "covered" and pointer:
+            if allow_force:
+                stats["n_precheck_forced"] = stats.get("n_precheck_forced", 0) + 1
+                return True
+            stats["n_precheck_failed"] = stats.get("n_precheck_failed", 0) + 1
+            raise ValueError(f'Element with bid "{bid}" is covered by another element')
+        # offscreen elements are scrolled into view by playwright
+        stats["n_precheck_ok"] = stats.get("n_precheck_ok", 0) + 1
+        return False
+    finally:
+        stats["precheck_elapsed"] = stats.get("precheck_elapsed", 0) + time.time() - t_start
+
+
 def highlight_by_box(
     page: playwright.sync_api.Page, box: dict, color: Literal["blue", "red"] = "blue"
 ):
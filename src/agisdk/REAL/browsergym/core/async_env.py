@@ -0,0 +1,301 @@
+"""Many episodes on one event loop and one browser process, with the Playwright async API.
+
+A `SharedBrowser` launches a single Chromium with the Playwright async API, on a running event
+loop. Each episode gets a `BrowserSession` of that browser, in which its environment creates its
+own browser contexts (task and chat). The environment code itself is unchanged: it runs in a
+thread of its own (`AsyncBrowserEnv`), and every Playwright call it makes is forwarded to the
+event loop through a synchronous proxy of the async objects. While an episode waits on the
+browser or on its agent's LLM, the other episodes keep going.
+
+    async with SharedBrowser(headless=True) as shared_browser:
+        env = AsyncBrowserEnv(
+            gym.make("browsergym/v2.omnizon-1", shared_browser=shared_browser.session())
+        )
+        obs, info = await env.reset(seed=0)
+        action = await asyncio.to_thread(agent.get_action, obs)
+        obs, reward, terminated, truncated, info = await env.step(action)
+        await env.close()
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import functools
+import inspect
+import logging
+import threading
+from typing import Any, Optional
+
+from playwright.async_api import async_playwright
+
+from . import _set_shared_browser
+from .constants import BROWSERGYM_ID_ATTRIBUTE
+
+logger = logging.getLogger(__name__)
+
+
+def _is_playwright_object(value) -> bool:
+    return type(value).__module__.startswith("playwright.")
+
+
+class _SyncProxy:
+    """Synchronous view of an object of the Playwright async API, usable from any thread.
+
+    Method calls and attribute reads are executed on the event loop owning the object (and
+    awaited there if they return an awaitable), while the calling thread blocks on the result.
+    Playwright objects found in the results are wrapped in turn, and callbacks get wrapped
+    arguments. From the event loop thread itself (e.g. in a callback), only calls that do not
+    need to be awaited are possible.
+    """
+
+    __slots__ = ("_target", "_loop")
+
+    def __init__(self, target, loop: asyncio.AbstractEventLoop):
+        object.__setattr__(self, "_target", target)
+        object.__setattr__(self, "_loop", loop)
+
+    def _run(self, func, *args, **kwargs):
+        if self._loop_thread():
+            result = func(*args, **kwargs)
+            if inspect.isawaitable(result):
+                if inspect.iscoroutine(result):
+                    result.close()
+                raise RuntimeError(
+                    f"Cannot wait for {func} from the event loop thread (e.g. in a callback)."
+                )
+            return self._wrap(result)
+
+        if self._loop.is_closed():
+            raise RuntimeError("The event loop of the shared browser is closed.")
+
+        async def call():
+            result = func(*args, **kwargs)
+            if inspect.isawaitable(result):
+                result = await result
+            return result
+
+        return self._wrap(asyncio.run_coroutine_threadsafe(call(), self._loop).result())
+
+    def _loop_thread(self) -> bool:
+        try:
+            return asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
+
+    def _wrap(self, value):
+        if _is_playwright_object(value):
+            return _SyncProxy(value, self._loop)
+        if isinstance(value, (list, tuple)) and value and _is_playwright_object(value[0]):
+            return type(value)(_SyncProxy(item, self._loop) for item in value)
+        if isinstance(value, dict) and any(map(_is_playwright_object, value.values())):
+            return {key: self._wrap(item) for key, item in value.items()}
+        return value
+
+    def _unwrap(self, value):
+        if isinstance(value, _SyncProxy):
+            return value._target
+        if isinstance(value, (list, tuple)):
+            return type(value)(self._unwrap(item) for item in value)
+        if isinstance(value, dict):
+            return {key: self._unwrap(item) for key, item in value.items()}
+        if callable(value) and not _is_playwright_object(value):
+            return self._wrap_callback(value)
+        return value
+
+    def _wrap_callback(self, callback):
+        # keeps the signature of the callback, which Playwright inspects to pass arguments
+        @functools.wraps(callback)
+        def wrapper(*args):
+            return self._unwrap(callback(*(self._wrap(arg) for arg in args)))
+
+        return wrapper
+
+    def __getattr__(self, name: str):
+        target = self._target
+        if inspect.isfunction(inspect.getattr_static(type(target), name, None)):
+            method = getattr(target, name)
+
+            def call(*args, **kwargs):
+                return self._run(method, *self._unwrap(args), **self._unwrap(kwargs))
+
+            return call
+        # properties (possibly async, e.g. EventInfo.value) and plain attributes
+        return self._run(getattr, target, name)
+
+    def __setattr__(self, name: str, value):
+        self._run(setattr, self._target, name, self._unwrap(value))
+
+    def __enter__(self):
+        return self._run(self._target.__aenter__)
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._run(self._target.__aexit__, exc_type, exc, tb)
+
+    def __eq__(self, other):
+        if isinstance(other, _SyncProxy):
+            other = other._target
+        return self._target == other
+
+    def __hash__(self):
+        return hash(self._target)
+
+    def __str__(self):
+        return str(self._target)
+
+    def __repr__(self):
+        return f"<sync proxy of {self._target!r}>"
+
+
+class SharedBrowser:
+    """One Chromium process, driven by the Playwright async API from the running event loop,
+    shared by the episodes of that loop (each in its own browser contexts).
+
+    Args:
+        headless: run the browser headless.
+        launch_kwargs: extra parameters for `chromium.launch()`.
+    """
+
+    def __init__(self, headless: bool = True, launch_kwargs: Optional[dict] = None):
+        self.headless = headless
+        self.launch_kwargs = launch_kwargs or {}
+        self.loop = None
+        self.playwright = None
+        self.browser = None
+        self._sessions = set()
+
+    async def start(self) -> "SharedBrowser":
+        self.loop = asyncio.get_running_loop()
+        self.playwright = await async_playwright().start()
+        # important: change playwright's test id attribute from "data-testid" to "bid"
+        self.playwright.selectors.set_test_id_attribute(BROWSERGYM_ID_ATTRIBUTE)
+        self.browser = await self.playwright.chromium.launch(
+            headless=self.headless, **self.launch_kwargs
+        )
+        logger.info(f"Shared browser launched (Chromium {self.browser.version})")
+        return self
+
+    async def close(self) -> None:
+        for session in list(self._sessions):
+            await session.aclose()
+        if self.browser is not None:
+            with contextlib.suppress(Exception):
+                await self.browser.close()
+            self.browser = None
+        if self.playwright is not None:
+            await self.playwright.stop()
+            self.playwright = None
+
+    async def __aenter__(self) -> "SharedBrowser":
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    def session(self) -> "BrowserSession":
+        """A new session of the browser, for one episode."""
+        if self.browser is None:
+            raise RuntimeError("The shared browser is not started.")
+        return BrowserSession(self)
+
+
+class BrowserSession:
+    """The view of a `SharedBrowser` given to one episode (see `BrowserEnv(shared_browser=...)`).
+
+    Exposes the Playwright instance and the browser through synchronous proxies, for the
+    environment running in its own thread, and keeps track of the contexts created by the
+    episode so that they can all be closed at the end of the episode, even if it did not finish.
+    """
+
+    def __init__(self, shared_browser: SharedBrowser):
+        self._shared_browser = shared_browser
+        self.loop = shared_browser.loop
+        self.playwright = _SyncProxy(shared_browser.playwright, self.loop)
+        self.browser = _SyncProxy(shared_browser.browser, self.loop)
+        self._contexts = []
+        shared_browser._sessions.add(self)
+
+    def new_context(self, **kwargs):
+        """Create a browser context for the episode (same arguments as `Browser.new_context`)."""
+        context = self.browser.new_context(**kwargs)
+        self._contexts.append(context)
+        return context
+
+    async def aclose(self) -> None:
+        """Close the contexts of the episode that are still open."""
+        self._shared_browser._sessions.discard(self)
+        contexts, self._contexts = self._contexts, []
+        for context in contexts:
+            with contextlib.suppress(Exception):
+                await context._target.close()
+
+
+def run_in_thread(func, *args, name: str = None) -> asyncio.Future:
+    """Run a blocking function in a new daemon thread, in a copy of the current context.
+
+    Unlike `asyncio.to_thread`, no executor is involved: an episode stuck in its thread (e.g. after
+    a timeout) never holds back the other ones.
+
+    Returns:
+        A future of the running event loop, set with the result of the function.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    context = contextvars.copy_context()
+
+    def set_result(result):
+        if not future.done():
+            future.set_result(result)
+
+    def set_exception(exc):
+        if not future.done():
+            future.set_exception(exc)
+
+    def target():
+        try:
+            result = context.run(func, *args)
+        except BaseException as e:
+            callback, value = set_exception, e
+        else:
+            callback, value = set_result, result
+        # the loop might be closed already, if nobody waits for this thread anymore
+        with contextlib.suppress(RuntimeError):
+            loop.call_soon_threadsafe(callback, value)
+
+    threading.Thread(target=target, name=name, daemon=True).start()
+    return future
+
+
+def run_with_shared_browser(session: BrowserSession, func, *args) -> Any:
+    """Call `func(*args)`, with the environments it creates running in the session's browser."""
+    _set_shared_browser(session)
+    return func(*args)
+
+
+class AsyncBrowserEnv:
+    """Async interface of a `BrowserEnv` (or of a gym wrapper of one) created with a
+    `BrowserSession` as `shared_browser`.
+
+    Each call runs the environment method in a thread, while the event loop drives the browser.
+    Calls must not overlap: an environment has a single active page.
+    """
+
+    def __init__(self, env):
+        self.env = env
+
+    @property
+    def unwrapped(self):
+        return self.env.unwrapped
+
+    async def reset(self, seed=None, **kwargs) -> tuple:
+        return await run_in_thread(functools.partial(self.env.reset, seed=seed, **kwargs))
+
+    async def step(self, action) -> tuple:
+        return await run_in_thread(self.env.step, action)
+
+    async def close(self) -> None:
+        session = self.env.unwrapped.shared_browser
+        try:
+            await run_in_thread(self.env.close)
+        finally:
+            if isinstance(session, BrowserSession):
+                await session.aclose()
@@ -8,6 +8,7 @@ from typing import Literal
 import playwright.sync_api
 
 from . import _get_global_playwright, chat_files
+from .tracing import traced
 
 # Define CHATBOX_DIR using file path
 CHATBOX_DIR = Path(chat_files)
@@ -17,15 +18,23 @@ logger = logging.getLogger(__name__)
 
 class Chat:
     def __init__(
-        self, headless: bool, chat_size=(500, 800), record_video_dir=None, modern=True
+        self,
+        headless: bool,
+        chat_size=(500, 800),
+        record_video_dir=None,
+        modern=True,
+        browser=None,
     ) -> None:
         self.messages = []
 
-        # create a new browser, browser context and page for the chat
-        pw: playwright.sync_api.Playwright = _get_global_playwright()
-        self.browser = pw.chromium.launch(
-            headless=headless, args=[f"--window-size={chat_size[0]},{chat_size[1]}"]
-        )
+        # create a new browser (unless one is provided), browser context and page for the chat
+        self._owns_browser = browser is None
+        if browser is None:
+            pw: playwright.sync_api.Playwright = _get_global_playwright()
+            browser = pw.chromium.launch(
+                headless=headless, args=[f"--window-size={chat_size[0]},{chat_size[1]}"]
+            )
+        self.browser = browser
         self.context = self.browser.new_context(
             no_viewport=True,
             record_video_dir=Path(record_video_dir) / "chat_video" if record_video_dir else None,
@@ -52,6 +61,7 @@ class Chat:
         # returning a list as JS doesnt like tuples
         return ["user", time.strftime("%H:%M", time.localtime(utc_time)), msg]
 
+    @traced("chat.add_message", cat="chat")
     def add_message(
         self,
         role: Literal["user", "user_image", "assistant", "info", "infeasible"],
@@ -76,7 +86,9 @@ class Chat:
 
     def close(self):
         self.context.close()
-        self.browser.close()
+        # a provided browser is shared with other environments
+        if self._owns_browser:
+            self.browser.close()
 
 
 def get_chatbox_modern(chatbox_dir) -> str:
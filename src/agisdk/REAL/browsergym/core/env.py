@@ -1,9 +1,12 @@
+import atexit
 import copy
 import json
 import logging
 import os
 import re
+import shutil
 import tempfile
+import threading
 import time
 from abc import ABC
 from pathlib import Path
@@ -13,10 +16,10 @@ import gymnasium as gym
 import numpy as np
 import playwright.sync_api
 
-from . import _get_global_playwright
+from . import _get_global_playwright, _get_shared_browser
 from .action.base import execute_python_code
 from .action.highlevel import HighLevelActionSet
-from .action.openai_cua import execute_openai_cua_action
+from .action.openai_cua import execute_openai_cua_action, execute_openai_cua_actions
 from .chat import Chat
 from .constants import BROWSERGYM_ID_ATTRIBUTE, EXTRACT_OBS_MAX_TRIES, TEXT_MAX_LENGTH
 from .observation import (
@@ -31,10 +34,63 @@ from .observation import (
 )
 from .spaces import AnyBox, AnyDict, Unicode
 from .task import AbstractBrowserTask
+from .tracing import record_span, span, traced
 
 logger = logging.getLogger(__name__)
 
 
+# Golden profiles whose copy takes longer than this many seconds (e.g. on network storage) are
+# snapshotted to local temporary storage on first use, and the following environments of this
+# process copy the snapshot instead. None disables the snapshots.
+GOLDEN_PROFILE_SNAPSHOT_MIN_COPY_TIME: Optional[float] = 2.0
+# golden directory -> snapshot directory
+_PROFILE_SNAPSHOTS: dict[str, str] = {}
+_PROFILE_SNAPSHOTS_LOCK = threading.Lock()
+# files of a Chromium profile that belong to the browser instance using it
+_PROFILE_INSTANCE_FILES = ("SingletonLock", "SingletonSocket", "SingletonCookie")
+
+
+def _copy_golden_profile(golden_user_data_dir: str, user_data_dir: str) -> None:
+    """
+    Copy a golden profile to the user data directory of an environment, from its local snapshot
+    if the golden directory was measured to be slow to copy (see
+    GOLDEN_PROFILE_SNAPSHOT_MIN_COPY_TIME).
+    """
+    golden_user_data_dir = os.path.abspath(golden_user_data_dir)
+    with _PROFILE_SNAPSHOTS_LOCK:
+        snapshot_dir = _PROFILE_SNAPSHOTS.get(golden_user_data_dir)
+    source_dir = snapshot_dir if snapshot_dir and os.path.isdir(snapshot_dir) else None
+
+    start_time = time.time()
+    shutil.copytree(
+        source_dir or golden_user_data_dir,
+        user_data_dir,
+        symlinks=True,
+        ignore=shutil.ignore_patterns(*_PROFILE_INSTANCE_FILES),
+        dirs_exist_ok=True,
+    )
+    copy_time = time.time() - start_time
+    if (
+        source_dir is not None
+        or GOLDEN_PROFILE_SNAPSHOT_MIN_COPY_TIME is None
+        or copy_time < GOLDEN_PROFILE_SNAPSHOT_MIN_COPY_TIME
+    ):
+        return
+
+    # slow golden directory: snapshot the fresh (still unused) copy to local storage
+    with _PROFILE_SNAPSHOTS_LOCK:
+        if golden_user_data_dir in _PROFILE_SNAPSHOTS:
+            return
+        snapshot_dir = tempfile.mkdtemp(prefix="browsergym_golden_")
+        logger.info(
+            f"Copying golden profile {golden_user_data_dir} took {copy_time:.1f}s, "
+            f"snapshotting it to {snapshot_dir}"
+        )
+        shutil.copytree(user_data_dir, snapshot_dir, symlinks=True, dirs_exist_ok=True)
+        atexit.register(shutil.rmtree, snapshot_dir, ignore_errors=True)
+        _PROFILE_SNAPSHOTS[golden_user_data_dir] = snapshot_dir
+
+
 def _try_to_extract_legacy_goal(goal: list):
     legacy_goal_strings = []
     for message in goal:
@@ -78,6 +134,7 @@ class BrowserEnv(gym.Env, ABC):
         pw_context_kwargs: dict = None,
         golden_user_data_dir: Optional[str] = None,
         extensions_dir: Optional[str] = None,
+        shared_browser=None,
         # agent-related arguments
         action_mapping: Optional[callable] = HighLevelActionSet().to_python_code,
     ):
@@ -100,6 +157,7 @@ class BrowserEnv(gym.Env, ABC):
             action_mapping: if set, the environment will use this function to map every received action to executable Python code.
             golden_user_data_dir: desired user data directory for persistent browser context. If provided, a copy of this directory will be used for the browser session. This allows reusing a pre-configured browser state (cookies, localStorage, etc).
             extensions_dir: directory containing Chrome extensions to load (can be a single extension directory or a directory of extensions). Requires persistent context and disables headless mode.
+            shared_browser: if set, the browser context is created in this already running browser (see `async_env.BrowserSession` and `reused_browser.ReusedBrowser`) instead of launching a new browser, in which case `slow_mo` and `pw_chromium_kwargs` are ignored. Defaults to the shared browser of the current context, if any.
 
         """
         if pw_context_kwargs is None:
@@ -125,6 +183,10 @@ class BrowserEnv(gym.Env, ABC):
         self.golden_user_data_dir = golden_user_data_dir
         self.extensions_dir = extensions_dir
         self._temp_user_data_dir = None
+        self.shared_browser = (
+            shared_browser if shared_browser is not None else _get_shared_browser()
+        )
+        self._owns_browser = True
         self.action_mapping = action_mapping
         self.active_agent_name = None  # Add attribute to store agent name
 
@@ -190,14 +252,13 @@ class BrowserEnv(gym.Env, ABC):
             self.chat.close()
             # close the browser context
             self.context.close()
-            # close the browser
-            self.browser.close()
+            # close the browser (unless it is shared with other environments)
+            if self._owns_browser:
+                self.browser.close()
             self.task = None
 
             # Clean up temporary directory if we created one
             if self._temp_user_data_dir:
-                import shutil
-
                 logger.info(
                     f"Cleaning up temporary user data directory: {self._temp_user_data_dir}"
                 )
@@ -212,7 +273,8 @@ class BrowserEnv(gym.Env, ABC):
             self.task.teardown()
             self.context.close()
             self.chat.close()
-            self.browser.close()
+            if self._owns_browser:
+                self.browser.close()
 
         # create a new task
         self.task = self.task_entrypoint(seed=seed, **self.task_kwargs)
@@ -234,8 +296,11 @@ class BrowserEnv(gym.Env, ABC):
         slow_mo = override_property(self.task, self, "slow_mo")
         timeout = override_property(self.task, self, "timeout")
 
-        # use the global Playwright instance
-        pw: playwright.sync_api.Playwright = _get_global_playwright()
+        # use the global Playwright instance (or the one driving the shared browser)
+        if self.shared_browser is not None:
+            pw: playwright.sync_api.Playwright = self.shared_browser.playwright
+        else:
+            pw: playwright.sync_api.Playwright = _get_global_playwright()
         # important: change playwright's test id attribute from "data-testid" to "bid"
         pw.selectors.set_test_id_attribute(BROWSERGYM_ID_ATTRIBUTE)
 
@@ -284,16 +349,13 @@ class BrowserEnv(gym.Env, ABC):
 
         args = None if not args else args
 
-        # Setup temp directory for golden profile if needed
+        # Setup temp directory for golden profile if needed (a fresh copy for each environment)
         if self.golden_user_data_dir:
-            import shutil
-            import tempfile
-
             self._temp_user_data_dir = tempfile.mkdtemp(prefix="browsergym_")
             logger.info(
                 f"Copying golden profile from {self.golden_user_data_dir} to {self._temp_user_data_dir}"
             )
-            shutil.copytree(self.golden_user_data_dir, self._temp_user_data_dir, dirs_exist_ok=True)
+            _copy_golden_profile(self.golden_user_data_dir, self._temp_user_data_dir)
 
         # PERSISTENT CONTEXT PATH
         if self.golden_user_data_dir or self.extensions_dir:
@@ -315,6 +377,22 @@ class BrowserEnv(gym.Env, ABC):
             )
             # Get browser from context
             self.browser = self.context.browser
+            self._owns_browser = True
+
+        # SHARED BROWSER PATH
+        elif self.shared_browser is not None:
+            # one browser process for many environments, each in its own context
+            self.browser = self.shared_browser.browser
+            self._owns_browser = False
+            self.context = self.shared_browser.new_context(
+                no_viewport=True if self.resizeable_window else None,
+                viewport=viewport,
+                record_video_dir=(
+                    Path(self.record_video_dir) / "task_video" if self.record_video_dir else None
+                ),
+                record_video_size=viewport,
+                **self.pw_context_kwargs,
+            )
 
         # STANDARD PATH
         else:
@@ -325,6 +403,7 @@ class BrowserEnv(gym.Env, ABC):
                 args=args,
                 **self.pw_chromium_kwargs,
             )
+            self._owns_browser = True
 
             # Create context
             self.context = self.browser.new_context(
@@ -377,6 +456,7 @@ document.addEventListener("visibilitychange", () => {
             headless=self.headless,
             chat_size=(500, max(viewport["height"], 800)),
             record_video_dir=self.record_video_dir,
+            browser=self.shared_browser,
         )
 
         # create a new page
@@ -384,7 +464,8 @@ document.addEventListener("visibilitychange", () => {
         recording_start_time = time.time()
 
         # setup the task
-        task_goal, task_info = self.task.setup(page=self.page)
+        with span("task.setup", cat="env"):
+            task_goal, task_info = self.task.setup(page=self.page)
 
         # process the task goal
 
@@ -433,6 +514,7 @@ document.addEventListener("visibilitychange", () => {
         # no action yet
         self.last_action = ""
         self.last_action_error = ""
+        self.last_extra_element_properties = {}
         self.infeasible_message_received = False
 
         # if asked, wait for user message
@@ -443,6 +525,7 @@ document.addEventListener("visibilitychange", () => {
 
         info = {}
         info["task_info"] = task_info
+        info["obs_timings"] = self.last_obs_timings
 
         # TODO this is a bit hacky, find a better solution to record videos
         if self.record_video_dir:
@@ -455,14 +538,14 @@ document.addEventListener("visibilitychange", () => {
 
         return obs, info
 
-    def step(self, action: Union[dict, str]) -> tuple:
+    def step(self, action: Union[dict, list, str]) -> tuple:
         # Get agent_name from instance attribute
         agent_name = self.active_agent_name
 
         # Store a string representation for the observation and logging
-        if isinstance(action, dict):
+        if isinstance(action, (dict, list)):
             try:
-                # Convert dict action to a JSON string
+                # Convert dict (or batch of dicts) action to a JSON string
                 self.last_action = json.dumps(action)
             except TypeError:  # Handle potential non-serializable items if any
                 self.last_action = str(action)  # Fallback to simple string conversion
@@ -473,6 +556,7 @@ document.addEventListener("visibilitychange", () => {
         info = {}
         info["action_exec_start"] = time.time()
         info["action_exec_timeout"] = 0
+        info["action_precheck"] = {}  # actionability pre-check counters, if enabled
 
         def send_message_to_user(text: str):
             self.chat.add_message(role="assistant", msg=text)
@@ -485,6 +569,7 @@ document.addEventListener("visibilitychange", () => {
         self.last_action_error = ""
         action_executed = False  # Flag to track if a browser action was attempted
         agent_reported_error = False  # Flag if agent itself reported an error
+        settle_time = 0.5  # time to wait for JS events to be fired after the action
 
         # try to execute the action
         # Use agent_name read from self.active_agent_name
@@ -516,6 +601,36 @@ document.addEventListener("visibilitychange", () => {
                             report_infeasible_instructions=report_infeasible_instructions,
                         )
                         action_executed = True  # A browser action was attempted
+                elif isinstance(action, list):
+                    # Batch of CUA actions, executed in one go with a single settle phase
+                    # and a single observation at the end
+                    executable_actions = []
+                    for sub_action in action:
+                        sub_action_type = (
+                            sub_action.get("type") if isinstance(sub_action, dict) else None
+                        )
+                        if sub_action_type == "error":
+                            self.last_action_error = sub_action.get(
+                                "message", "Agent reported an unspecified error"
+                            )
+                            agent_reported_error = True
+                        elif sub_action_type != "no_op":
+                            executable_actions.append(sub_action)
+                    if executable_actions:
+                        action_executed = True  # A browser action was attempted
+                        batch_info = execute_openai_cua_actions(
+                            executable_actions,
+                            self.page,
+                            send_message_to_user=send_message_to_user,
+                            report_infeasible_instructions=report_infeasible_instructions,
+                        )
+                        info["action_batch_timings"] = batch_info["timings"]
+                        # fold all requested waits into the settle phase
+                        settle_time = max(settle_time, batch_info["wait_ms"] / 1000)
+                    else:
+                        logger.info(
+                            f"Received non-executable action batch from agent: {self.last_action}"
+                        )
                 else:
                     # Handle case where CUA agent returns a string unexpectedly
                     logger.warning(
@@ -542,6 +657,8 @@ document.addEventListener("visibilitychange", () => {
                         self.page,
                         send_message_to_user=send_message_to_user,
                         report_infeasible_instructions=report_infeasible_instructions,
+                        element_properties=self.last_extra_element_properties,
+                        precheck_stats=info["action_precheck"],
                     )
                     action_executed = True
                 else:
@@ -557,8 +674,8 @@ document.addEventListener("visibilitychange", () => {
                 f"Error during action execution attempt: {self.last_action_error}",
                 exc_info=True,
             )  # Log with traceback
-            # Check for timeout specifically
-            timeout_match = re.match(
+            # Check for timeout specifically (possibly wrapped, e.g. by batched actions)
+            timeout_match = re.search(
                 r"TimeoutError: Timeout (\d+)ms exceeded", self.last_action_error
             )
             if timeout_match:
@@ -576,18 +693,29 @@ document.addEventListener("visibilitychange", () => {
             logger.debug(f"No browser action executed for this step (Action: {self.last_action}).")
 
         info["action_exec_stop"] = time.time()
+        record_span(
+            "env.execute_action", info["action_exec_start"], info["action_exec_stop"], cat="env"
+        )
+
+        # durations of the phases between the action and the next observation
+        env_timings = {}
+        t_start = time.time()
 
         # wait a bit only if an action was executed that might change state
         if action_executed:
-            time.sleep(0.5)  # wait for JS events to be fired (half a second)
+            time.sleep(settle_time)  # wait for JS events to be fired
             # Try/catch cookies call as it can sometimes fail if context is closed unexpectedly
             try:
                 self.context.cookies()  # trigger all waiting Playwright callbacks
             except Exception as e:
                 logger.warning(f"Could not trigger Playwright callbacks via context.cookies(): {e}")
+        env_timings["settle"] = time.time() - t_start
+        record_span("env.settle", t_start, t_start + env_timings["settle"], cat="env")
 
         # wait for the network to idle before extracting the observation, reward etc.
+        t_start = time.time()
         self._wait_dom_loaded()
+        env_timings["wait_dom_loaded"] = time.time() - t_start
 
         # after the action is executed, the active page might have changed
         # perform a safety check
@@ -600,7 +728,9 @@ document.addEventListener("visibilitychange", () => {
 
         logger.debug("Initiating task validation")
         # extract reward, done, user_message, info (task-specific)
+        t_start = time.time()
         reward, done, user_message, task_info = self._task_validate()
+        env_timings["task_validate"] = time.time() - t_start
         info["task_info"] = task_info
         logger.debug("Task validation done")
 
@@ -611,6 +741,7 @@ document.addEventListener("visibilitychange", () => {
         # extract observation (generic)
         obs = self._get_obs()
         logger.debug("Observation extracted")
+        info["obs_timings"] = {**env_timings, **self.last_obs_timings}
 
         # new step API wants a 5-tuple (gymnasium)
         terminated = done or (
@@ -620,6 +751,7 @@ document.addEventListener("visibilitychange", () => {
 
         return obs, reward, terminated, truncated, info
 
+    @traced("env.task_validate", cat="env")
     def _task_validate(self):
         # back-up these in case validate() navigates pages and messes the history
         prev_active_page = self.page
@@ -643,6 +775,7 @@ document.addEventListener("visibilitychange", () => {
         if self.chat.messages[-1]["role"] == "assistant" and self.wait_for_user_message:
             self.chat.wait_for_user_message()
 
+    @traced("env.wait_dom_loaded", cat="env")
     def _wait_dom_loaded(self):
         for page in self.context.pages:
             try:
@@ -696,16 +829,37 @@ document.addEventListener("visibilitychange", () => {
         if self.page.is_closed():
             raise RuntimeError(f"Unexpected: active page has been closed ({self.page}).")
 
+    @traced("env.get_obs", cat="env")
     def _get_obs(self):
+        # durations of the extraction phases (summed over retries)
+        timings = {
+            "pre_extract": 0.0,
+            "dom_snapshot": 0.0,
+            "axtree": 0.0,
+            "focused_element": 0.0,
+            "extra_properties": 0.0,
+            "n_extract_retries": 0,
+        }
+        t_obs_start = time.time()
         for retries_left in reversed(range(EXTRACT_OBS_MAX_TRIES)):
             try:
                 # pre-extraction, mark dom elements (set bid, set dynamic attributes like value and checked)
+                t_start = time.time()
                 _pre_extract(self.page, self.tags_to_mark)
+                timings["pre_extract"] += time.time() - t_start
 
+                t_start = time.time()
                 dom = extract_dom_snapshot(self.page)
+                timings["dom_snapshot"] += time.time() - t_start
+                t_start = time.time()
                 axtree = extract_merged_axtree(self.page)
+                timings["axtree"] += time.time() - t_start
+                t_start = time.time()
                 focused_element_bid = extract_focused_element_bid(self.page)
+                timings["focused_element"] += time.time() - t_start
+                t_start = time.time()
                 extra_properties = extract_dom_extra_properties(dom)
+                timings["extra_properties"] += time.time() - t_start
             except (playwright.sync_api.Error, MarkingError) as e:
                 err_msg = str(e)
                 # try to add robustness to async events (detached / deleted frames)
@@ -721,6 +875,7 @@ document.addEventListener("visibilitychange", () => {
                     )
                     # post-extract cleanup (ARIA attributes)
                     _post_extract(self.page)
+                    timings["n_extract_retries"] += 1
                     time.sleep(0.5)
                     continue
                 else:
@@ -728,7 +883,12 @@ document.addEventListener("visibilitychange", () => {
             break
 
         # post-extraction cleanup of temporary info in dom
+        t_start = time.time()
         _post_extract(self.page)
+        timings["post_extract"] = time.time() - t_start
+
+        # keep the element properties at hand, for the actionability pre-check of the next action
+        self.last_extra_element_properties = extra_properties
 
         task_id = getattr(self.task, "task_id", None)
         if task_id is None:
@@ -740,6 +900,10 @@ document.addEventListener("visibilitychange", () => {
                     task_id = None
         task_id = str(task_id) if task_id is not None else ""
 
+        t_start = time.time()
+        screenshot = extract_screenshot(self.page)
+        timings["screenshot"] = time.time() - t_start
+
         # obs is generic to all tasks
         obs = {
             "chat_messages": copy.deepcopy(self.chat.messages),
@@ -749,7 +913,7 @@ document.addEventListener("visibilitychange", () => {
             "open_pages_urls": [page.url for page in self.context.pages],
             "active_page_index": np.asarray([self.context.pages.index(self.page)]),
             "url": self.page.url,
-            "screenshot": extract_screenshot(self.page),
+            "screenshot": screenshot,
             "dom_object": dom,
             "axtree_object": axtree,
             "extra_element_properties": extra_properties,
@@ -759,5 +923,7 @@ document.addEventListener("visibilitychange", () => {
             "elapsed_time": np.asarray([time.time() - self.start_time]),
             "browser": self.browser,  # Direct access to the browser object
         }
+        timings["obs_extract"] = time.time() - t_obs_start
+        self.last_obs_timings = timings
 
         return obs
@@ -0,0 +1,175 @@
+/**
+ * Execute a group of DOM-level actions (fill, select_option, focus, clear, click) on elements
+ * of the current frame, in a single round trip. Actions are executed sequentially, and the
+ * script stops at the first action that cannot be performed safely from within the page. It
+ * returns one result per executed action, so that the caller can attribute errors and resume
+ * the remaining actions through the regular Playwright path.
+ */
+([actions, bid_attr_name]) => {
+
+    // locate an element by its bid, diving into shadowDOMs if needed
+    function find_by_bid(root, bid) {
+        let elem = root.querySelector(`[${bid_attr_name}="${CSS.escape(bid)}"]`);
+        if (elem) {
+            return elem;
+        }
+        for (const host of root.querySelectorAll("*")) {
+            if (host.shadowRoot !== null) {
+                elem = find_by_bid(host.shadowRoot, bid);
+                if (elem) {
+                    return elem;
+                }
+            }
+        }
+        return null;
+    }
+
+    function is_visible(elem) {
+        const style = window.getComputedStyle(elem);
+        if (style.visibility === "hidden" || style.display === "none") {
+            return false;
+        }
+        const rect = elem.getBoundingClientRect();
+        return rect.width > 0 && rect.height > 0;
+    }
+
+    function is_editable(elem) {
+        if (elem.isContentEditable) {
+            return true;
+        }
+        if (elem instanceof HTMLTextAreaElement) {
+            return !elem.disabled && !elem.readOnly;
+        }
+        if (elem instanceof HTMLInputElement) {
+            const non_text_types = new Set([
+                "checkbox", "radio", "file", "button", "submit", "reset", "image", "hidden", "range", "color"
+            ]);
+            return !non_text_types.has(elem.type) && !elem.disabled && !elem.readOnly;
+        }
+        return false;
+    }
+
+    // use the native value setter, so that frameworks (React etc.) notice the change
+    function set_value(elem, value) {
+        const proto = Object.getPrototypeOf(elem);
+        const descriptor = Object.getOwnPropertyDescriptor(proto, "value");
+        if (descriptor && descriptor.set) {
+            descriptor.set.call(elem, value);
+        }
+        else {
+            elem.value = value;
+        }
+    }
+
+    function fill(elem, value) {
+        if (!is_editable(elem)) {
+            return "element is not an editable <input>, <textarea> or [contenteditable] element";
+        }
+        elem.focus();
+        if (elem.isContentEditable) {
+            elem.textContent = value;
+        }
+        else {
+            set_value(elem, value);
+        }
+        elem.dispatchEvent(new InputEvent("input", {bubbles: true, composed: true, inputType: "insertText", data: value}));
+        elem.dispatchEvent(new Event("change", {bubbles: true}));
+        return null;
+    }
+
+    function select_option(elem, options) {
+        if (!(elem instanceof HTMLSelectElement) || elem.disabled) {
+            return "element is not an enabled <select> element";
+        }
+        if (!Array.isArray(options)) {
+            options = [options];
+        }
+        const selected = [];
+        for (const option of options) {
+            const match = Array.from(elem.options).find(
+                (o) => o.value === option || o.label === option
+            );
+            if (!match) {
+                return `option ${JSON.stringify(option)} not found`;
+            }
+            selected.push(match);
+        }
+        if (selected.length > 1 && !elem.multiple) {
+            return "element does not accept multiple options";
+        }
+        for (const o of elem.options) {
+            o.selected = selected.includes(o);
+        }
+        elem.dispatchEvent(new Event("input", {bubbles: true, composed: true}));
+        elem.dispatchEvent(new Event("change", {bubbles: true}));
+        return null;
+    }
+
+    function click(elem) {
+        if (elem.disabled) {
+            return "element is disabled";
+        }
+        elem.scrollIntoView({block: "center", inline: "center", behavior: "instant"});
+        const rect = elem.getBoundingClientRect();
+        const x = rect.left + rect.width / 2;
+        const y = rect.top + rect.height / 2;
+        // the element must receive the click, i.e. not be covered by another element
+        const top_elem = document.elementFromPoint(x, y);
+        if (!top_elem || !(top_elem === elem || elem.contains(top_elem))) {
+            return "element is covered by another element";
+        }
+        const init = {bubbles: true, cancelable: true, composed: true, clientX: x, clientY: y, button: 0, view: window};
+        top_elem.dispatchEvent(new PointerEvent("pointerdown", {...init, buttons: 1}));
+        top_elem.dispatchEvent(new MouseEvent("mousedown", {...init, buttons: 1}));
+        if (typeof elem.focus === "function") {
+            elem.focus();
+        }
+        top_elem.dispatchEvent(new PointerEvent("pointerup", init));
+        top_elem.dispatchEvent(new MouseEvent("mouseup", init));
+        top_elem.click();
+        return null;
+    }
+
+    const results = [];
+    for (const [name, args] of actions) {
+        const elem = find_by_bid(document, args.bid);
+        let error = null;
+        if (!elem) {
+            error = `Could not find element with bid "${args.bid}"`;
+        }
+        else if (!elem.isConnected || !is_visible(elem)) {
+            error = "element is not visible";
+        }
+        else {
+            try {
+                switch (name) {
+                    case "fill":
+                        error = fill(elem, args.value);
+                        break;
+                    case "clear":
+                        error = fill(elem, "");
+                        break;
+                    case "select_option":
+                        error = select_option(elem, args.options);
+                        break;
+                    case "focus":
+                        elem.focus();
+                        break;
+                    case "click":
+                        error = click(elem);
+                        break;
+                    default:
+                        error = `unsupported batched action ${name}`;
+                }
+            }
+            catch (e) {
+                error = `${e.name}: ${e.message}`;
+            }
+        }
+        results.push({ok: error === null, error: error});
+        if (error !== null) {
+            break;
+        }
+    }
+    return results;
+}
@@ -12,6 +12,7 @@ import playwright.sync_api
 from .constants import BROWSERGYM_ID_ATTRIBUTE as BID_ATTR
 from .constants import BROWSERGYM_SETOFMARKS_ATTRIBUTE as SOM_ATTR
 from .constants import BROWSERGYM_VISIBILITY_ATTRIBUTE as VIS_ATTR
+from .tracing import traced
 
 MARK_FRAMES_MAX_TRIES = 3
 
@@ -23,6 +24,7 @@ class MarkingError(Exception):
     pass
 
 
+@traced("obs.pre_extract", cat="obs")
 def _pre_extract(
     page: playwright.sync_api.Page,
     tags_to_mark: Literal["all", "standard_html"] = "standard_html",
@@ -74,6 +76,7 @@ def _pre_extract(
     mark_frames_recursive(page.main_frame, frame_bid="")
 
 
+@traced("obs.post_extract", cat="obs")
 def _post_extract(page: playwright.sync_api.Page):
     js_frame_unmark_elements = pkgutil.get_data(
         __name__, "javascript/frame_unmark_elements.js"
@@ -103,6 +106,7 @@ def _post_extract(page: playwright.sync_api.Page):
                 raise e
 
 
+@traced("obs.screenshot", cat="obs")
 def extract_screenshot(page: playwright.sync_api.Page):
     """
     Extracts the screenshot image of a Playwright page using Chrome DevTools Protocol.
@@ -160,6 +164,7 @@ def extract_data_items_from_aria(string: str, with_warning: bool = True):
     return data_items, original_aria
 
 
+@traced("obs.dom_snapshot", cat="obs")
 def extract_dom_snapshot(
     page: playwright.sync_api.Page,
     computed_styles=None,
@@ -241,6 +246,7 @@ def pop_bids_from_attribute(dom_snapshot, attr: str):
                         break
 
 
+@traced("obs.extra_properties", cat="obs")
 def extract_dom_extra_properties(dom_snapshot):
     def to_string(idx):
         if idx == -1:
@@ -409,6 +415,7 @@ def extract_dom_extra_properties(dom_snapshot):
     return extra_properties
 
 
+@traced("obs.frame_axtrees", cat="obs")
 def extract_all_frame_axtrees(page: playwright.sync_api.Page):
     """
     Extracts the AXTree of all frames (main document and iframes) of a Playwright page using Chrome DevTools Protocol.
@@ -482,6 +489,7 @@ def extract_all_frame_axtrees(page: playwright.sync_api.Page):
     return frame_axtrees
 
 
+@traced("obs.axtree", cat="obs")
 def extract_merged_axtree(page: playwright.sync_api.Page):
     """
     Extracts the merged AXTree of a Playwright page (main document and iframes AXTrees merged) using Chrome DevTools Protocol.
@@ -530,6 +538,7 @@ def extract_merged_axtree(page: playwright.sync_api.Page):
     return merged_axtree
 
 
+@traced("obs.focused_element", cat="obs")
 def extract_focused_element_bid(page: playwright.sync_api.Page):
     # this JS code will dive through ShadowDOMs
     extract_focused_element_with_bid_script = """\
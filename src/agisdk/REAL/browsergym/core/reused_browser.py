@@ -0,0 +1,106 @@
+"""One browser per process, reused by the episodes it runs one after the other.
+
+Without it, every episode launches two Chromium processes (task and chat), which costs about a
+second and a few hundred MB each time. A `ReusedBrowser` is launched on first use with the
+global Playwright instance and kept for the following episodes of the process, e.g. the replicas
+of a task run by the same worker. As with `async_env.SharedBrowser`, each episode creates fresh
+contexts of its own in it (task and chat), closed at the end of the episode: the episodes share
+nothing but the browser process.
+
+    with reusing_browser(headless=True):
+        env = gym.make("browsergym/v2.omnizon-1")  # creates its contexts in the reused browser
+        ...
+        env.close()  # closes its contexts, the browser keeps running
+"""
+
+import atexit
+import contextlib
+import logging
+from typing import Optional
+
+from playwright.sync_api import Browser, BrowserContext, Playwright
+
+from . import _get_global_playwright, _reset_shared_browser, _set_shared_browser
+
+logger = logging.getLogger(__name__)
+
+# browser reused by the episodes of this process
+_PROCESS_BROWSER = None
+
+
+class ReusedBrowser:
+    """A Chromium process launched on first use, and launched again if it disconnects (e.g. it
+    crashed), given to the environments as `shared_browser` (see `BrowserEnv`).
+
+    Like all objects of the Playwright sync API, it must be used from a single thread.
+
+    Args:
+        headless: run the browser headless.
+        launch_kwargs: extra parameters for `chromium.launch()`.
+    """
+
+    def __init__(self, headless: bool = True, launch_kwargs: Optional[dict] = None):
+        self.headless = headless
+        self.launch_kwargs = launch_kwargs or {}
+        self.n_launches = 0
+        self._browser = None
+        self._contexts = []
+
+    @property
+    def playwright(self) -> Playwright:
+        return _get_global_playwright()
+
+    @property
+    def browser(self) -> Browser:
+        if self._browser is None or not self._browser.is_connected():
+            self._browser = self.playwright.chromium.launch(
+                headless=self.headless, **self.launch_kwargs
+            )
+            self.n_launches += 1
+            logger.info(f"Reused browser launched (Chromium {self._browser.version})")
+        return self._browser
+
+    def new_context(self, **kwargs) -> BrowserContext:
+        """Create a browser context for an episode (same arguments as `Browser.new_context`)."""
+        context = self.browser.new_context(**kwargs)
+        self._contexts.append(context)
+        return context
+
+    def close_contexts(self) -> None:
+        """Close the contexts that are still open (e.g. of an episode that did not finish)."""
+        contexts, self._contexts = self._contexts, []
+        for context in contexts:
+            with contextlib.suppress(Exception):
+                context.close()
+
+    def close(self) -> None:
+        self.close_contexts()
+        if self._browser is not None:
+            with contextlib.suppress(Exception):
+                self._browser.close()
+            self._browser = None
+
+
+def process_browser(headless: bool = True) -> ReusedBrowser:
+    """The browser reused by the episodes of this process (replaced if `headless` changes)."""
+    global _PROCESS_BROWSER
+    if _PROCESS_BROWSER is not None and _PROCESS_BROWSER.headless != headless:
+        _PROCESS_BROWSER.close()
+        _PROCESS_BROWSER = None
+    if _PROCESS_BROWSER is None:
+        _PROCESS_BROWSER = ReusedBrowser(headless=headless)
+        atexit.register(_PROCESS_BROWSER.close)
+    return _PROCESS_BROWSER
+
+
+@contextlib.contextmanager
+def reusing_browser(headless: bool = True):
+    """Create the environments of the block in the browser of this process (see
+    `process_browser`), and close the contexts they left open at the end of the block."""
+    browser = process_browser(headless)
+    token = _set_shared_browser(browser)
+    try:
+        yield browser
+    finally:
+        browser.close_contexts()
+        _reset_shared_browser(token)
@@ -0,0 +1,205 @@
+"""Lightweight span tracing, exported in the Chrome Trace Event format (opens in Perfetto).
+
+Tracing is off by default: `span()` then returns a shared no-op context manager, and functions
+decorated with `@traced` only pay for one global lookup. Once a tracer is started (per process,
+typically per episode), spans are recorded as complete ("X") events with wall-clock microsecond
+timestamps, so that the traces of several workers can be merged on a common timeline.
+
+    start_tracing(process_name="v2.omnizon-1")
+    with span("env.step", cat="env", step=3):
+        ...
+    stop_tracing().save(exp_dir / "trace.json")
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+from pathlib import Path
+
+TRACE_FILE = "trace.json"
+
+_NULL_SPAN = nullcontext()
+_TRACER = None
+
+
+def _now_us() -> int:
+    return time.time_ns() // 1000
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "cat", "args", "start")
+
+    def __init__(self, tracer: "Tracer", name: str, cat: str, args: dict):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.start = _now_us()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer.add_event(
+            {
+                "name": self.name,
+                "cat": self.cat,
+                "ph": "X",
+                "ts": self.start,
+                "dur": _now_us() - self.start,
+                "args": self.args,
+            }
+        )
+        return False
+
+
+class Tracer:
+    """Collects the trace events of a process.
+
+    Args:
+        process_name: label of the process track in the trace viewer (e.g. the task name).
+    """
+
+    def __init__(self, process_name: str = None):
+        self.pid = os.getpid()
+        self.process_name = process_name
+        self.events = []
+        self._lock = threading.Lock()
+        self._thread_names = {}
+
+    def span(self, name: str, cat: str = "", **args) -> _Span:
+        return _Span(self, name, cat, args)
+
+    def instant(self, name: str, cat: str = "", **args):
+        event = {"name": name, "cat": cat, "ph": "i", "s": "t", "ts": _now_us(), "args": args}
+        self.add_event(event)
+
+    def complete(self, name: str, start: float, end: float, cat: str = "", **args):
+        """Record a span from already measured `time.time()` start and end times."""
+        self.add_event(
+            {
+                "name": name,
+                "cat": cat,
+                "ph": "X",
+                "ts": int(start * 1e6),
+                "dur": int((end - start) * 1e6),
+                "args": args,
+            }
+        )
+
+    def add_event(self, event: dict):
+        thread = threading.current_thread()
+        event["pid"] = self.pid
+        event["tid"] = thread.ident
+        with self._lock:
+            self._thread_names.setdefault(thread.ident, thread.name)
+            self.events.append(event)
+
+    def to_json(self) -> dict:
+        with self._lock:
+            events = list(self.events)
+            thread_names = dict(self._thread_names)
+        metadata = [
+            {"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid, "args": {"name": name}}
+            for tid, name in thread_names.items()
+        ]
+        if self.process_name:
+            metadata.append(
+                {
+                    "name": "process_name",
+                    "ph": "M",
+                    "pid": self.pid,
+                    "tid": 0,
+                    "args": {"name": self.process_name},
+                }
+            )
+        return {"traceEvents": metadata + events, "displayTimeUnit": "ms"}
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_json(), f)
+
+
+def start_tracing(process_name: str = None) -> Tracer:
+    """Start recording spans in this process (replacing the current tracer, if any)."""
+    global _TRACER
+    _TRACER = Tracer(process_name=process_name)
+    return _TRACER
+
+
+def stop_tracing() -> Tracer:
+    """Stop recording spans in this process, and return the tracer that recorded them."""
+    global _TRACER
+    tracer, _TRACER = _TRACER, None
+    return tracer
+
+
+def get_tracer():
+    return _TRACER
+
+
+def span(name: str, cat: str = "", **args):
+    """Context manager recording a span, if tracing is on."""
+    tracer = _TRACER
+    if tracer is None:
+        return _NULL_SPAN
+    return _Span(tracer, name, cat, args)
+
+
+def record_span(name: str, start: float, end: float, cat: str = "", **args):
+    """Record a span from already measured `time.time()` start and end times, if tracing is on."""
+    tracer = _TRACER
+    if tracer is not None:
+        tracer.complete(name, start, end, cat, **args)
+
+
+def traced(name: str = None, cat: str = ""):
+    """Decorator recording a span for each call of the function, if tracing is on."""
+
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            tracer = _TRACER
+            if tracer is None:
+                return func(*args, **kwargs)
+            with _Span(tracer, span_name, cat, {}):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def merge_traces(trace_files, output_file) -> int:
+    """Merge several trace files (e.g. one per episode) into a single trace.
+
+    Each input trace keeps its own process track: traces recorded by the same worker process are
+    remapped to distinct pids so that consecutive episodes do not overlap.
+
+    Returns:
+        The number of merged traces.
+    """
+    merged = []
+    n_traces = 0
+    for i, trace_file in enumerate(trace_files):
+        try:
+            with open(trace_file) as f:
+                events = json.load(f)["traceEvents"]
+        except (OSError, ValueError, KeyError):
+            continue
+        pids = {}
+        for event in events:
+            event["pid"] = pids.setdefault(event.get("pid"), (i + 1) * 1000 + len(pids))
+            merged.append(event)
+        n_traces += 1
+    Path(output_file).parent.mkdir(parents=True, exist_ok=True)
+    with open(output_file, "w") as f:
+        json.dump({"traceEvents": merged, "displayTimeUnit": "ms"}, f)
+    return n_traces
@@ -1,2 +1,11 @@
 from .agent import Agent, AgentInfo
-from .loop import AbstractAgentArgs, EnvArgs, ExpArgs, get_exp_result
+from .loop import (
+    AbstractAgentArgs,
+    EnvArgs,
+    ExpArgs,
+    clear_exp_result_cache,
+    exp_result_cache_stats,
+    get_exp_result,
+)
+from .results_table import load_results_table
+from .replay import ReplayResult, replay_episode, replay_experiments, summarize_replays
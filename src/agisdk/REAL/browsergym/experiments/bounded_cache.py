@@ -0,0 +1,174 @@
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import fields, is_dataclass
+from typing import Any, Callable, Optional
+
+import numpy as np
+from PIL import Image
+
+
+def estimate_bytes(obj, _depth: int = 0) -> int:
+    """Roughly estimate the memory used by an object, including its content.
+
+    Arrays and images are accounted for by their pixel buffers, containers and dataclasses
+    recursively (up to a limited depth), other objects by their shallow size.
+    """
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, Image.Image):
+        return obj.width * obj.height * len(obj.getbands())
+    if isinstance(obj, (str, bytes, bytearray)):
+        return sys.getsizeof(obj)
+    if _depth >= 8:
+        return sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(
+            estimate_bytes(key, _depth + 1) + estimate_bytes(val, _depth + 1)
+            for key, val in obj.items()
+        )
+    if isinstance(obj, (list, tuple, set)):
+        return sys.getsizeof(obj) + sum(estimate_bytes(val, _depth + 1) for val in obj)
+    if is_dataclass(obj) and not isinstance(obj, type):
+        return sys.getsizeof(obj) + sum(
+            estimate_bytes(getattr(obj, f.name, None), _depth + 1) for f in fields(obj)
+        )
+    return sys.getsizeof(obj)
+
+
+class BoundedLRUCache:
+    """Least-recently-used cache bounded by the estimated size of its entries (and their count).
+
+    Entries are sized with `size_fn` when inserted, and optionally re-sized when accessed for
+    cached objects that grow (e.g. an ExpResult loading more steps). Cached objects that grow
+    without being accessed through the cache can report it with `resized(key)`. The least
+    recently used entries are evicted until the cache fits its bounds again. The most recently
+    used entry is never evicted, even if it is larger than the cache on its own.
+
+    Args:
+        max_bytes: maximum total estimated size of the entries (None for no limit).
+        max_items: maximum number of entries (None for no limit).
+        size_fn: function estimating the size of an entry, in bytes.
+        resize_on_access: re-size entries each time they are accessed (size_fn should be cheap).
+        on_resize: function called without arguments after the total size of the cache changed
+                   (e.g. to let a cache holding this one re-size the owner of this cache).
+    """
+
+    def __init__(
+        self,
+        max_bytes: Optional[int] = None,
+        max_items: Optional[int] = None,
+        size_fn: Callable[[Any], int] = estimate_bytes,
+        resize_on_access: bool = False,
+        on_resize: Optional[Callable[[], None]] = None,
+    ):
+        self.max_bytes = max_bytes
+        self.max_items = max_items
+        self.size_fn = size_fn
+        self.resize_on_access = resize_on_access
+        self.on_resize = on_resize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._total_bytes = 0
+        self._lock = threading.RLock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key, None)
+            if entry is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            value, size = entry
+            self._entries.move_to_end(key)
+            total_bytes = self._total_bytes
+            if self.resize_on_access:
+                self._resize(key, value, size)
+            changed = self._total_bytes != total_bytes
+        if changed:
+            self._notify_resize()
+        return value
+
+    def put(self, key, value):
+        with self._lock:
+            if key in self._entries:
+                self._total_bytes -= self._entries.pop(key)[1]
+            size = self.size_fn(value)
+            self._entries[key] = (value, size)
+            self._total_bytes += size
+            self._evict()
+        self._notify_resize()
+
+    def resized(self, key):
+        """Re-size an entry that changed size (no-op if the key is not cached)."""
+        with self._lock:
+            entry = self._entries.get(key, None)
+            if entry is None:
+                return
+            total_bytes = self._total_bytes
+            self._resize(key, *entry)
+            changed = self._total_bytes != total_bytes
+        if changed:
+            self._notify_resize()
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return default
+            self._total_bytes -= entry[1]
+        self._notify_resize()
+        return entry[0]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+        self._notify_resize()
+
+    def keys(self) -> list:
+        with self._lock:
+            return list(self._entries.keys())
+
+    def __contains__(self, key) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def stats(self) -> dict:
+        """Return the hit/miss/eviction counters and the current size of the cache."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "n_items": len(self._entries),
+            "total_bytes": self._total_bytes,
+        }
+
+    def _notify_resize(self):
+        # outside of the lock: the callback may lock another cache holding this one
+        if self.on_resize is not None:
+            self.on_resize()
+
+    def _resize(self, key, value, size):
+        new_size = self.size_fn(value)
+        if new_size != size:
+            self._entries[key] = (value, new_size)
+            self._total_bytes += new_size - size
+            self._evict()
+
+    def _evict(self):
+        while len(self._entries) > 1 and (
+            (self.max_bytes is not None and self._total_bytes > self.max_bytes)
+            or (self.max_items is not None and len(self._entries) > self.max_items)
+        ):
+            _, (_, size) = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            self.evictions += 1
@@ -0,0 +1,46 @@
+import numpy as np
+from PIL import Image
+
+from agisdk.REAL.browsergym.experiments import loop
+from agisdk.REAL.browsergym.experiments.bounded_cache import BoundedLRUCache
+
+
+def _make_exp_dir(path, n_screenshots=1, size=1000):
+    path.mkdir()
+    for step in range(n_screenshots):
+        pixels = np.random.randint(0, 255, (size, size, 3), dtype=np.uint8)
+        Image.fromarray(pixels).save(path / f"screenshot_step_{step}.png")
+    return path
+
+
+def test_child_cache_growth_is_reported_to_parent():
+    parent = BoundedLRUCache(size_fn=lambda child: child.total_bytes)
+    child = BoundedLRUCache(on_resize=lambda: parent.resized("child"))
+    parent.put("child", child)
+    assert parent.total_bytes == 0
+
+    child.put("a", np.zeros(1000, dtype=np.uint8))
+    assert parent.total_bytes == 1000
+
+    child.pop("a")
+    assert parent.total_bytes == 0
+
+
+def test_exp_results_are_evicted_when_their_screenshots_are_loaded(tmp_path, monkeypatch):
+    cache = BoundedLRUCache(
+        max_bytes=5 * 1024**2,
+        size_fn=lambda exp_result: exp_result.estimated_bytes(),
+        resize_on_access=True,
+    )
+    monkeypatch.setattr(loop, "EXP_RESULT_CACHE", cache)
+
+    exp_dirs = [_make_exp_dir(tmp_path / f"exp_{i}") for i in range(3)]
+    # access-once pattern: each ExpResult is put in the cache, then loads its screenshots
+    for exp_dir in exp_dirs:
+        exp_result = loop.get_exp_result(exp_dir)
+        assert exp_result.get_screenshot(0).size == (1000, 1000)
+
+    assert cache.evictions >= 1
+    assert cache.total_bytes <= cache.max_bytes
+    assert str(exp_dirs[-1]) in cache
+    assert cache.total_bytes == sum(cache.get(key).estimated_bytes() for key in cache.keys())
@@ -0,0 +1,228 @@
+"""Single-file, append-only storage of the step artifacts of an episode.
+
+Instead of one file per step artifact (`step_N.pkl.gz`, `screenshot_step_N.png`,
+`goal_object.pkl.gz`...), an episode store keeps all of them in a single file, as a sequence of
+length-prefixed records:
+
+    record := codec (1 byte) | key length (4 bytes) | data length (8 bytes) | key | data
+
+Records are only ever appended, a key written several times resolves to its last record. When
+the store is closed, an index record mapping every key to its (offset, length) is appended,
+followed by a footer holding the offset of that index. Readers use the index for random access
+to any record without reading (or decompressing) the others, and fall back to scanning the
+records if the file was not closed properly (e.g. the episode crashed).
+"""
+
+import io
+import json
+import logging
+import os
+import pickle
+import struct
+import threading
+import zlib
+from pathlib import Path
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+EPISODE_STORE_FILE = "episode.store"
+
+_MAGIC = b"BGEPISODE1"
+_FOOTER_MAGIC = b"BGEPIDX1"
+_RECORD_HEADER = struct.Struct("<BIQ")  # codec, key length, data length
+_FOOTER = struct.Struct("<Q")  # offset of the last index record
+_INDEX_KEY = "__index__"
+
+CODEC_RAW = 0
+CODEC_ZLIB = 1
+
+
+class EpisodeStore:
+    """Append-only store of compressed, length-prefixed records with a trailing offset index.
+
+    Args:
+        path: the store file, or an experiment directory (the store is then `episode.store`
+            inside it).
+        mode: "r" to read an existing store, "a" to append to a (possibly new) store.
+        compression_level: zlib compression level of compressed records.
+    """
+
+    def __init__(self, path, mode: str = "r", compression_level: int = 6):
+        path = Path(path)
+        if path.is_dir():
+            path = path / EPISODE_STORE_FILE
+        if mode not in ("r", "a"):
+            raise ValueError(f"Unknown episode store mode {repr(mode)}, expected 'r' or 'a'.")
+        self.path = path
+        self.mode = mode
+        self.compression_level = compression_level
+        self._lock = threading.Lock()
+        self._file = None
+
+        if mode == "a":
+            self._file = open(self.path, "ab+")
+            if self._file.tell() == 0:
+                self._file.write(_MAGIC)
+                self._file.flush()
+        self._index = self._load_index()
+
+    @staticmethod
+    def exists(exp_dir) -> bool:
+        return (Path(exp_dir) / EPISODE_STORE_FILE).exists()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def keys(self) -> list[str]:
+        return list(self._index.keys())
+
+    # --- writing ---
+
+    def put(self, key: str, data: bytes, compress: bool = True):
+        """Append a record. Already compressed data (e.g. PNG) should use compress=False."""
+        if self._file is None:
+            raise ValueError(f"Episode store {self.path} is not open for writing.")
+        if key == _INDEX_KEY:
+            raise ValueError(f"{repr(key)} is a reserved key.")
+        codec = CODEC_RAW
+        if compress:
+            data = zlib.compress(data, self.compression_level)
+            codec = CODEC_ZLIB
+        with self._lock:
+            self._index[key] = self._append(key, data, codec)
+
+    def put_pickle(self, key: str, obj):
+        self.put(key, pickle.dumps(obj), compress=True)
+
+    def put_image(self, key: str, image: Image.Image):
+        with io.BytesIO() as buffer:
+            image.save(buffer, format="PNG")
+            self.put(key, buffer.getvalue(), compress=False)
+
+    def flush(self):
+        if self._file is not None:
+            with self._lock:
+                self._file.flush()
+
+    def close(self):
+        """Append the offset index and the footer, and close the file."""
+        if self._file is None:
+            return
+        with self._lock:
+            index_data = zlib.compress(json.dumps(self._index).encode("utf-8"))
+            index_offset, _ = self._append(_INDEX_KEY, index_data, CODEC_ZLIB)
+            self._file.write(_FOOTER.pack(index_offset) + _FOOTER_MAGIC)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _append(self, key: str, data: bytes, codec: int) -> tuple[int, int]:
+        key_bytes = key.encode("utf-8")
+        self._file.seek(0, os.SEEK_END)
+        offset = self._file.tell()
+        self._file.write(_RECORD_HEADER.pack(codec, len(key_bytes), len(data)))
+        self._file.write(key_bytes)
+        self._file.write(data)
+        return offset, _RECORD_HEADER.size + len(key_bytes) + len(data)
+
+    # --- reading ---
+
+    def get(self, key: str) -> bytes:
+        """Read (and decompress) a single record."""
+        try:
+            offset, length = self._index[key]
+        except KeyError:
+            raise FileNotFoundError(f"No record {repr(key)} in episode store {self.path}")
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+            with open(self.path, "rb") as f:
+                f.seek(offset)
+                record = f.read(length)
+        _, _, data = self._parse_record(record)
+        return data
+
+    def get_pickle(self, key: str):
+        return pickle.loads(self.get(key))
+
+    def get_image(self, key: str) -> Image.Image:
+        with Image.open(io.BytesIO(self.get(key))) as img:
+            return img.copy()
+
+    def _parse_record(self, record: bytes) -> tuple[str, int, bytes]:
+        codec, key_len, data_len = _RECORD_HEADER.unpack_from(record)
+        start = _RECORD_HEADER.size
+        key = record[start : start + key_len].decode("utf-8")
+        data = record[start + key_len : start + key_len + data_len]
+        if codec == CODEC_ZLIB:
+            data = zlib.decompress(data)
+        elif codec != CODEC_RAW:
+            raise ValueError(f"Unknown codec {codec} for record {repr(key)} in {self.path}")
+        return key, codec, data
+
+    def _load_index(self) -> dict:
+        if not self.path.exists():
+            if self.mode == "r":
+                raise FileNotFoundError(f"Episode store {self.path} does not exist.")
+            return {}
+        with open(self.path, "rb") as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError(f"{self.path} is not an episode store.")
+            size = f.seek(0, os.SEEK_END)
+            footer_size = _FOOTER.size + len(_FOOTER_MAGIC)
+            if size >= len(_MAGIC) + footer_size:
+                f.seek(size - footer_size)
+                footer = f.read(footer_size)
+                if footer.endswith(_FOOTER_MAGIC):
+                    (index_offset,) = _FOOTER.unpack_from(footer)
+                    index = self._read_index(f, index_offset)
+                    if index is not None:
+                        return index
+            # no (valid) trailing index, e.g. the writer crashed: scan the records
+            logger.debug(f"No index found in episode store {self.path}, scanning records.")
+            return self._scan(f, size)
+
+    def _read_index(self, f, index_offset: int):
+        f.seek(index_offset)
+        header = f.read(_RECORD_HEADER.size)
+        if len(header) < _RECORD_HEADER.size:
+            return None
+        codec, key_len, data_len = _RECORD_HEADER.unpack(header)
+        record = header + f.read(key_len + data_len)
+        key, _, data = self._parse_record(record)
+        if key != _INDEX_KEY:
+            return None
+        return {key: tuple(value) for key, value in json.loads(data).items()}
+
+    def _scan(self, f, size: int) -> dict:
+        index = {}
+        offset = len(_MAGIC)
+        f.seek(offset)
+        while offset + _RECORD_HEADER.size <= size:
+            header = f.read(_RECORD_HEADER.size)
+            _, key_len, data_len = _RECORD_HEADER.unpack(header)
+            length = _RECORD_HEADER.size + key_len + data_len
+            if offset + length > size:
+                break  # truncated record
+            key = f.read(key_len).decode("utf-8", errors="replace")
+            f.seek(data_len, os.SEEK_CUR)
+            offset += length
+            if key == _INDEX_KEY:
+                # index records are followed by a footer (the store was closed, then reopened)
+                offset += _FOOTER.size + len(_FOOTER_MAGIC)
+                f.seek(offset)
+            else:
+                index[key] = (offset - length, length)
+        return index
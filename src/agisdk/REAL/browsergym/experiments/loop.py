@@ -1,16 +1,21 @@
+import functools
 import gzip
+import hashlib
 import importlib.metadata
 import json
 import logging
 import os
 import pickle
+import queue
 import re
 import sys
+import threading
 import time
 import traceback
 import uuid
 from abc import ABC, abstractmethod
 from collections import defaultdict
+from copy import copy
 from dataclasses import asdict, dataclass, field, is_dataclass
 from datetime import datetime
 from pathlib import Path
@@ -21,7 +26,16 @@ import numpy as np
 from PIL import Image
 from tqdm import tqdm
 
+from agisdk.REAL.browsergym.core import _get_shared_browser
+from agisdk.REAL.browsergym.core.async_env import BrowserSession
 from agisdk.REAL.browsergym.core.chat import Chat
+from agisdk.REAL.browsergym.core.tracing import (
+    TRACE_FILE,
+    span,
+    start_tracing,
+    stop_tracing,
+    traced,
+)
 from agisdk.REAL.browsergym.webclones.task_config import (
     DEFAULT_VERSION as WEBCLONE_DEFAULT_VERSION,
 )
@@ -30,7 +44,10 @@ from agisdk.REAL.browsergym.webclones.task_config import (
 )
 
 from .agent import Agent
-from .utils import count_messages_token, count_tokens
+from .bounded_cache import BoundedLRUCache
+from .episode_store import EpisodeStore
+from .screenshot_blobs import BLOB_DIR, ScreenshotBlobStore, load_screenshot_refs
+from .utils import count_messages_token, count_tokens_batch, estimate_tokens
 
 logger = logging.getLogger(__name__)
 
@@ -103,17 +120,68 @@ class AbstractAgentArgs(ABC):
         """Comply the experiments.loop API for instantiating the agent."""
 
 
-def save_package_versions(exp_dir: Path):
-    """Save the versions of the installed packages in the experiment directory."""
-    python_dists = "\n".join(
-        sorted(
-            [
-                f"{dist.metadata['Name']}=={dist.metadata['Version']}"
-                for dist in importlib.metadata.distributions()
-            ]
+ENVS_DIR = "_envs"
+
+# package versions manifest of this process, see get_package_versions()
+_PACKAGE_VERSIONS_CACHE = {"fingerprint": None, "manifest": None, "hash": None}
+
+
+def _package_versions_fingerprint() -> tuple:
+    """Cheap fingerprint of the installed distributions: the import paths and their mtimes.
+
+    Installing or removing a distribution adds or removes a *.dist-info entry in one of the
+    sys.path directories, which changes the modification time of that directory.
+    """
+    fingerprint = []
+    for path in sys.path:
+        try:
+            mtime = os.stat(path or ".").st_mtime_ns
+        except OSError:
+            mtime = None
+        fingerprint.append((path, mtime))
+    return tuple(fingerprint)
+
+
+def get_package_versions() -> tuple[str, str]:
+    """Return the versions manifest of the installed packages, and its hash.
+
+    The manifest is only computed once per process, and recomputed only if sys.path or the set
+    of installed distributions changed.
+    """
+    fingerprint = _package_versions_fingerprint()
+    if _PACKAGE_VERSIONS_CACHE["fingerprint"] != fingerprint:
+        manifest = "\n".join(
+            sorted(
+                [
+                    f"{dist.metadata['Name']}=={dist.metadata['Version']}"
+                    for dist in importlib.metadata.distributions()
+                ]
+            )
         )
-    )
-    (exp_dir / "package_versions.txt").write_text(python_dists)
+        _PACKAGE_VERSIONS_CACHE.update(
+            fingerprint=fingerprint,
+            manifest=manifest,
+            hash=hashlib.sha256(manifest.encode("utf-8")).hexdigest(),
+        )
+    return _PACKAGE_VERSIONS_CACHE["manifest"], _PACKAGE_VERSIONS_CACHE["hash"]
+
+
+def save_package_versions(exp_dir: Path) -> str:
+    """Save the versions of the installed packages for the experiment.
+
+    The manifest is stored once per distinct environment, content-addressed in the results
+    directory (`<results_dir>/_envs/<hash>.txt`), and the hash is returned to be recorded with
+    the experiment.
+    """
+    manifest, manifest_hash = get_package_versions()
+    manifest_path = Path(exp_dir).parent / ENVS_DIR / f"{manifest_hash}.txt"
+    if not manifest_path.exists():
+        manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        # write then rename, concurrent experiments might save the same manifest
+        tmp_path = manifest_path.with_name(f".{manifest_path.name}.{uuid.uuid4().hex}.tmp")
+        tmp_path.write_text(manifest)
+        os.replace(tmp_path, manifest_path)
+    return manifest_hash
 
 
 @dataclass
@@ -145,6 +213,30 @@ class ExpArgs:
     order: int (internal)
         The order of the experiment in the batch. It is used to keep track of
         the original order of the experiments in case they are shuffled.
+    episode_store: bool
+        If True, step artifacts are appended to a single `episode.store` file
+        instead of one file per step and screenshot (see `EpisodeStore`).
+    screenshot_dedup: str
+        If set ("exact" or "perceptual"), screenshots are saved by content hash
+        in a blob directory shared by all experiments of the results directory,
+        and the experiment only keeps references (see `ScreenshotBlobStore`).
+    token_stats: str
+        How the token counts of the observation fields and agent messages are
+        computed in the step stats: "full" (tokenized), "fast_estimate"
+        (estimated from a calibrated chars-per-token ratio) or "off".
+    exact_token_fields: tuple[str]
+        With token_stats="fast_estimate", observation fields whose exact token
+        counts are computed at summary time, in one batch for the episode.
+    async_step_saving: bool
+        If True, step artifacts (screenshots, step pickles) are written by a
+        background thread, off the critical path of the episode.
+    step_saving_queue_size: int
+        Maximum number of steps waiting to be written before the episode loop
+        blocks (backpressure).
+    trace: bool
+        If True, spans of the episode (env reset/step phases, observation
+        extraction, evaluation, agent calls) are saved in `trace.json`, in the
+        Chrome Trace Event format (opens in Perfetto).
     """
 
     agent_args: AbstractAgentArgs
@@ -161,6 +253,13 @@ class ExpArgs:
     save_screenshot: bool = False
     save_som: bool = False
     save_step_info_pkl: bool = False
+    episode_store: bool = False  # save step artifacts in a single episode.store file
+    screenshot_dedup: Optional[str] = None  # None, "exact" or "perceptual"
+    token_stats: str = "full"  # "full", "fast_estimate" or "off"
+    exact_token_fields: tuple[str] = ()  # with "fast_estimate", tokenized at summary time
+    async_step_saving: bool = True  # save step artifacts in a background thread
+    step_saving_queue_size: int = 4  # max pending steps before the loop waits for the writer
+    trace: bool = False  # save a Chrome trace of the episode
 
     def prepare(self, exp_root):
         """Prepare the experiment directory and save the experiment arguments.
@@ -210,11 +309,31 @@ class ExpArgs:
         # start writing logs to run logfile
         self._set_logger()
 
+        if self.trace:
+            start_tracing(process_name=self.env_args.task_name)
+
         # log python environment info
-        save_package_versions(self.exp_dir)
+        package_versions_hash = save_package_versions(self.exp_dir)
 
         episode_info = []
         env, step_info, err_msg, stack_trace = None, None, None, None
+        submitted_step = None  # last step handed to the writer, not to be written twice
+        step_writer = StepArtifactWriter(
+            self.exp_dir,
+            save_screenshot=self.save_screenshot,
+            save_som=self.save_som,
+            save_pkl=self.save_step_info_pkl,
+            max_queue_size=self.step_saving_queue_size,
+            use_thread=self.async_step_saving,
+            store=EpisodeStore(self.exp_dir, mode="a") if self.episode_store else None,
+            blob_store=(
+                ScreenshotBlobStore(
+                    Path(self.exp_dir).parent / BLOB_DIR, mode=self.screenshot_dedup
+                )
+                if self.screenshot_dedup
+                else None
+            ),
+        )
 
         try:
             logger.info(f"Running experiment {self.exp_name} in:\n  {self.exp_dir}")
@@ -255,28 +374,26 @@ class ExpArgs:
 
             step_info = StepInfo(step=0)
             episode_info = [step_info]
-            step_info.from_reset(
-                env,
-                seed=self.env_args.task_seed,
-                obs_preprocessor=agent.obs_preprocessor,
-            )
+            with span("env.reset", cat="loop"):
+                step_info.from_reset(
+                    env,
+                    seed=self.env_args.task_seed,
+                    obs_preprocessor=agent.obs_preprocessor,
+                )
             logger.debug("Environment reset.")
 
             while not step_info.is_done:  # set a limit
                 logger.debug(f"Starting step {step_info.step}.")
-                action = step_info.from_action(agent)
+                with span("agent.get_action", cat="loop", step=step_info.step):
+                    action = step_info.from_action(agent, token_stats=self.token_stats)
                 logger.debug(f"Agent chose action:\n {action}")
 
                 if action is None:
                     # will end the episode after saving the step info.
                     step_info.truncated = True
 
-                step_info.save_step_info(
-                    self.exp_dir,
-                    save_screenshot=self.save_screenshot,
-                    save_som=self.save_som,
-                    save_pkl=self.save_step_info_pkl,
-                )
+                step_writer.submit(step_info)
+                submitted_step = step_info
                 logger.debug("Step info saved.")
 
                 _send_chat_info(env.unwrapped.chat, action, step_info.agent_info)
@@ -290,7 +407,8 @@ class ExpArgs:
                 episode_info.append(step_info)
 
                 logger.debug("Sending action to environment.")
-                step_info.from_step(env, action, obs_preprocessor=agent.obs_preprocessor)
+                with span("env.step", cat="loop", step=step_info.step):
+                    step_info.from_step(env, action, obs_preprocessor=agent.obs_preprocessor)
                 logger.debug("Environment stepped.")
 
         except Exception as e:
@@ -306,15 +424,21 @@ class ExpArgs:
 
         finally:
             try:
-                if step_info is not None:
-                    step_info.save_step_info(
-                        self.exp_dir,
-                        save_screenshot=self.save_screenshot,
-                        save_som=self.save_som,
-                        save_pkl=self.save_step_info_pkl,
-                    )
+                if step_info is not None and step_info is not submitted_step:
+                    step_writer.submit(step_info)
             except Exception as e:
                 logger.error(f"Error while saving step info in the finally block: {e}")
+            try:
+                # all step artifacts must be on disk before the summary is written
+                step_writer.close()
+                step_writer.report_stats(episode_info)
+            except Exception as e:
+                logger.error(f"Error while flushing step info in the finally block: {e}")
+            try:
+                if self.token_stats == "fast_estimate" and self.exact_token_fields:
+                    _count_episode_tokens(episode_info, self.exact_token_fields)
+            except Exception as e:
+                logger.error(f"Error while counting tokens in the finally block: {e}")
             try:
                 if (
                     not err_msg
@@ -323,7 +447,14 @@ class ExpArgs:
                 ):
                     e = KeyboardInterrupt("Early termination??")
                     err_msg = f"Exception uncaught by agent or environment in task {self.env_args.task_name}.\n{type(e).__name__}:\n{e}"
-                _save_summary_info(episode_info, self.exp_dir, err_msg, stack_trace)
+                _save_summary_info(
+                    episode_info,
+                    self.exp_dir,
+                    err_msg,
+                    stack_trace,
+                    package_versions_hash=package_versions_hash,
+                    n_llm_rate_limited=self.rate_limit_counter.count,
+                )
             except Exception as e:
                 logger.error(f"Error while saving summary info in the finally block: {e}")
             try:
@@ -331,6 +462,11 @@ class ExpArgs:
                     env.close()
             except Exception as e:
                 logger.error(f"Error while closing the environment in the finally block: {e}")
+            try:
+                if self.trace:
+                    stop_tracing().save(self.exp_dir / TRACE_FILE)
+            except Exception as e:
+                logger.error(f"Error while saving the trace in the finally block: {e}")
             try:
                 self._unset_logger()  # stop writing logs to run logfile
             except Exception as e:
@@ -342,19 +478,47 @@ class ExpArgs:
         file_handler.setLevel(self.logging_level)  # same level as console outputs
         formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
         file_handler.setFormatter(formatter)
+        # count the rate limited (HTTP 429) requests of the LLM clients
+        rate_limit_counter = _RateLimitCounter()
+        if isinstance(_get_shared_browser(), BrowserSession):
+            # episodes sharing a browser run concurrently in this process, each in its own
+            # thread: only keep the logs of this episode
+            episode_thread = threading.get_ident()
+            for handler in (file_handler, rate_limit_counter):
+                handler.addFilter(lambda record: record.thread == episode_thread)
         # setup root logger
         root_logger = logging.getLogger()
         root_logger.setLevel(self.logging_level)
         root_logger.addHandler(file_handler)
+        root_logger.addHandler(rate_limit_counter)
         # setup openai logger (don't go below INFO verbosity)
         openai_logger = logging.getLogger("openai._base_client")
         openai_logger.setLevel(max(logging.INFO, self.logging_level))
 
         self.logging_file_handler = file_handler
+        self.rate_limit_counter = rate_limit_counter
 
     def _unset_logger(self):
         root_logger = logging.getLogger()
         root_logger.removeHandler(self.logging_file_handler)
+        root_logger.removeHandler(self.rate_limit_counter)
+
+
+class _RateLimitCounter(logging.Handler):
+    """Counts the rate limited (HTTP 429) responses logged by the LLM clients (httpx logs every
+    response, including the ones retried by the openai and anthropic clients)."""
+
+    LOGGERS = ("httpx", "openai", "anthropic")
+
+    def __init__(self):
+        super().__init__(level=logging.DEBUG)
+        self.count = 0
+
+    def emit(self, record: logging.LogRecord):
+        if record.name.startswith(self.LOGGERS):
+            message = record.getMessage()
+            if " 429 " in message or "Too Many Requests" in message:
+                self.count += 1
 
 
 @dataclass
@@ -366,6 +530,11 @@ class StepTimestamps:
     env_stop: float = 0
     agent_start: float = 0
     agent_stop: float = 0
+    # per sub-action timings, when actions are batched
+    action_timings: list = field(default_factory=list)
+    # durations of the phases between the action and the observation (settle, DOM load wait,
+    # task validation, observation extraction)
+    obs_timings: dict = field(default_factory=dict)
 
 
 @dataclass
@@ -396,6 +565,8 @@ class StepInfo:
         Extra statistics about the step.
     profiling: StepTimestamps
         Timestamps of the different events during the episode.
+    action_precheck: dict
+        Actionability pre-check counters of the action that led to this step, if enabled.
     """
 
     step: int = None
@@ -409,6 +580,7 @@ class StepInfo:
     stats: dict = None
     profiling: StepTimestamps = field(default_factory=StepTimestamps)
     task_info: dict = None
+    action_precheck: dict = field(default_factory=dict)
 
     def from_step(self, env: gym.Env, action: str, obs_preprocessor: callable):
         t = self.profiling
@@ -423,16 +595,19 @@ class StepInfo:
         t.action_exec_start = env_info["action_exec_start"]  # start
         t.action_exect_after_timeout = env_info["action_exec_stop"]
         t.action_exec_stop = env_info["action_exec_stop"] - env_info["action_exec_timeout"]
+        t.action_timings = env_info.get("action_batch_timings", [])
+        t.obs_timings = env_info.get("obs_timings", {})
+        self.action_precheck = env_info.get("action_precheck", {})
 
         if obs_preprocessor:
             self.obs = obs_preprocessor(self.obs)
 
-    def from_action(self, agent: Agent):
+    def from_action(self, agent: Agent, token_stats: str = "full"):
         self.profiling.agent_start = time.time()
         self.action, self.agent_info = agent.get_action(self.obs.copy())
         self.profiling.agent_stop = time.time()
 
-        self.make_stats()
+        self.make_stats(token_stats=token_stats)
 
         return self.action
 
@@ -446,6 +621,7 @@ class StepInfo:
         t.action_exec_start = env_info.get("recording_start_time", t.env_start)
         t.action_exect_after_timeout = t.env_stop
         t.action_exec_stop = t.env_stop
+        t.obs_timings = env_info.get("obs_timings", {})
 
         if obs_preprocessor:
             self.obs = obs_preprocessor(self.obs)
@@ -454,24 +630,58 @@ class StepInfo:
     def is_done(self):
         return self.terminated or self.truncated
 
-    def make_stats(self):
-        stats = {
-            f"n_token_{key}": count_tokens(val)
-            for key, val in self.obs.items()
-            if isinstance(val, str)
-        }
+    def make_stats(self, token_stats: str = "full"):
+        """Compute the step stats.
+
+        Args:
+            token_stats: "full" to tokenize the text observation fields and agent messages,
+                "fast_estimate" to estimate their token counts, "off" to skip token counts.
+        """
+        if token_stats not in ("full", "fast_estimate", "off"):
+            raise ValueError(f"Unknown token_stats policy {repr(token_stats)}.")
+
+        stats = {}
+        if token_stats != "off":
+            text_obs = {key: val for key, val in self.obs.items() if isinstance(val, str)}
+            if token_stats == "full":
+                n_tokens = count_tokens_batch(list(text_obs.values()))
+            else:
+                n_tokens = [estimate_tokens(val, key=key) for key, val in text_obs.items()]
+            stats.update({f"n_token_{key}": n for key, n in zip(text_obs.keys(), n_tokens)})
         stats.update(self.agent_info.pop("stats", {}))
 
         messages = self.agent_info.get("chat_messages", None)
-        if messages is not None:
-            stats["n_token_agent_messages"] = count_messages_token(messages)
+        if messages is not None and token_stats != "off":
+            stats["n_token_agent_messages"] = count_messages_token(
+                messages, estimate=token_stats == "fast_estimate"
+            )
 
         t = self.profiling
         stats["step_elapsed"] = t.env_stop - t.env_start
         stats["agent_elapsed"] = t.agent_stop - t.agent_start
+        if "obs_extract" in t.obs_timings:
+            stats["obs_extract_elapsed"] = t.obs_timings["obs_extract"]
+        if t.action_timings:
+            stats["n_batched_actions"] = sum(timing["n_actions"] for timing in t.action_timings)
+            stats["n_executed_sub_actions"] = len(t.action_timings)
+        # outcome of the actionability pre-check of the action that led to this step
+        stats.update(self.action_precheck)
 
         self.stats = stats
 
+    def snapshot(self) -> "StepInfo":
+        """Return a copy of the step that is not affected by later changes to this one.
+
+        The containers that are modified after the step is saved (obs, agent_info, stats) are
+        copied, their content is shared.
+        """
+        step_copy = copy(self)
+        step_copy.obs = dict(self.obs) if self.obs is not None else None
+        step_copy.agent_info = dict(self.agent_info) if self.agent_info is not None else None
+        step_copy.stats = dict(self.stats) if self.stats is not None else None
+        step_copy.profiling = copy(self.profiling)
+        return step_copy
+
     def save_step_info(
         self,
         exp_dir,
@@ -479,6 +689,8 @@ class StepInfo:
         save_screenshot=True,
         save_som=False,
         save_pkl=True,
+        store: EpisodeStore = None,
+        blob_store: ScreenshotBlobStore = None,
     ):
         screenshot = self.obs.pop("screenshot", None)
         screenshot_som = self.obs.pop("screenshot_som", None)
@@ -486,27 +698,43 @@ class StepInfo:
         browser = self.obs.pop("browser", None) if self.obs and "browser" in self.obs else None
 
         if save_screenshot and screenshot is not None:
-            img = Image.fromarray(screenshot)
-            img.save(exp_dir / f"screenshot_step_{self.step}.png")
+            if blob_store is not None:
+                blob_store.put_ref(exp_dir, f"screenshot_step_{self.step}", screenshot)
+            elif store is not None:
+                store.put_image(f"screenshot_step_{self.step}", Image.fromarray(screenshot))
+            else:
+                Image.fromarray(screenshot).save(exp_dir / f"screenshot_step_{self.step}.png")
 
         if save_som and screenshot_som is not None:
             img = Image.fromarray(screenshot_som)
-            img.save(exp_dir / f"screenshot_som_step_{self.step}.png")
+            if blob_store is not None:
+                blob_store.put_ref(exp_dir, f"screenshot_som_step_{self.step}", screenshot_som)
+            elif store is not None:
+                store.put_image(f"screenshot_som_step_{self.step}", img)
+            else:
+                img.save(exp_dir / f"screenshot_som_step_{self.step}.png")
 
         # save goal object (which might contain images) to a separate file to save space
         if self.obs is not None and self.obs.get("goal_object", False):
             # save the goal object only once (goal should never change once setup)
-            goal_object_file = Path(exp_dir) / "goal_object.pkl.gz"
-            if not goal_object_file.exists():
-                with gzip.open(goal_object_file, "wb") as f:
-                    pickle.dump(self.obs["goal_object"], f)
+            if store is not None:
+                if "goal_object" not in store:
+                    store.put_pickle("goal_object", self.obs["goal_object"])
+            else:
+                goal_object_file = Path(exp_dir) / "goal_object.pkl.gz"
+                if not goal_object_file.exists():
+                    with gzip.open(goal_object_file, "wb") as f:
+                        pickle.dump(self.obs["goal_object"], f)
             # set goal_object to a special placeholder value, which indicates it should be loaded from a separate file
             self.obs["goal_object"] = None
 
         if save_pkl:
-            with gzip.open(exp_dir / f"step_{self.step}.pkl.gz", "wb") as f:
-                # TODO should we pop the screenshots too before this to save space ?
-                pickle.dump(self, f)
+            if store is not None:
+                store.put_pickle(f"step_{self.step}", self)
+            else:
+                with gzip.open(exp_dir / f"step_{self.step}.pkl.gz", "wb") as f:
+                    # TODO should we pop the screenshots too before this to save space ?
+                    pickle.dump(self, f)
 
         if save_json:
             with open(exp_dir / "steps_info.json", "w") as f:
@@ -522,6 +750,133 @@ class StepInfo:
             self.obs["browser"] = browser
 
 
+class StepArtifactWriter:
+    """Persists step artifacts (screenshots, step pickles) on behalf of the episode loop.
+
+    Steps are snapshotted when submitted, and written by a background thread through a bounded
+    queue, so that image encoding and pickling happen off the critical path of the episode. When
+    the queue is full, `submit` blocks until the writer catches up (backpressure). With
+    `use_thread=False`, steps are written synchronously.
+
+    The time spent writing each step to disk, and the time the loop spent waiting for the writer,
+    are reported in the step stats by `report_stats`, once all steps are written. If an episode
+    store is given, artifacts are appended to it instead of being written as separate files. If a
+    screenshot blob store is given, screenshots are deduplicated through it, and the storage
+    savings are reported in the step stats as well.
+    """
+
+    def __init__(
+        self,
+        exp_dir,
+        save_screenshot: bool = True,
+        save_som: bool = False,
+        save_pkl: bool = True,
+        max_queue_size: int = 4,
+        use_thread: bool = True,
+        store: EpisodeStore = None,
+        blob_store: ScreenshotBlobStore = None,
+    ):
+        self.exp_dir = exp_dir
+        self.store = store
+        self.blob_store = blob_store
+        self.save_kwargs = dict(
+            save_screenshot=save_screenshot,
+            save_som=save_som,
+            save_pkl=save_pkl,
+            store=store,
+            blob_store=blob_store,
+        )
+        self.save_elapsed = defaultdict(float)  # step -> time spent writing to disk
+        self.wait_elapsed = defaultdict(float)  # step -> time spent waiting for the writer
+        self.blob_stats = defaultdict(dict)  # step -> screenshot deduplication counters
+        self._queue = None
+        self._thread = None
+        if use_thread:
+            self._queue = queue.Queue(maxsize=max(1, max_queue_size))
+            self._thread = threading.Thread(
+                target=self._run, name="step-artifact-writer", daemon=True
+            )
+            self._thread.start()
+
+    def submit(self, step_info: StepInfo):
+        """Save the step, in the background if a writer thread is running."""
+        if self._thread is None:
+            self._save(step_info)
+            return
+        snapshot = step_info.snapshot()
+        t_start = time.time()
+        self._queue.put(snapshot)  # blocks while the queue is full
+        self.wait_elapsed[step_info.step] += time.time() - t_start
+
+    def flush(self):
+        """Wait until all submitted steps are written."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self):
+        """Flush pending steps, stop the writer thread and close the episode store (if any)."""
+        if self._thread is not None:
+            self.flush()
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        if self.store is not None:
+            self.store.close()
+
+    def report_stats(self, episode_info: list[StepInfo]):
+        """Add disk-write (and writer wait) times to the stats of the written steps."""
+        for step_info in episode_info:
+            if step_info.stats is None or step_info.step not in self.save_elapsed:
+                continue
+            step_info.stats["save_elapsed"] = self.save_elapsed[step_info.step]
+            if self.wait_elapsed:
+                step_info.stats["save_wait_elapsed"] = self.wait_elapsed[step_info.step]
+            step_info.stats.update(self.blob_stats.get(step_info.step, {}))
+
+    @traced("save_step_info", cat="io")
+    def _save(self, step_info: StepInfo):
+        t_start = time.time()
+        blob_stats = dict(self.blob_store.stats) if self.blob_store is not None else {}
+        try:
+            step_info.save_step_info(self.exp_dir, **self.save_kwargs)
+        finally:
+            self.save_elapsed[step_info.step] += time.time() - t_start
+            step_blob_stats = self.blob_stats[step_info.step]
+            for key, val in blob_stats.items():
+                delta = self.blob_store.stats[key] - val
+                step_blob_stats[key] = step_blob_stats.get(key, 0) + delta
+
+    def _run(self):
+        while True:
+            step_info = self._queue.get()
+            try:
+                if step_info is None:
+                    return
+                self._save(step_info)
+            except Exception as e:
+                logger.error(f"Error while saving step {step_info.step} info: {e}")
+            finally:
+                self._queue.task_done()
+
+
+def _count_episode_tokens(episode_info: list[StepInfo], fields):
+    """Replace the estimated token counts of the given observation fields by exact counts.
+
+    All the texts of the episode are tokenized in a single batch.
+    """
+    targets, texts = [], []
+    for step_info in episode_info:
+        if step_info.stats is None or not step_info.obs:
+            continue
+        for field_name in fields:
+            text = step_info.obs.get(field_name, None)
+            if isinstance(text, str):
+                targets.append((step_info, f"n_token_{field_name}"))
+                texts.append(text)
+    for (step_info, key), n_tokens in zip(targets, count_tokens_batch(texts)):
+        step_info.stats[key] = n_tokens
+
+
 def _extract_err_msg(episode_info: list[StepInfo]):
     """Extract the last error message from the episode info."""
     errors = [(None, None)]
@@ -564,11 +919,36 @@ def _aggregate_episode_stats(episode_info: list[StepInfo]):
     return aggregated_stats
 
 
+def _episode_phase_timings(episode_info: list[StepInfo]) -> dict[str, list[float]]:
+    """Per-step durations of the phases of the episode, for run-level percentiles.
+
+    Unlike the step stats, these are taken from the step timestamps, so the last step (which
+    never gets stats) is accounted for as well.
+    """
+    timings = defaultdict(list)
+    for step_info in episode_info:
+        t = step_info.profiling
+        if t.env_stop:
+            timings["reset" if step_info.step == 0 else "env_step"].append(t.env_stop - t.env_start)
+        if t.agent_stop:
+            timings["agent"].append(t.agent_stop - t.agent_start)
+        obs_timings = getattr(t, "obs_timings", {})
+        if "obs_extract" in obs_timings:
+            timings["obs_extract"].append(obs_timings["obs_extract"])
+        if "task_validate" in obs_timings:
+            timings["eval"].append(obs_timings["task_validate"])
+        if step_info.stats and "save_elapsed" in step_info.stats:
+            timings["disk_write"].append(step_info.stats["save_elapsed"])
+    return {phase: [round(val, 4) for val in values] for phase, values in timings.items()}
+
+
 def _save_summary_info(
     episode_info: list[StepInfo],
     exp_dir,
     err_msg,
     stack_trace,
+    package_versions_hash: str = None,
+    n_llm_rate_limited: int = None,
 ):
     # bring err from agent_info to the top level
     if err_msg is None:
@@ -682,6 +1062,10 @@ def _save_summary_info(
             "agent_response": agent_response,
             "finish_state": finish_state,
             "eval_results": [],  # This would need to be populated by an evaluation system
+            # the package versions are saved in <results_dir>/_envs/<hash>.txt
+            "package_versions_hash": package_versions_hash,
+            # number of LLM requests rejected with HTTP 429 (retried or not)
+            "n_llm_rate_limited": n_llm_rate_limited,
             "env_setup_error": err_msg
             if "Executable doesn't exist" in str(err_msg) or "playwright" in str(err_msg)
             else None,
@@ -692,6 +1076,8 @@ def _save_summary_info(
     for key, val in _aggregate_episode_stats(episode_info).items():
         summary_info[f"stats.{key}"] = val
 
+    summary_info["phase_timings"] = _episode_phase_timings(episode_info)
+
     if len(episode_info) > 0:
         summary_info["terminated"] = episode_info[-1].terminated
         summary_info["truncated"] = episode_info[-1].truncated
@@ -732,14 +1118,40 @@ class ExpResult:
             combined)
     """
 
+    # bounds of the per-experiment caches of loaded steps and screenshots
+    STEPS_CACHE_MAX_BYTES = 512 * 1024**2
+    SCREENSHOTS_CACHE_MAX_BYTES = 256 * 1024**2
+
     def __init__(self, exp_dir) -> None:
         self.exp_dir = Path(exp_dir)
         self._exp_args = None
-        self._steps_info = {}
+        # called when the steps and screenshots loaded change size (see get_exp_result)
+        self.on_resize = None
+        self._steps_info = BoundedLRUCache(
+            max_bytes=self.STEPS_CACHE_MAX_BYTES, on_resize=self._notify_resize
+        )
         self._summary_info = None
-        self._screenshots = {}
+        self._screenshots = BoundedLRUCache(
+            max_bytes=self.SCREENSHOTS_CACHE_MAX_BYTES, on_resize=self._notify_resize
+        )
         self._flat_exp_args = None
         self._logs = None
+        self._store = None
+        self._screenshot_refs = None
+
+    @property
+    def screenshot_refs(self) -> dict:
+        """References of the screenshots saved in a shared blob directory, if any."""
+        if self._screenshot_refs is None:
+            self._screenshot_refs = load_screenshot_refs(self.exp_dir)
+        return self._screenshot_refs
+
+    @property
+    def store(self) -> Optional[EpisodeStore]:
+        """The episode store of the experiment, if its artifacts were saved in one."""
+        if self._store is None and EpisodeStore.exists(self.exp_dir):
+            self._store = EpisodeStore(self.exp_dir, mode="r")
+        return self._store
 
     @property
     def exp_args(self) -> ExpArgs:
@@ -752,43 +1164,54 @@ class ExpResult:
 
     def get_step_info(self, step: int) -> StepInfo:
         """Load the step info from the file and return it."""
-        if self._steps_info.get(step, None) is None:
-            with gzip.open(self.exp_dir / f"step_{step}.pkl.gz", "rb") as f:
-                self._steps_info[step] = pickle.load(f)
-            if "screenshot" not in self._steps_info[step].obs:
+        step_info = self._steps_info.get(step, None)
+        step_info_loaded = step_info is None
+        if step_info_loaded:
+            if self.store is not None and f"step_{step}" in self.store:
+                step_info = self.store.get_pickle(f"step_{step}")
+            else:
+                with gzip.open(self.exp_dir / f"step_{step}.pkl.gz", "rb") as f:
+                    step_info = pickle.load(f)
+            if "screenshot" not in step_info.obs:
                 try:
-                    self._steps_info[step].obs["screenshot"] = np.array(
+                    step_info.obs["screenshot"] = np.array(
                         self.get_screenshot(step), dtype=np.uint8
                     )
                 except FileNotFoundError:
                     pass
-            if "screenshot_som" not in self._steps_info[step].obs:
+            if "screenshot_som" not in step_info.obs:
                 try:
-                    self._steps_info[step].obs["screenshot_som"] = np.array(
+                    step_info.obs["screenshot_som"] = np.array(
                         self.get_screenshot(step, som=True), dtype=np.uint8
                     )
                 except FileNotFoundError:
                     pass
         # if goal_object is set to None, it indicates it has been saved into a separate file
         if (
-            self._steps_info[step].obs
-            and "goal_object" in self._steps_info[step].obs
-            and self._steps_info[step].obs["goal_object"] is None
+            step_info.obs
+            and "goal_object" in step_info.obs
+            and step_info.obs["goal_object"] is None
         ):
-            with gzip.open(self.exp_dir / "goal_object.pkl.gz", "rb") as f:
-                goal_object = pickle.load(f)
-                self._steps_info[step].obs["goal_object"] = goal_object
+            if self.store is not None and "goal_object" in self.store:
+                step_info.obs["goal_object"] = self.store.get_pickle("goal_object")
+            else:
+                with gzip.open(self.exp_dir / "goal_object.pkl.gz", "rb") as f:
+                    goal_object = pickle.load(f)
+                    step_info.obs["goal_object"] = goal_object
+            step_info_loaded = True
+        if step_info_loaded:
+            self._steps_info.put(step, step_info)
 
-        return self._steps_info[step]
+        return step_info
 
     @property
     def steps_info(self) -> list[StepInfo]:
         step_files = list(self.exp_dir.glob("step_*.pkl.gz"))
-        for file in step_files:
-            step = int(file.name.split("_")[-1].split(".")[0])
-            self.get_step_info(step)
+        if self.store is not None:
+            step_files += [Path(key) for key in self.store.keys() if key.startswith("step_")]
+        steps = sorted({int(file.name.split("_")[-1].split(".")[0]) for file in step_files})
 
-        return [self._steps_info[i] for i in range(len(self._steps_info))]
+        return [self.get_step_info(step) for step in steps]
 
     @property
     def summary_info(self) -> dict:
@@ -802,24 +1225,43 @@ class ExpResult:
 
     def get_screenshot(self, step: int, som=False) -> Image:
         key = (step, som)
-        if self._screenshots.get(key, None) is None:
+        screenshot = self._screenshots.get(key, None)
+        if screenshot is None:
             file_name = f"screenshot_{'som_' if som else ''}step_{step}"
-            try:
-                with Image.open(self.exp_dir / (file_name + ".png")) as img:
-                    self._screenshots[key] = img.copy()
-            except FileNotFoundError:
-                with Image.open(self.exp_dir / (file_name + ".jpg")) as img:
-                    self._screenshots[key] = img.copy()
-        return self._screenshots[key]
+            if self.store is not None and file_name in self.store:
+                screenshot = self.store.get_image(file_name)
+            elif file_name in self.screenshot_refs:
+                with Image.open(self.exp_dir / self.screenshot_refs[file_name]) as img:
+                    screenshot = img.copy()
+            else:
+                try:
+                    with Image.open(self.exp_dir / (file_name + ".png")) as img:
+                        screenshot = img.copy()
+                except FileNotFoundError:
+                    with Image.open(self.exp_dir / (file_name + ".jpg")) as img:
+                        screenshot = img.copy()
+            self._screenshots.put(key, screenshot)
+        return screenshot
 
     def get_screenshots(self, som=False):
         files = list(self.exp_dir.glob("screenshot_step_*"))
-        max_step = 0
+        if self.store is not None:
+            files += [Path(key) for key in self.store.keys() if key.startswith("screenshot_step_")]
+        files += [Path(key) for key in self.screenshot_refs if key.startswith("screenshot_step_")]
+        screenshots = {}
         for file in files:
             step = int(file.name.split("_")[-1].split(".")[0])
-            self.get_screenshot(step, som=som)
-            max_step = max(max_step, step)
-        return [self._screenshots.get((i, som), None) for i in range(max_step + 1)]
+            screenshots[step] = self.get_screenshot(step, som=som)
+        max_step = max(screenshots.keys(), default=0)
+        return [screenshots.get(i, None) for i in range(max_step + 1)]
+
+    def estimated_bytes(self) -> int:
+        """Estimated memory used by the steps and screenshots loaded by this ExpResult."""
+        return self._steps_info.total_bytes + self._screenshots.total_bytes + 4096
+
+    def _notify_resize(self) -> None:
+        if self.on_resize is not None:
+            self.on_resize()
 
     @property
     def screenshots(self):
@@ -875,8 +1317,22 @@ class ExpResult:
             self._logs = (self.exp_dir / "experiment.log").read_text()
         return self._logs
 
-
-EXP_RESULT_CACHE = {}
+    @property
+    def package_versions(self) -> str:
+        """The versions of the installed packages when the experiment was run."""
+        manifest_hash = self.summary_info.get("package_versions_hash")
+        if manifest_hash:
+            return (self.exp_dir.parent / ENVS_DIR / f"{manifest_hash}.txt").read_text()
+        # experiments saved before content-addressed manifests
+        return (self.exp_dir / "package_versions.txt").read_text()
+
+
+# bounded by the estimated memory of the steps and screenshots loaded by the cached ExpResults
+EXP_RESULT_CACHE = BoundedLRUCache(
+    max_bytes=2 * 1024**3,
+    size_fn=lambda exp_result: exp_result.estimated_bytes(),
+    resize_on_access=True,
+)
 
 
 def get_exp_result(exp_dir) -> ExpResult:
@@ -885,10 +1341,23 @@ def get_exp_result(exp_dir) -> ExpResult:
     exp_result = EXP_RESULT_CACHE.get(exp_dir, None)
     if exp_result is None:
         exp_result = ExpResult(exp_dir)
-        EXP_RESULT_CACHE[exp_dir] = exp_result
+        # re-size the cached ExpResult whenever it loads steps or screenshots, not only when it
+        # is looked up again (results are often loaded once, e.g. yield_all_exp_results)
+        exp_result.on_resize = functools.partial(EXP_RESULT_CACHE.resized, exp_dir)
+        EXP_RESULT_CACHE.put(exp_dir, exp_result)
     return exp_result
 
 
+def clear_exp_result_cache():
+    """Drop all the cached ExpResults (and the steps and screenshots they loaded)."""
+    EXP_RESULT_CACHE.clear()
+
+
+def exp_result_cache_stats() -> dict:
+    """Return the hit/miss/eviction counters and the current size of the ExpResult cache."""
+    return EXP_RESULT_CACHE.stats()
+
+
 def yield_all_exp_results(
     savedir_base: str | Path, progress_fn=tqdm, load_hidden=False, use_cache=True
 ):
@@ -0,0 +1,222 @@
+"""Deterministic, LLM-free replay of recorded episodes.
+
+The actions recorded in the steps of a past experiment are re-executed against the same task
+(same task seed), without calling the agent. Each replayed step records its full
+`StepTimestamps`, including the observation extraction timings, which gives a benchmark of the
+environment throughput that does not depend on the LLM latency. Rewards can optionally be
+checked against the recorded ones.
+"""
+
+import logging
+import time
+from collections import defaultdict
+from copy import deepcopy
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from .agent import DEFAULT_ACTION_SET
+from .loop import ExpResult, StepInfo, _aggregate_episode_stats
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ReplayResult:
+    """Outcome and timings of the replay of an episode.
+
+    Attributes:
+    -----------
+    exp_dir: str
+        The directory of the replayed experiment.
+    task_name: str
+        The name of the replayed task.
+    steps_info: list[StepInfo]
+        The replayed steps, without their observations (only the timings, stats and rewards).
+    recorded_rewards: list[float]
+        The rewards of the recorded steps.
+    replayed_rewards: list[float]
+        The rewards of the replayed steps.
+    rewards_match: bool
+        Whether the replayed rewards match the recorded ones (None if not verified).
+    elapsed: float
+        Wall time of the replay, environment creation and closing included.
+    err_msg: str
+        Error that interrupted the replay (if any).
+    """
+
+    exp_dir: str
+    task_name: str
+    steps_info: list[StepInfo] = field(default_factory=list)
+    recorded_rewards: list[float] = field(default_factory=list)
+    replayed_rewards: list[float] = field(default_factory=list)
+    rewards_match: Optional[bool] = None
+    elapsed: float = 0
+    err_msg: str = None
+
+    @property
+    def n_steps(self) -> int:
+        return max(len(self.steps_info) - 1, 0)  # the reset is not a step
+
+    def get_stats(self) -> dict:
+        """Aggregated stats and mean observation timings of the replayed episode."""
+        stats = _aggregate_episode_stats(self.steps_info)
+        stats["n_steps"] = self.n_steps
+        stats["elapsed"] = self.elapsed
+        obs_timings = defaultdict(list)
+        for step_info in self.steps_info:
+            for key, val in step_info.profiling.obs_timings.items():
+                obs_timings[key].append(val)
+        for key, values in obs_timings.items():
+            stats[f"mean_obs_{key}"] = float(np.mean(values))
+        return stats
+
+
+def _make_action_mapping(exp_args):
+    """Rebuild the action mapping of the recorded agent, without calling its LLM."""
+    if exp_args.agent_args.__class__.__name__ == "OperatorAgentArgs":
+        return None  # CUA actions are executed directly by the environment
+    try:
+        agent = exp_args.agent_args.make_agent()
+    except Exception as e:
+        logger.warning(
+            f"Could not instantiate the agent to get its action set ({e}), "
+            "replaying with the default action set."
+        )
+        return DEFAULT_ACTION_SET.to_python_code
+    action_set = getattr(agent, "action_set", None)
+    return action_set.to_python_code if action_set is not None else None
+
+
+def replay_episode(
+    exp_dir,
+    headless: bool = True,
+    verify_rewards: bool = True,
+    action_mapping: callable = None,
+    reward_tolerance: float = 1e-6,
+) -> ReplayResult:
+    """Re-execute the recorded actions of an experiment against the same task.
+
+    The recorded steps must have been saved (`save_step_info_pkl=True` or an episode store).
+
+    Args:
+        exp_dir: the directory of the recorded experiment.
+        headless: run the browser headless.
+        verify_rewards: compare the replayed rewards to the recorded ones.
+        action_mapping: the function converting the recorded actions to python code (default:
+            the action set of the recorded agent).
+        reward_tolerance: tolerance of the reward comparison.
+
+    Returns:
+        The replay result.
+    """
+    exp_result = ExpResult(exp_dir)
+    exp_args = exp_result.exp_args
+    recorded_steps = exp_result.steps_info
+    if not recorded_steps:
+        raise FileNotFoundError(f"No recorded steps found in {exp_dir}.")
+    actions = [step_info.action for step_info in recorded_steps if step_info.action is not None]
+
+    env_args = deepcopy(exp_args.env_args)
+    env_args.headless = headless
+    env_args.record_video = False
+    env_args.wait_for_user_message = False
+    # the recorded actions might exceed the original step budget if it was raised since
+    env_args.max_steps = max(env_args.max_steps or 0, len(actions))
+
+    result = ReplayResult(
+        exp_dir=str(exp_dir),
+        task_name=env_args.task_name,
+        recorded_rewards=[step_info.reward for step_info in recorded_steps],
+    )
+
+    if action_mapping is None:
+        action_mapping = _make_action_mapping(exp_args)
+
+    t_start = time.time()
+    env = None
+    try:
+        env = env_args.make_env(action_mapping=action_mapping, exp_dir=Path(exp_dir))
+        env.unwrapped.active_agent_name = exp_args.agent_args.agent_name
+
+        step_info = StepInfo(step=0)
+        step_info.from_reset(env, seed=env_args.task_seed, obs_preprocessor=None)
+        _finish_step(step_info, result)
+
+        for action in actions:
+            if step_info.is_done:
+                break
+            step_info = StepInfo(step=step_info.step + 1)
+            step_info.from_step(env, action, obs_preprocessor=None)
+            _finish_step(step_info, result)
+
+    except Exception as e:
+        result.err_msg = f"{type(e).__name__}: {e}"
+        logger.warning(f"Replay of {exp_dir} failed at step {len(result.steps_info)}: {e}")
+
+    finally:
+        if env is not None:
+            try:
+                env.close()
+            except Exception as e:
+                logger.error(f"Error while closing the environment: {e}")
+        result.elapsed = time.time() - t_start
+
+    if verify_rewards and result.err_msg is None:
+        recorded, replayed = result.recorded_rewards, result.replayed_rewards
+        result.rewards_match = len(recorded) == len(replayed) and bool(
+            np.allclose(recorded, replayed, atol=reward_tolerance)
+        )
+        if not result.rewards_match:
+            logger.warning(
+                f"Replayed rewards of {exp_dir} do not match the recorded ones:\n"
+                f"  recorded: {result.recorded_rewards}\n  replayed: {result.replayed_rewards}"
+            )
+
+    return result
+
+
+def _finish_step(step_info: StepInfo, result: ReplayResult):
+    """Keep the timings and reward of a replayed step, drop its observation."""
+    step_info.make_stats(token_stats="off")
+    step_info.obs = None
+    result.steps_info.append(step_info)
+    result.replayed_rewards.append(step_info.reward)
+
+
+def replay_experiments(exp_dirs, **kwargs) -> list[ReplayResult]:
+    """Replay several experiments one after the other (see `replay_episode` for the arguments)."""
+    results = []
+    for exp_dir in exp_dirs:
+        logger.info(f"Replaying {exp_dir}")
+        results.append(replay_episode(exp_dir, **kwargs))
+    return results
+
+
+def summarize_replays(results: list[ReplayResult]) -> dict:
+    """Environment throughput over a set of replays, to compare before/after env changes."""
+    steps_elapsed = []
+    obs_extract_elapsed = []
+    for result in results:
+        for step_info in result.steps_info[1:]:
+            steps_elapsed.append(step_info.stats.get("step_elapsed", 0))
+            obs_extract_elapsed.append(step_info.stats.get("obs_extract_elapsed", 0))
+    total_elapsed = sum(result.elapsed for result in results)
+    verified = [result.rewards_match for result in results if result.rewards_match is not None]
+    summary = {
+        "n_episodes": len(results),
+        "n_failed": sum(result.err_msg is not None for result in results),
+        "n_steps": len(steps_elapsed),
+        "total_elapsed": total_elapsed,
+        "steps_per_second": len(steps_elapsed) / total_elapsed if total_elapsed else 0,
+        "n_rewards_verified": len(verified),
+        "n_rewards_mismatch": sum(not match for match in verified),
+    }
+    for name, values in (("step", steps_elapsed), ("obs_extract", obs_extract_elapsed)):
+        if values:
+            summary[f"{name}_elapsed_mean"] = float(np.mean(values))
+            summary[f"{name}_elapsed_p50"] = float(np.percentile(values, 50))
+            summary[f"{name}_elapsed_p90"] = float(np.percentile(values, 90))
+    return summary
@@ -0,0 +1,259 @@
+"""Parallel loading of the records of many experiments into a columnar table.
+
+Each experiment record is the flattened `exp_args.pkl` and the `summary_info.json` of an
+experiment directory (see `ExpResult.get_exp_record`). Records are parsed in a process pool,
+and can be persisted to a snapshot file so that later scans only re-parse the experiments whose
+files changed since (by modification time).
+"""
+
+import json
+import logging
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Literal, Optional, Union
+
+from .loop import ExpResult
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pandas as pd
+
+    PANDAS_AVAILABLE = True
+except ImportError:
+    PANDAS_AVAILABLE = False
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# bookkeeping column used to detect experiments that changed since the snapshot
+MTIME_COLUMN = "_mtime"
+# experiment files whose changes invalidate a record
+_RECORD_FILES = ("exp_args.pkl", "summary_info.json")
+
+
+def _exp_mtime(exp_dir: Path) -> float:
+    mtime = 0.0
+    for name in _RECORD_FILES:
+        try:
+            mtime = max(mtime, os.stat(exp_dir / name).st_mtime)
+        except FileNotFoundError:
+            pass
+    return mtime
+
+
+def _to_scalar(value):
+    """Make a record value storable in a (typed) column."""
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    if isinstance(value, Path):
+        return str(value)
+    if hasattr(value, "item") and getattr(value, "ndim", None) == 0:
+        return value.item()  # numpy scalar
+    return json.dumps(value, default=str)
+
+
+def _load_record(exp_dir: str) -> Optional[dict]:
+    """Parse the record of an experiment (run in the worker processes)."""
+    try:
+        record = ExpResult(exp_dir).get_exp_record()
+    except Exception as e:
+        logger.warning(f"Could not load experiment {exp_dir}: {e}")
+        return None
+    record = {key: _to_scalar(value) for key, value in record.items()}
+    record["exp_dir"] = str(exp_dir)
+    return record
+
+
+def find_exp_dirs(results_dirs, load_hidden: bool = False) -> list[Path]:
+    """Find the experiment directories (with an `exp_args.pkl`) under the results directories.
+
+    Like `yield_all_exp_results`, experiments whose directory starts with "_" or "." are ignored
+    unless `load_hidden=True`.
+    """
+    if not isinstance(results_dirs, (list, tuple)):
+        results_dirs = [results_dirs]
+    exp_dirs = []
+    for results_dir in results_dirs:
+        for root, dirs, files in os.walk(results_dir):
+            if "exp_args.pkl" not in files:
+                continue
+            exp_dir = Path(root)
+            dirs.clear()  # experiments are not nested
+            if not load_hidden and exp_dir.name.startswith(("_", ".")):
+                continue
+            exp_dirs.append(exp_dir)
+    return sorted(exp_dirs)
+
+
+def _read_snapshot(path: Path) -> list[dict]:
+    if path.suffix == ".parquet":
+        table = pq.read_table(path)
+    elif path.suffix == ".feather":
+        table = feather.read_table(path)
+    else:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    return table.to_pylist()
+
+
+def _write_snapshot(path: Path, records: list[dict]):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    if path.suffix in (".parquet", ".feather"):
+        if not PYARROW_AVAILABLE:
+            raise ImportError(f"pyarrow is required to write a {path.suffix} snapshot.")
+        schema, string_columns = _arrow_schema(records)
+        if string_columns:
+            # coerce copies: the records are also returned to the caller
+            records = [
+                {
+                    key: str(value) if key in string_columns and value is not None else value
+                    for key, value in record.items()
+                }
+                for record in records
+            ]
+        table = pa.Table.from_pylist(records, schema=schema)
+        if path.suffix == ".parquet":
+            pq.write_table(table, tmp_path)
+        else:
+            feather.write_feather(table, tmp_path)
+    else:
+        with open(tmp_path, "wb") as f:
+            pickle.dump(records, f)
+    os.replace(tmp_path, path)
+
+
+def _arrow_schema(records: list[dict]) -> tuple:
+    """
+    Infer one type per column, falling back to strings for columns of mixed types.
+
+    Returns:
+        The schema, and the set of columns whose values must be converted to strings
+    """
+    column_types = {}
+    for record in records:
+        for key, value in record.items():
+            if value is not None:
+                column_types.setdefault(key, set()).add(type(value))
+            else:
+                column_types.setdefault(key, set())
+    arrow_types = {bool: pa.bool_(), int: pa.int64(), float: pa.float64(), str: pa.string()}
+    fields = []
+    string_columns = set()
+    for key, types in column_types.items():
+        if types == {int, float}:
+            types = {float}
+        if len(types) == 1 and next(iter(types)) in arrow_types:
+            fields.append(pa.field(key, arrow_types[next(iter(types))]))
+        elif not types:
+            fields.append(pa.field(key, pa.null()))
+        else:
+            string_columns.add(key)
+            fields.append(pa.field(key, pa.string()))
+    return pa.schema(fields), string_columns
+
+
+def _to_columns(records: list[dict], columns: Optional[list[str]]) -> dict[str, list]:
+    if columns is None:
+        columns = []
+        for record in records:
+            for key in record:
+                if key not in columns:
+                    columns.append(key)
+    return {column: [record.get(column, None) for record in records] for column in columns}
+
+
+def load_results_table(
+    results_dirs,
+    columns: Optional[list[str]] = None,
+    workers: Optional[int] = None,
+    snapshot: Optional[Union[str, Path]] = None,
+    load_hidden: bool = False,
+    output: Literal["auto", "pandas", "pyarrow", "dict"] = "auto",
+):
+    """Load the records of all the experiments under the results directories into a table.
+
+    Args:
+        results_dirs: a results directory, or a list of them.
+        columns: the columns to return (default: all of them, "exp_dir" first). Records are
+            always parsed and snapshotted in full.
+        workers: number of worker processes parsing the records (default: the number of CPUs,
+            1 to parse them in this process).
+        snapshot: optional snapshot file (".parquet" or ".feather" with pyarrow, any other
+            suffix for a pickle) holding the records of a previous scan. Only the experiments
+            added or modified since are parsed, and the snapshot is updated.
+        load_hidden: also load the experiments whose directory starts with "_" or ".".
+        output: "pandas" for a DataFrame, "pyarrow" for a Table, "dict" for a dict of lists,
+            "auto" for the first one available in this order.
+
+    Returns:
+        The table, one row per experiment.
+    """
+    exp_dirs = find_exp_dirs(results_dirs, load_hidden=load_hidden)
+    mtimes = {str(exp_dir): _exp_mtime(exp_dir) for exp_dir in exp_dirs}
+
+    cached = {}
+    if snapshot is not None:
+        snapshot = Path(snapshot)
+        if snapshot.exists():
+            try:
+                cached = {record["exp_dir"]: record for record in _read_snapshot(snapshot)}
+            except Exception as e:
+                logger.warning(f"Could not read results snapshot {snapshot}, rescanning: {e}")
+
+    records = {}
+    to_load = []
+    n_cached = 0
+    for exp_dir, mtime in mtimes.items():
+        record = cached.get(exp_dir, None)
+        if record is not None and record.get(MTIME_COLUMN) == mtime:
+            records[exp_dir] = record
+            n_cached += 1
+        else:
+            to_load.append(exp_dir)
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(to_load))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunksize = max(1, len(to_load) // (workers * 4))
+            loaded = list(executor.map(_load_record, to_load, chunksize=chunksize))
+    else:
+        loaded = [_load_record(exp_dir) for exp_dir in to_load]
+    for exp_dir, record in zip(to_load, loaded):
+        if record is not None:
+            record[MTIME_COLUMN] = mtimes[exp_dir]
+            records[exp_dir] = record
+    logger.info(f"Parsed {len(to_load)} experiment records, reused {n_cached} from snapshot.")
+
+    records = [records[exp_dir] for exp_dir in mtimes if exp_dir in records]
+    if snapshot is not None and (to_load or len(records) != len(cached)):
+        _write_snapshot(snapshot, records)
+
+    if columns is None:
+        records = [{k: v for k, v in record.items() if k != MTIME_COLUMN} for record in records]
+    table = _to_columns(records, columns)
+
+    if output == "auto":
+        output = "pandas" if PANDAS_AVAILABLE else "pyarrow" if PYARROW_AVAILABLE else "dict"
+    if output == "pandas":
+        if not PANDAS_AVAILABLE:
+            raise ImportError("pandas is required for output='pandas'.")
+        return pd.DataFrame(table)
+    if output == "pyarrow":
+        if not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow is required for output='pyarrow'.")
+        return pa.Table.from_pydict(table)
+    if output == "dict":
+        return table
+    raise ValueError(f"Unknown output {repr(output)}.")
@@ -0,0 +1,105 @@
+"""Content-addressed storage of step screenshots, shared across steps and episodes.
+
+Screenshots are saved once per distinct content in a blob directory shared by all the
+experiments of a results directory (`<results_dir>/_blobs`), and each experiment only keeps a
+reference to the blob of each of its screenshots (`screenshot_refs.json`). Identical
+screenshots, e.g. after a failed action, a `noop`, or when sampling the same task several
+times, are then only stored once.
+
+In "perceptual" mode, screenshots are addressed by a difference hash (dHash) of their
+downscaled grayscale image instead of their exact content, so that near-identical screenshots
+share the same blob (the first one saved).
+"""
+
+import hashlib
+import json
+import os
+import uuid
+from pathlib import Path
+from typing import Literal
+
+import numpy as np
+from PIL import Image
+
+BLOB_DIR = "_blobs"
+SCREENSHOT_REFS_FILE = "screenshot_refs.json"
+
+
+class ScreenshotBlobStore:
+    """Content-addressed screenshot store.
+
+    Args:
+        blob_dir: the shared blob directory.
+        mode: "exact" to deduplicate identical screenshots only, "perceptual" to also
+            deduplicate near-identical ones.
+        hash_size: size of the perceptual hash grid (the hash has hash_size**2 bits).
+    """
+
+    def __init__(
+        self,
+        blob_dir,
+        mode: Literal["exact", "perceptual"] = "exact",
+        hash_size: int = 16,
+    ):
+        if mode not in ("exact", "perceptual"):
+            raise ValueError(f"Unknown screenshot deduplication mode {repr(mode)}.")
+        self.blob_dir = Path(blob_dir)
+        self.mode = mode
+        self.hash_size = hash_size
+        self.stats = {
+            "n_screenshots": 0,
+            "n_screenshots_deduplicated": 0,
+            "screenshot_bytes_written": 0,
+            "screenshot_bytes_saved": 0,
+        }
+
+    def content_hash(self, screenshot: np.ndarray) -> str:
+        header = f"{screenshot.shape}{screenshot.dtype}".encode("utf-8")
+        if self.mode == "exact":
+            digest = hashlib.sha256(header)
+            digest.update(np.ascontiguousarray(screenshot).data)
+            return digest.hexdigest()
+        # perceptual: dHash, i.e. sign of the horizontal gradient of the downscaled image
+        gray = Image.fromarray(screenshot).convert("L")
+        small = np.asarray(
+            gray.resize((self.hash_size + 1, self.hash_size), Image.LANCZOS),
+            dtype=np.int16,
+        )
+        bits = np.packbits(small[:, 1:] > small[:, :-1])
+        return "p" + hashlib.sha256(header + bits.tobytes()).hexdigest()
+
+    def blob_path(self, content_hash: str) -> Path:
+        return self.blob_dir / content_hash[-2:] / f"{content_hash}.png"
+
+    def put(self, screenshot: np.ndarray) -> Path:
+        """Store the screenshot (unless an identical one is already stored), return its blob."""
+        path = self.blob_path(self.content_hash(screenshot))
+        self.stats["n_screenshots"] += 1
+        if path.exists():
+            self.stats["n_screenshots_deduplicated"] += 1
+            self.stats["screenshot_bytes_saved"] += path.stat().st_size
+            return path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # write then rename, so that concurrent experiments never see a partial blob
+        tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        Image.fromarray(screenshot).save(tmp_path, format="PNG")
+        self.stats["screenshot_bytes_written"] += tmp_path.stat().st_size
+        os.replace(tmp_path, path)
+        return path
+
+    def put_ref(self, exp_dir, name: str, screenshot: np.ndarray):
+        """Store the screenshot and reference it as `name` in the experiment directory."""
+        blob = self.put(screenshot)
+        refs = load_screenshot_refs(exp_dir)
+        refs[name] = os.path.relpath(blob, exp_dir)
+        with open(Path(exp_dir) / SCREENSHOT_REFS_FILE, "w") as f:
+            json.dump(refs, f, indent=4)
+
+
+def load_screenshot_refs(exp_dir) -> dict:
+    """Load the screenshot references of an experiment (name -> blob path relative to it)."""
+    refs_path = Path(exp_dir) / SCREENSHOT_REFS_FILE
+    if not refs_path.exists():
+        return {}
+    with open(refs_path) as f:
+        return json.load(f)
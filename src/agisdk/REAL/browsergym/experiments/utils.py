@@ -1,24 +1,73 @@
+from functools import lru_cache
+
 import tiktoken
 
+# chars-per-token ratios used to estimate token counts, calibrated per key on the first text seen
+_CHARS_PER_TOKEN = {}
+DEFAULT_CHARS_PER_TOKEN = 4.0
+# minimum text length for a calibration to be meaningful
+_MIN_CALIBRATION_CHARS = 200
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model="gpt-4") -> tiktoken.Encoding:
+    """Return the (cached) tiktoken encoding of a model."""
+
+    return tiktoken.encoding_for_model(model)
+
 
 def count_tokens(text, model="gpt-4"):
     """Count the number of tokens in a text."""
 
-    return len(tiktoken.encoding_for_model(model).encode(text))
+    return len(get_encoding(model).encode(text))
+
+
+def count_tokens_batch(texts, model="gpt-4"):
+    """Count the number of tokens in each of the texts, encoded in a single batch."""
+
+    if not texts:
+        return []
+    return [len(tokens) for tokens in get_encoding(model).encode_batch(list(texts))]
+
 
+def estimate_tokens(text, model="gpt-4", key=None):
+    """Estimate the number of tokens in a text from its number of characters.
 
-def count_messages_token(messages, model="gpt-4"):
+    The chars-per-token ratio is calibrated (i.e. the text is actually tokenized) on the first
+    long enough text seen for the given key, as it depends a lot on the kind of text (AXTree,
+    HTML, natural language...).
+
+    Args:
+        text (str): the text.
+        model (str): the model to use for calibration.
+        key (str): the kind of text, e.g. the observation field it comes from.
+
+    Returns:
+        int: the estimated number of tokens.
+    """
+    ratio = _CHARS_PER_TOKEN.get((key, model), None)
+    if ratio is None:
+        if key is None or len(text) < _MIN_CALIBRATION_CHARS:
+            return round(len(text) / DEFAULT_CHARS_PER_TOKEN)
+        n_tokens = count_tokens(text, model)
+        _CHARS_PER_TOKEN[(key, model)] = len(text) / max(n_tokens, 1)
+        return n_tokens
+    return round(len(text) / ratio)
+
+
+def count_messages_token(messages, model="gpt-4", estimate=False):
     """Count the number of tokens in a list of messages.
 
     Args:
         messages (list): a list of messages, each message can be a string or a
             list of dicts or an object with a content attribute.
         model (str): the model to use for tokenization.
+        estimate (bool): estimate the number of tokens instead of counting them.
 
     Returns:
         int: the number of tokens.
     """
-    token_count = 0
+    texts = []
     for message in messages:
         if hasattr(message, "content"):
             message = message.content
@@ -26,7 +75,7 @@ def count_messages_token(messages, model="gpt-4"):
             message = message["content"]
 
         if isinstance(message, str):
-            token_count += count_tokens(message, model)
+            texts.append(message)
         # handles messages with image content
         elif isinstance(message, (list, tuple)):
             for part in message:
@@ -35,9 +84,12 @@ def count_messages_token(messages, model="gpt-4"):
                         f"The message is expected to be a list of dicts, but got list of {type(message)}"
                     )
                 if part["type"] == "text":
-                    token_count += count_tokens(part["text"], model)
+                    texts.append(part["text"])
         else:
             raise ValueError(
                 f"The message is expected to be a string or a list of dicts, but got {type(message)}"
             )
-    return token_count
+
+    if estimate:
+        return sum(estimate_tokens(text, model, key="messages") for text in texts)
+    return sum(count_tokens_batch(texts, model))
@@ -1,3 +1,4 @@
+import functools
 import json
 import os
 import subprocess
@@ -8,10 +9,17 @@ from typing import Any
 
 import jmespath
 
+from agisdk.REAL.browsergym.core.tracing import traced
 from agisdk.REAL.browsergym.webclones.utils import generate_from_model
 from agisdk.REAL.logging import logger as rich_logger
 
 
+@functools.lru_cache(maxsize=None)
+def compile_jmespath(query: str) -> jmespath.parser.ParsedResult:
+    """Compile a JMESPath query once per process (shared by the replicas of a task)."""
+    return jmespath.compile(query)
+
+
 class WebCloneEvaluator:
     def __init__(self, task_config: dict[str, Any], llm: str = "gpt-4.1"):
         """
@@ -53,7 +61,7 @@ class WebCloneEvaluator:
         run jmespath query evals on data, see if they return true.
         """
         try:
-            is_valid = jmespath.search(query, env_state)
+            is_valid = compile_jmespath(query).search(env_state)
         except Exception as e:
             return False, f"Error: {e}"
         return is_valid, None
@@ -72,6 +80,7 @@ class WebCloneEvaluator:
                 break
         return value, None
 
+    @traced("webclone.evaluate_with_llm", cat="eval")
     def evaluate_with_llm(self, model_response: str, rubric: str, threshold: float = 0.8):
         """Performs fuzzy matching using an LLM."""
         fuzzy_match_prompt = f"""
@@ -104,6 +113,7 @@ class WebCloneEvaluator:
         info = {"actual_value": actual_value, "expected_value": expected_value}
         return is_correct, info
 
+    @traced("webclone.eval_script", cat="eval")
     def execute_eval_script_subprocess(
         self, script_name: str, env_state: dict, model_response: str
     ):
@@ -224,6 +234,7 @@ class WebCloneEvaluator:
                 except Exception as e:
                     rich_logger.warning(f"⚠️ Could not delete temp file {temp_path}: {e}")
 
+    @traced("webclone.evaluate", cat="eval")
     def evaluate(self, env_state: dict = None, model_response: str = None):
         results = []
         # Display environment state using Rich logging
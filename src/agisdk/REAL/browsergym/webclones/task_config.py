@@ -4,8 +4,10 @@ Task configuration loading with explicit version support.
 
 from __future__ import annotations
 
+import copy
 import json
 import os
+import threading
 from dataclasses import asdict, dataclass
 from typing import Any
 
@@ -44,6 +46,24 @@ TASK_INDEX: dict[str, tuple[str, str]] = {
 
 TASKS = sorted(TASK_INDEX.keys())
 
+# Parsed task configuration files, shared by the replicas of a task run in the same process
+# (sample_tasks): (path, modification time) -> parsed JSON. Each TaskConfig gets a copy.
+_CONFIG_CACHE: dict[tuple[str, int], dict[str, Any]] = {}
+_CONFIG_CACHE_LOCK = threading.Lock()
+
+
+def load_config_json(file_path: str) -> dict[str, Any]:
+    """Load a task configuration file, parsing it only once per process (returns a copy)."""
+    key = (os.path.abspath(file_path), os.stat(file_path).st_mtime_ns)
+    with _CONFIG_CACHE_LOCK:
+        config_json = _CONFIG_CACHE.get(key)
+    if config_json is None:
+        with open(file_path, encoding="utf-8") as file:
+            config_json = json.load(file)
+        with _CONFIG_CACHE_LOCK:
+            _CONFIG_CACHE[key] = config_json
+    return copy.deepcopy(config_json)
+
 
 def split_task_reference(task_reference: str) -> tuple[str, str]:
     """
@@ -192,8 +212,7 @@ class TaskConfig:
         self.eval_scripts_dir = os.path.join(self.base_dir, "eval_scripts")
 
     def from_json_file(self, file_path: str) -> dict[str, Any]:
-        with open(file_path, encoding="utf-8") as file:
-            return json.load(file)
+        return load_config_json(file_path)
 
     def to_json(self) -> dict[str, Any]:
         return self.task.to_json()
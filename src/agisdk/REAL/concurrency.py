@@ -0,0 +1,314 @@
+"""
+Adaptive concurrency: the number of tasks run at the same time, adjusted during a run.
+
+Too many concurrent browsers thrash the memory of the machine (slow pages, observation
+extraction timeouts), too few leave it idle while agents wait on their LLM. The controller starts
+at num_workers and, within [min_workers, max_workers]:
+
+- shrinks when free memory is low, when the CPU is overloaded, when the environment steps get
+  much slower than the fastest rate observed in the run, or when LLM requests get rate limited
+  (HTTP 429);
+- grows by one worker when all workers are busy and none of these signals is present.
+
+Every change is logged, with the signals that caused it, to concurrency_<run_uuid>.jsonl in the
+results directory.
+"""
+
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from agisdk.REAL.logging import logger as rich_logger
+
+try:
+    import psutil
+
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+def available_memory_gb() -> Optional[float]:
+    """Memory available to new processes on this machine, in GB (None if unknown)."""
+    if PSUTIL_AVAILABLE:
+        return psutil.virtual_memory().available / 1024**3
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024**2  # kB
+    except OSError:
+        pass
+    return None
+
+
+def process_tree_rss_mb(pid: Optional[int] = None) -> Optional[float]:
+    """
+    Resident memory of a process and all its descendants (e.g. a worker, its Playwright driver
+    and the browser processes), in MB (None if unknown).
+    """
+    pid = pid or os.getpid()
+    if PSUTIL_AVAILABLE:
+        try:
+            process = psutil.Process(pid)
+            rss = process.memory_info().rss
+            for child in process.children(recursive=True):
+                with contextlib.suppress(psutil.Error):
+                    rss += child.memory_info().rss
+            return rss / 1024**2
+        except psutil.Error:
+            return None
+    try:
+        children = {}
+        for entry in os.scandir("/proc"):
+            if entry.name.isdigit():
+                with contextlib.suppress(OSError, IndexError, ValueError):
+                    with open(f"/proc/{entry.name}/stat") as f:
+                        ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+                    children.setdefault(ppid, []).append(int(entry.name))
+        rss_pages = 0
+        stack = [pid]
+        while stack:
+            current = stack.pop()
+            with contextlib.suppress(OSError, IndexError, ValueError):
+                with open(f"/proc/{current}/statm") as f:
+                    rss_pages += int(f.read().split()[1])
+            stack.extend(children.get(current, []))
+        return rss_pages * os.sysconf("SC_PAGE_SIZE") / 1024**2
+    except (OSError, ValueError):
+        return None
+
+
+class PeakRSSMonitor:
+    """
+    Context manager sampling the resident memory of the process tree of this process in a
+    background thread, to measure the peak memory usage of a task (peak_rss_mb, None if it
+    could not be measured).
+
+    Args:
+        interval: Time between two samples, in seconds
+    """
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self.peak_rss_mb = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self) -> None:
+        rss = process_tree_rss_mb()
+        if rss is not None and (self.peak_rss_mb is None or rss > self.peak_rss_mb):
+            self.peak_rss_mb = rss
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self) -> "PeakRSSMonitor":
+        self._sample()
+        self._thread = threading.Thread(target=self._run, name="peak-rss-monitor", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+
+def cpu_load() -> Optional[float]:
+    """1-minute load average per CPU of this machine (None if unknown)."""
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (AttributeError, OSError):
+        return None
+
+
+class AdaptiveConcurrency:
+    """
+    Controller of the number of concurrently running tasks.
+
+    Backends call update() regularly while tasks are pending (with the number of running tasks)
+    and never run more tasks than it returns; the harness calls observe() with the record of
+    each completed task. Tasks already running are never interrupted when the limit shrinks.
+
+    Args:
+        min_workers: Lower bound of the number of concurrent tasks
+        max_workers: Upper bound of the number of concurrent tasks
+        initial_workers: Number of concurrent tasks at the start (default: min_workers)
+        min_free_memory_gb: Shrink when less memory than this is available
+        max_cpu_load: Shrink when the load average per CPU exceeds this
+        max_latency_ratio: Shrink when the mean env step latency of the recently completed
+                           tasks exceeds this ratio of the lowest one observed during the run
+        cooldown: Minimum time between two changes, in seconds (memory pressure excepted)
+        log_path: JSON lines file where each change is logged
+    """
+
+    # smoothing of the step latency over the completed tasks
+    LATENCY_EWMA_ALPHA = 0.3
+    # minimum number of completed tasks before the step latency is considered
+    MIN_LATENCY_SAMPLES = 3
+
+    def __init__(
+        self,
+        min_workers: int,
+        max_workers: int,
+        initial_workers: Optional[int] = None,
+        min_free_memory_gb: float = 2.0,
+        max_cpu_load: float = 0.9,
+        max_latency_ratio: float = 1.5,
+        cooldown: float = 30.0,
+        log_path=None,
+    ):
+        if not 1 <= min_workers <= max_workers:
+            raise ValueError(
+                f"Expected 1 <= min_workers <= max_workers, got {min_workers} and {max_workers}"
+            )
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        self.limit = min(max(initial_workers or min_workers, min_workers), max_workers)
+        self.min_free_memory_gb = min_free_memory_gb
+        self.max_cpu_load = max_cpu_load
+        self.max_latency_ratio = max_latency_ratio
+        self.cooldown = cooldown
+        self.log_path = Path(log_path) if log_path else None
+        self.changes = []
+        self.start_time = time.time()
+        self._initial_limit = self.limit
+
+        self._lock = threading.Lock()
+        self._last_change = self.start_time
+        self._n_rate_limited = 0  # since the last change
+        self._n_latency_samples = 0
+        self._step_latency = None  # EWMA over the completed tasks
+        self._best_step_latency = None
+
+    def observe(self, record: dict[str, Any]) -> None:
+        """Take the record of a completed task into account."""
+        with self._lock:
+            self._n_rate_limited += record.get("n_llm_rate_limited") or 0
+            n_steps = record.get("n_steps") or 0
+            cum_step_elapsed = record.get("stats.cum_step_elapsed")
+            if n_steps <= 0 or not cum_step_elapsed:
+                return
+            latency = cum_step_elapsed / n_steps
+            if self._step_latency is None:
+                self._step_latency = latency
+            else:
+                alpha = self.LATENCY_EWMA_ALPHA
+                self._step_latency = alpha * latency + (1 - alpha) * self._step_latency
+            self._n_latency_samples += 1
+            if self._n_latency_samples >= self.MIN_LATENCY_SAMPLES:
+                if self._best_step_latency is None or self._step_latency < self._best_step_latency:
+                    self._best_step_latency = self._step_latency
+
+    def update(self, n_running: int) -> int:
+        """
+        Adjust the limit to the current signals.
+
+        Args:
+            n_running: Number of tasks currently running
+
+        Returns:
+            The maximum number of tasks to run concurrently
+        """
+        with self._lock:
+            signals = self._signals()
+            since_last_change = time.time() - self._last_change
+            reason = None
+            new_limit = self.limit
+            if signals["memory_pressure"]:
+                # no cooldown, the browsers might get killed (unless already draining)
+                if self.limit >= n_running:
+                    reason = "low free memory"
+                    new_limit = n_running - 1
+            elif since_last_change < self.cooldown:
+                pass
+            elif signals["rate_limited"]:
+                reason = "LLM rate limited"
+                new_limit = self.limit - max(1, self.limit // 4)
+            elif signals["cpu_overload"]:
+                reason = "CPU overloaded"
+                new_limit = self.limit - 1
+            elif signals["slow_steps"]:
+                reason = "slow env steps"
+                new_limit = self.limit - 1
+                # the latency must degrade again from here before the next decrease
+                self._best_step_latency = None
+                self._n_latency_samples = 0
+            elif n_running >= self.limit and not signals["memory_tight"]:
+                reason = "all workers busy"
+                new_limit = self.limit + 1
+
+            new_limit = min(max(new_limit, self.min_workers), self.max_workers)
+            if new_limit != self.limit:
+                self._change(new_limit, reason, n_running, signals)
+            elif reason is not None and not signals["memory_pressure"]:
+                # at a bound: wait for a full cooldown before reconsidering
+                self._last_change = time.time()
+                self._n_rate_limited = 0
+            return self.limit
+
+    def mean_limit(self, end_time: Optional[float] = None) -> float:
+        """
+        Time-weighted mean of the limit, from the creation of the controller to end_time
+        (default: now).
+        """
+        end_time = end_time or time.time()
+        with self._lock:
+            total = 0.0
+            limit, since = self._initial_limit, self.start_time
+            for change in self.changes:
+                total += limit * (min(change["time"], end_time) - since)
+                limit, since = change["to"], change["time"]
+            total += limit * max(end_time - since, 0.0)
+        duration = end_time - self.start_time
+        return total / duration if duration > 0 else float(limit)
+
+    def _signals(self) -> dict[str, Any]:
+        free_memory = available_memory_gb()
+        load = cpu_load()
+        latency_ratio = None
+        if self._best_step_latency and self._step_latency:
+            latency_ratio = self._step_latency / self._best_step_latency
+        return {
+            "free_memory_gb": free_memory,
+            "cpu_load": load,
+            "step_latency": self._step_latency,
+            "latency_ratio": latency_ratio,
+            "n_rate_limited": self._n_rate_limited,
+            "memory_pressure": free_memory is not None and free_memory < self.min_free_memory_gb,
+            # room for one more browser (and its pages)?
+            "memory_tight": free_memory is not None and free_memory < 2 * self.min_free_memory_gb,
+            "cpu_overload": load is not None and load > self.max_cpu_load,
+            "slow_steps": latency_ratio is not None and latency_ratio > self.max_latency_ratio,
+            "rate_limited": self._n_rate_limited > 0,
+        }
+
+    def _change(self, new_limit: int, reason: str, n_running: int, signals: dict) -> None:
+        change = {
+            "time": time.time(),
+            "from": self.limit,
+            "to": new_limit,
+            "reason": reason,
+            "n_running": n_running,
+            **{key: val for key, val in signals.items() if not isinstance(val, bool)},
+        }
+        self.changes.append(change)
+        rich_logger.info(f"⚖️  Concurrency {self.limit} → {new_limit} ({reason})")
+        self.limit = new_limit
+        self._last_change = change["time"]
+        self._n_rate_limited = 0
+        if self.log_path is not None:
+            try:
+                with open(self.log_path, "a") as f:
+                    f.write(json.dumps(change) + "\n")
+            except OSError as e:
+                logger.warning(f"Could not log the concurrency change to {self.log_path}: {e}")
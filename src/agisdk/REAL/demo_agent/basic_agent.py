@@ -20,6 +20,27 @@ from ..logging import logger as rich_logger
 
 logger = logging.getLogger(__name__)
 
+CHAT_SYSTEM_PROMPT = """\
+                            # Instructions
+
+                            You are a UI Assistant, your goal is to help the user perform tasks using a web browser. You can
+                            communicate with the user via a chat, to which the user gives you instructions and to which you
+                            can send back messages. You have access to a web browser that both you and the user can see,
+                            and with which only you can interact via specific commands.
+
+                            Review the instructions from the user, the current state of the page and all other information
+                            to find the best possible next action to accomplish your goal. Your answer will be interpreted
+                            and executed by a program, make sure to follow the formatting instructions.
+                            """
+
+GOAL_SYSTEM_PROMPT = """\
+                            # Instructions
+
+                            Review the current state of the page and all other information to find the best
+                            possible next action to accomplish your goal. Your answer will be interpreted
+                            and executed by a program, make sure to follow the formatting instructions.
+                            """
+
 
 # Handling Screenshots
 def image_to_jpg_base64_url(image: np.ndarray | Image.Image):
@@ -37,19 +58,239 @@ def image_to_jpg_base64_url(image: np.ndarray | Image.Image):
     return f"data:image/jpeg;base64,{image_base64}"
 
 
+def usage_stats(usage) -> dict:
+    """Extract prompt, cached and completion token counts from an OpenAI or Anthropic usage."""
+    if usage is None:
+        return {}
+    stats = {}
+    if hasattr(usage, "prompt_tokens"):  # OpenAI (and OpenAI-compatible) API
+        stats["n_prompt_tokens"] = usage.prompt_tokens
+        stats["n_completion_tokens"] = usage.completion_tokens
+        details = getattr(usage, "prompt_tokens_details", None)
+        stats["n_cached_prompt_tokens"] = getattr(details, "cached_tokens", None) or 0
+    elif hasattr(usage, "input_tokens"):  # Anthropic API
+        cache_read = getattr(usage, "cache_read_input_tokens", None) or 0
+        cache_write = getattr(usage, "cache_creation_input_tokens", None) or 0
+        # input_tokens does not include cached tokens with Anthropic
+        stats["n_prompt_tokens"] = usage.input_tokens + cache_read + cache_write
+        stats["n_completion_tokens"] = usage.output_tokens
+        stats["n_cached_prompt_tokens"] = cache_read
+        stats["n_cache_write_prompt_tokens"] = cache_write
+    return stats
+
+
+class PromptBuilder:
+    """
+    Builds the DemoAgent prompt as a stable prefix (system message, action space, goal), which is
+    identical from one step to the next, followed by the volatile sections (chat, page content,
+    history, error). Static sections are only rendered once, and keeping the prefix stable lets
+    providers cache it (automatically with OpenAI, through cache breakpoints with Anthropic).
+    """
+
+    def __init__(self, action_set: HighLevelActionSet, chat_mode: bool):
+        self.chat_mode = chat_mode
+        self.system_msgs = [
+            {
+                "type": "text",
+                "text": CHAT_SYSTEM_PROMPT if chat_mode else GOAL_SYSTEM_PROMPT,
+            }
+        ]
+        self.action_space_msg = {
+            "type": "text",
+            "text": f"""\
+                        # Action Space
+
+                        {action_set.describe(with_long_description=False, with_examples=True)}
+
+                        Here are examples of actions with chain-of-thought reasoning:
+
+                        I now need to click on the Submit button to send the form. I will use the click action on the button, which has bid 12.
+                        ```click("12")```
+
+                        I found the information requested by the user, I will send it to the chat.
+                        ```send_msg_to_user("The price for a 15\\" laptop is 1499 USD.")```
+
+                        """,
+        }
+
+    def build(
+        self,
+        obs: dict,
+        action_history: list[str],
+        use_axtree: bool,
+        use_html: bool,
+        use_screenshot: bool,
+    ) -> tuple[list[dict], list[dict], int]:
+        """
+        Builds the prompt for the current step.
+
+        Returns:
+            The system messages, the user messages, and the number of user messages that make
+            up the stable prefix of the prompt.
+        """
+        user_msgs = [self.action_space_msg]
+
+        if not self.chat_mode:
+            assert obs["goal_object"], "The goal is missing."
+            # append goal
+            user_msgs.append(
+                {
+                    "type": "text",
+                    "text": """\
+                            # Goal
+                            """,
+                }
+            )
+            # goal_object is directly presented as a list of openai-style messages
+            user_msgs.extend(obs["goal_object"])
+
+        n_stable_msgs = len(user_msgs)
+
+        if self.chat_mode:
+            # append chat messages
+            user_msgs.append(
+                {
+                    "type": "text",
+                    "text": """\
+                            # Chat Messages
+                            """,
+                }
+            )
+            for msg in obs["chat_messages"]:
+                if msg["role"] in ("user", "assistant", "infeasible"):
+                    user_msgs.append(
+                        {
+                            "type": "text",
+                            "text": f"""\
+                                    - [{msg["role"]}] {msg["message"]}
+                                    """,
+                        }
+                    )
+                elif msg["role"] == "user_image":
+                    user_msgs.append({"type": "image_url", "image_url": msg["message"]})
+                else:
+                    raise ValueError(f"Unexpected chat message role {repr(msg['role'])}")
+
+        # append page AXTree (if asked)
+        if use_axtree:
+            user_msgs.append(
+                {
+                    "type": "text",
+                    "text": f"""\
+                            # Current page Accessibility Tree
+
+                            {obs["axtree_txt"]}
+
+                            """,
+                }
+            )
+        # append page HTML (if asked)
+        if use_html:
+            user_msgs.append(
+                {
+                    "type": "text",
+                    "text": f"""\
+                            # Current page DOM
+
+                            {obs["pruned_html"]}
+
+                            """,
+                }
+            )
+
+        # append page screenshot (if asked)
+        if use_screenshot:
+            user_msgs.append(
+                {
+                    "type": "text",
+                    "text": """\
+                            # Current page Screenshot
+                            """,
+                }
+            )
+            user_msgs.append(
+                {
+                    "type": "image_url",
+                    "image_url": {
+                        "url": image_to_jpg_base64_url(obs["screenshot"]),
+                        "detail": "auto",
+                    },  # Literal["low", "high", "auto"] = "auto"
+                }
+            )
+
+        # append past actions (and last error message) if any
+        if action_history:
+            user_msgs.append(
+                {
+                    "type": "text",
+                    "text": """\
+                            # History of past actions
+                            """,
+                }
+            )
+            user_msgs.extend(
+                [
+                    {
+                        "type": "text",
+                        "text": f"""\
+{action}
+""",
+                    }
+                    for action in action_history
+                ]
+            )
+
+            if obs["last_action_error"]:
+                # Log error to console
+                rich_logger.error(f"Error: {str(obs['last_action_error'])[:100]}...")
+
+                # Add error to message
+                user_msgs.append(
+                    {
+                        "type": "text",
+                        "text": f"""\
+                                # Error message from last action
+
+                                {obs["last_action_error"]}
+
+                                """,
+                    }
+                )
+
+        # ask for the next action
+        user_msgs.append(
+            {
+                "type": "text",
+                "text": """\
+                        # Next action
+
+                        You will now think step by step and produce your next best action. Reflect on your past actions, any resulting error message, the current state of the page before deciding on your next action.
+                        """,
+            }
+        )
+
+        return self.system_msgs, user_msgs, n_stable_msgs
+
+
 class DemoAgent(Agent):
     """A basic agent using OpenAI API, to demonstrate BrowserGym's functionalities."""
 
     def obs_preprocessor(self, obs: dict) -> dict:
-        return {
+        # the screenshot is always kept, as it is saved along with the step info
+        processed_obs = {
             "chat_messages": obs["chat_messages"],
             "screenshot": obs["screenshot"],
             "goal_object": obs["goal_object"],
             "last_action": obs["last_action"],
             "last_action_error": obs["last_action_error"],
-            "axtree_txt": flatten_axtree_to_str(obs["axtree_object"]),
-            "pruned_html": prune_html(flatten_dom_to_str(obs["dom_object"])),
         }
+        # only convert (and later tokenize in the step stats) what the agent actually uses,
+        # the DOM conversion in particular is expensive
+        if self.use_axtree:
+            processed_obs["axtree_txt"] = flatten_axtree_to_str(obs["axtree_object"])
+        if self.use_html:
+            processed_obs["pruned_html"] = prune_html(flatten_dom_to_str(obs["dom_object"]))
+        return processed_obs
 
     def close(self):
         """Called when the agent is being closed"""
@@ -139,6 +380,7 @@ class DemoAgent(Agent):
                             {"role": "user", "content": user_msgs},
                         ],
                     )
+                self.last_usage_stats = usage_stats(getattr(response, "usage", None))
                 return response.choices[0].message.content
 
             self.query_model = query_model
@@ -207,6 +449,7 @@ class DemoAgent(Agent):
                         model=self.model_name,
                         messages=formatted_messages,
                     )
+                self.last_usage_stats = usage_stats(getattr(response, "usage", None))
                 return response.choices[0].message.content
 
             self.query_model = query_model
@@ -234,6 +477,7 @@ class DemoAgent(Agent):
                     top_p=0.95,
                     extra_body={"top_k": 64},
                 )
+                self.last_usage_stats = usage_stats(getattr(completion, "usage", None))
                 return completion.choices[0].message.content
 
             self.query_model = query_model
@@ -274,7 +518,10 @@ class DemoAgent(Agent):
             def query_model(system_msgs, user_msgs):
                 # Convert OpenAI format messages to Anthropic format
                 anthropic_content = []
-                for msg in user_msgs:
+                n_stable_blocks = 0
+                for i, msg in enumerate(user_msgs):
+                    if i == self.n_stable_user_msgs:
+                        n_stable_blocks = len(anthropic_content)
                     if msg["type"] == "text":
                         anthropic_content.append({"type": "text", "text": msg["text"]})
                     elif msg["type"] == "image_url":
@@ -304,6 +551,11 @@ class DemoAgent(Agent):
                                 }
                             )
 
+                # Mark the end of the stable prompt prefix as a cache breakpoint, the system
+                # message (sent first) is then cached along with it
+                if n_stable_blocks:
+                    anthropic_content[n_stable_blocks - 1]["cache_control"] = {"type": "ephemeral"}
+
                 # Handle system message based on system_message_handling
                 if self.system_message_handling == "combined" and system_msgs:
                     # Prepend system message to user content
@@ -331,6 +583,7 @@ class DemoAgent(Agent):
                     create_params["system"] = system_content
 
                 response = self.client.messages.create(**create_params)
+                self.last_usage_stats = usage_stats(getattr(response, "usage", None))
 
                 # Log response content types for debugging
                 logger.info(
@@ -373,6 +626,11 @@ class DemoAgent(Agent):
         # use this instead to allow the agent to directly use Python code
         # self.action_set = PythonActionSet())
 
+        # static prompt sections (system message, action space) are rendered once
+        self.prompt_builder = PromptBuilder(self.action_set, chat_mode=chat_mode)
+        self.n_stable_user_msgs = 0
+        self.last_usage_stats = {}
+
         self.action_history = []
         self.last_observation = None
 
@@ -390,194 +648,12 @@ class DemoAgent(Agent):
             rich_logger.task_start(goal_str, self.model_name)
             self.session_start_time = time.time()
 
-        system_msgs = []
-        user_msgs = []
-
-        if self.chat_mode:
-            system_msgs.append(
-                {
-                    "type": "text",
-                    "text": """\
-                            # Instructions
-
-                            You are a UI Assistant, your goal is to help the user perform tasks using a web browser. You can
-                            communicate with the user via a chat, to which the user gives you instructions and to which you
-                            can send back messages. You have access to a web browser that both you and the user can see,
-                            and with which only you can interact via specific commands.
-
-                            Review the instructions from the user, the current state of the page and all other information
-                            to find the best possible next action to accomplish your goal. Your answer will be interpreted
-                            and executed by a program, make sure to follow the formatting instructions.
-                            """,
-                }
-            )
-            # append chat messages
-            user_msgs.append(
-                {
-                    "type": "text",
-                    "text": """\
-                            # Chat Messages
-                            """,
-                }
-            )
-            for msg in obs["chat_messages"]:
-                if msg["role"] in ("user", "assistant", "infeasible"):
-                    user_msgs.append(
-                        {
-                            "type": "text",
-                            "text": f"""\
-                                    - [{msg["role"]}] {msg["message"]}
-                                    """,
-                        }
-                    )
-                elif msg["role"] == "user_image":
-                    user_msgs.append({"type": "image_url", "image_url": msg["message"]})
-                else:
-                    raise ValueError(f"Unexpected chat message role {repr(msg['role'])}")
-
-        else:
-            assert obs["goal_object"], "The goal is missing."
-            system_msgs.append(
-                {
-                    "type": "text",
-                    "text": """\
-                            # Instructions
-
-                            Review the current state of the page and all other information to find the best
-                            possible next action to accomplish your goal. Your answer will be interpreted
-                            and executed by a program, make sure to follow the formatting instructions.
-                            """,
-                }
-            )
-            # append goal
-            user_msgs.append(
-                {
-                    "type": "text",
-                    "text": """\
-                            # Goal
-                            """,
-                }
-            )
-            # goal_object is directly presented as a list of openai-style messages
-            user_msgs.extend(obs["goal_object"])
-
-        # append page AXTree (if asked)
-        if self.use_axtree:
-            user_msgs.append(
-                {
-                    "type": "text",
-                    "text": f"""\
-                            # Current page Accessibility Tree
-
-                            {obs["axtree_txt"]}
-
-                            """,
-                }
-            )
-        # append page HTML (if asked)
-        if self.use_html:
-            user_msgs.append(
-                {
-                    "type": "text",
-                    "text": f"""\
-                            # Current page DOM
-
-                            {obs["pruned_html"]}
-
-                            """,
-                }
-            )
-
-        # append page screenshot (if asked)
-        if self.use_screenshot:
-            user_msgs.append(
-                {
-                    "type": "text",
-                    "text": """\
-                            # Current page Screenshot
-                            """,
-                }
-            )
-            user_msgs.append(
-                {
-                    "type": "image_url",
-                    "image_url": {
-                        "url": image_to_jpg_base64_url(obs["screenshot"]),
-                        "detail": "auto",
-                    },  # Literal["low", "high", "auto"] = "auto"
-                }
-            )
-
-        # append action space description
-        user_msgs.append(
-            {
-                "type": "text",
-                "text": f"""\
-                        # Action Space
-
-                        {self.action_set.describe(with_long_description=False, with_examples=True)}
-
-                        Here are examples of actions with chain-of-thought reasoning:
-
-                        I now need to click on the Submit button to send the form. I will use the click action on the button, which has bid 12.
-                        ```click("12")```
-
-                        I found the information requested by the user, I will send it to the chat.
-                        ```send_msg_to_user("The price for a 15\\" laptop is 1499 USD.")```
-
-                        """,
-            }
-        )
-
-        # append past actions (and last error message) if any
-        if self.action_history:
-            user_msgs.append(
-                {
-                    "type": "text",
-                    "text": """\
-                            # History of past actions
-                            """,
-                }
-            )
-            user_msgs.extend(
-                [
-                    {
-                        "type": "text",
-                        "text": f"""\
-{action}
-""",
-                    }
-                    for action in self.action_history
-                ]
-            )
-
-            if obs["last_action_error"]:
-                # Log error to console
-                rich_logger.error(f"Error: {str(obs['last_action_error'])[:100]}...")
-
-                # Add error to message
-                user_msgs.append(
-                    {
-                        "type": "text",
-                        "text": f"""\
-                                # Error message from last action
-
-                                {obs["last_action_error"]}
-
-                                """,
-                    }
-                )
-
-        # ask for the next action
-        user_msgs.append(
-            {
-                "type": "text",
-                "text": """\
-                        # Next action
-
-                        You will now think step by step and produce your next best action. Reflect on your past actions, any resulting error message, the current state of the page before deciding on your next action.
-                        """,
-            }
+        system_msgs, user_msgs, self.n_stable_user_msgs = self.prompt_builder.build(
+            obs,
+            self.action_history,
+            use_axtree=self.use_axtree,
+            use_html=self.use_html,
+            use_screenshot=self.use_screenshot,
         )
 
         prompt_text_strings = []
@@ -604,6 +680,7 @@ class DemoAgent(Agent):
         # logger.info(full_prompt_txt)
 
         # query model using the abstraction function
+        self.last_usage_stats = {}
         action = self.query_model(system_msgs, user_msgs)
 
         # Extract action type for a cleaner log message
@@ -623,7 +700,8 @@ class DemoAgent(Agent):
         # Store observation for metrics
         self.update_last_observation(obs)
 
-        return action, {}
+        # report token usage (including cached prompt tokens) in the step stats
+        return action, {"stats": dict(self.last_usage_stats)}
 
 
 @dataclasses.dataclass
@@ -4,18 +4,39 @@ Core harness for running agents on browsergym tasks.
 Provides a clean, simple interface for running both built-in and custom agents.
 """
 
+import contextlib
 import json
 import logging
 import os
 import random
+import socket
 import time
 import uuid
 from pathlib import Path
 from statistics import mean, median, stdev
-from typing import Any, Optional
+from typing import Any, Callable, Iterator, Optional, Union
+
+from agisdk.REAL.async_backend import AsyncEpisodePool
+from agisdk.REAL.concurrency import AdaptiveConcurrency, PeakRSSMonitor
+from agisdk.REAL.local_backend import LocalWorkerPool
 
 # Rich logging support
 from agisdk.REAL.logging import logger as rich_logger
+from agisdk.REAL.performance_report import (
+    build_performance_report,
+    print_performance_report,
+    save_performance_report,
+    task_site,
+)
+from agisdk.REAL.result_cache import ResultCache, open_result_cache, result_cache_key
+from agisdk.REAL.run_manifest import RunManifest, record_running
+from agisdk.REAL.scheduling import (
+    MEMORY_SAFETY_MARGIN,
+    TaskDurationHistory,
+    lpt_order,
+    projected_makespan,
+)
+from agisdk.REAL.sharding import parse_shard, shard_tasks, shared_shard_plan
 
 # Ray imports for distributed execution
 try:
@@ -26,6 +47,9 @@ except ImportError:
     RAY_AVAILABLE = False
 
 # Import the necessary browsergym components
+from agisdk.REAL.browsergym.core import _get_shared_browser
+from agisdk.REAL.browsergym.core.reused_browser import reusing_browser
+from agisdk.REAL.browsergym.core.tracing import TRACE_FILE, merge_traces
 from agisdk.REAL.browsergym.experiments import (
     AbstractAgentArgs,
     Agent,
@@ -44,7 +68,9 @@ from agisdk.REAL.demo_agent.basic_agent import DemoAgentArgs
 # Ray remote actor for distributed task execution
 if RAY_AVAILABLE:
 
-    @ray.remote(resources={"memory_gb": 1})
+    # Memory is requested per task (see harness._iter_tasks_ray), and tasks killed for lack of
+    # memory are retried by the harness, with a larger request
+    @ray.remote(max_retries=0)
     def run_task_ray(
         task_name: str,
         agent_args: "AbstractAgentArgs",
@@ -53,15 +79,22 @@ if RAY_AVAILABLE:
         continue_previous: bool = False,
         use_cache: bool = True,
         run_uuid: Optional[str] = None,
+        trace: bool = False,
+        manifest_path: Optional[str] = None,
     ) -> tuple[str, dict[str, Any]]:
         """Run a single task."""
         # Import required modules inside the function for Ray workers
         import json
+        import os
+        import socket
         import time
         from pathlib import Path
 
+        from agisdk.REAL.browsergym.core.reused_browser import reusing_browser
         from agisdk.REAL.browsergym.experiments import EnvArgs, ExpArgs, get_exp_result
+        from agisdk.REAL.concurrency import PeakRSSMonitor
         from agisdk.REAL.logging import logger as rich_logger
+        from agisdk.REAL.run_manifest import record_running
 
         rich_logger.info(f"Running task: {task_name}")
 
@@ -72,13 +105,14 @@ if RAY_AVAILABLE:
         env_args = EnvArgs(**env_args_dict)
 
         # Set up experiment
-        exp_args = ExpArgs(env_args=env_args, agent_args=agent_args)
+        exp_args = ExpArgs(env_args=env_args, agent_args=agent_args, trace=trace)
 
         # Start timing
         start_time = time.time()
 
         # Run experiment
         exp_args.prepare(results_dir)
+        record_running(manifest_path, task_name, exp_args.exp_dir)
 
         # Add essential metadata to summary_info.json before running the experiment
         summary_info_path = Path(exp_args.exp_dir) / "summary_info.json"
@@ -107,8 +141,10 @@ if RAY_AVAILABLE:
         with open(summary_info_path, "w") as f:
             json.dump(initial_summary, f, indent=4)
 
-        # Run the experiment
-        exp_args.run()
+        # Run the experiment in the browser of this worker (reused by its next tasks), measuring
+        # the peak memory of the worker and its browser
+        with PeakRSSMonitor() as memory_monitor, reusing_browser(env_args.headless):
+            exp_args.run()
 
         # End timing
         end_time = time.time()
@@ -124,6 +160,12 @@ if RAY_AVAILABLE:
         # Add experiment directory to the record
         exp_record["exp_dir"] = str(exp_args.exp_dir)
 
+        # Identify the worker that ran the task, for the performance report
+        exp_record["worker_id"] = f"{socket.gethostname()}:{os.getpid()}"
+
+        # Peak memory of the task, to size the memory requests of the next runs
+        exp_record["peak_rss_mb"] = memory_monitor.peak_rss_mb
+
         # Print current task result using Rich logging
         success = exp_record.get("cum_reward", 0) == 1
         reward = exp_record.get("cum_reward", 0)
@@ -138,6 +180,275 @@ if RAY_AVAILABLE:
 
 logger = logging.getLogger(__name__)
 
+BACKENDS = ("sequential", "local", "ray", "async")
+SCHEDULES = ("lpt", "fifo")
+# number of times a task killed for lack of memory is retried (ray backend), and growth of its
+# memory reservation at each retry
+MAX_OOM_RETRIES = 2
+OOM_RETRY_MEMORY_FACTOR = 1.5
+
+
+def run_single_task(
+    task_name: str,
+    agent_args: AbstractAgentArgs,
+    env_args_dict: dict[str, Any],
+    results_dir: str,
+    continue_previous: bool = False,
+    use_cache: bool = True,
+    run_uuid: Optional[str] = None,
+    trace: bool = False,
+    manifest_path: Optional[str] = None,
+    leaderboard: bool = False,
+) -> tuple[str, dict[str, Any]]:
+    """
+    Run a single task with the provided agent and environment configuration (in this process:
+    the driver, or a worker of the local or async backend, which only gets these arguments).
+
+    Args:
+        task_name: Name of the task to run
+        agent_args: Arguments for the agent
+        env_args_dict: Dictionary of arguments for the environment
+        results_dir: Directory to store results
+        continue_previous: Whether to try to continue from a previous run
+        use_cache: Whether to update the cache with results
+        run_uuid: Optional UUID for tracking this run batch
+        trace: Whether to save a Chrome trace of the episode
+        manifest_path: Optional run manifest where the start of the task is recorded
+        leaderboard: Whether the result is submitted to the leaderboard
+
+    Returns:
+        Tuple of (task_name, results_dict)
+    """
+    print(f"Running task: {task_name}")
+
+    # Set task name in env args
+    env_args_dict["task_name"] = task_name
+
+    # Create EnvArgs from dictionary
+    env_args = EnvArgs(**env_args_dict)
+
+    # Set up experiment
+    exp_args = ExpArgs(env_args=env_args, agent_args=agent_args, trace=trace)
+
+    # Start timing
+    start_time = time.time()
+
+    # Run experiment
+    exp_args.prepare(results_dir)
+    record_running(manifest_path, task_name, exp_args.exp_dir)
+
+    # Add essential metadata to summary_info.json before running the experiment
+    # This ensures the cache has what it needs even if there's a crash
+    summary_info_path = Path(exp_args.exp_dir) / "summary_info.json"
+
+    # Extract metadata for cache key
+    agent_type = (
+        agent_args.agent_name
+        if hasattr(agent_args, "agent_name")
+        else type(agent_args).__name__
+    )
+    model_name = getattr(agent_args, "model_name", "unknown")
+    max_steps = env_args.max_steps
+
+    leaderboard_suffix = "_leaderboard" if leaderboard else ""
+
+    # Create initial summary info with metadata
+    initial_summary = {
+        "task_name": task_name,
+        "agent_type": agent_type,
+        "model_name": model_name,
+        "max_steps": max_steps,
+        "leaderboard": leaderboard,  # Store leaderboard flag in metadata
+        "cache_key": f"{task_name}_{agent_type}_{model_name}_{max_steps}{leaderboard_suffix}",
+        "experiment_status": "started",
+        "run_uuid": run_uuid,  # Add the run UUID for tracking
+    }
+
+    # Write initial summary info
+    with open(summary_info_path, "w") as f:
+        json.dump(initial_summary, f, indent=4)
+
+    # Run the experiment, measuring the peak memory of this process and its browser, which
+    # is reused by the next tasks of this process (unless the browser is shared with
+    # concurrent tasks, as in the async backend)
+    if _get_shared_browser() is None:
+        memory_monitor = PeakRSSMonitor()
+        browser_context = reusing_browser(env_args.headless)
+    else:
+        memory_monitor = None
+        browser_context = contextlib.nullcontext()
+    with memory_monitor or contextlib.nullcontext(), browser_context:
+        exp_args.run()
+
+    # End timing
+    end_time = time.time()
+    elapsed_time = end_time - start_time
+
+    # Get results
+    exp_result = get_exp_result(exp_args.exp_dir)
+    exp_record = exp_result.get_exp_record()
+
+    # Add timing information to the record
+    exp_record["elapsed_time"] = elapsed_time
+
+    # Add experiment directory to the record
+    exp_record["exp_dir"] = str(exp_args.exp_dir)
+
+    # Identify the worker that ran the task, for the performance report
+    exp_record["worker_id"] = f"{socket.gethostname()}:{os.getpid()}"
+
+    # Peak memory of the task, to size the memory requests of the next runs
+    if memory_monitor is not None:
+        exp_record["peak_rss_mb"] = memory_monitor.peak_rss_mb
+
+    # Print current task result using Rich logging
+    success = exp_record.get("cum_reward", 0) == 1
+    reward = exp_record.get("cum_reward", 0)
+
+    # Extract task_id from task_name (e.g., "omnizon-1" from "v2.omnizon-1")
+    task_id = task_name.split(".", 1)[1] if "." in task_name else task_name
+
+    rich_logger.task_complete(success, reward, elapsed_time, task_id)
+
+    return task_name, exp_record
+
+
+def _run_task_local(task_kwargs: dict[str, Any]):
+    """Run a single task in a worker of the local or async backend."""
+    return run_single_task(**task_kwargs)
+
+
+def format_results(results: dict[str, Any]) -> None:
+    """Format and print benchmark results (of a run, or of merged runs)."""
+    if not results:
+        rich_logger.warning("No results to display.")
+        return
+
+    # Calculate aggregate score
+    success_count = sum(1 for _, r in results.items() if r.get("cum_reward", 0) == 1)
+    success_rate = success_count / len(results) * 100
+
+    # Collect timing statistics
+    all_times = [r.get("elapsed_time", 0) for _, r in results.items()]
+    successful_times = [
+        r.get("elapsed_time", 0) for _, r in results.items() if r.get("cum_reward", 0) == 1
+    ]
+
+    rich_logger.success("BENCHMARK RESULTS")
+    rich_logger.info(f"Tasks completed successfully: {success_count}/{len(results)}")
+    rich_logger.info(f"Success rate: {success_rate:.2f}%")
+
+    # Print timing statistics
+    if all_times:
+        rich_logger.header("Timing Statistics")
+        rich_logger.info(f"Average time: {mean(all_times):.2f} seconds")
+        rich_logger.info(f"Median time: {median(all_times):.2f} seconds")
+        rich_logger.info(f"Min time: {min(all_times):.2f} seconds")
+        rich_logger.info(f"Max time: {max(all_times):.2f} seconds")
+        if len(all_times) > 1:
+            rich_logger.info(f"Std deviation: {stdev(all_times):.2f} seconds")
+
+    if successful_times:
+        rich_logger.header("Timing Statistics (Successful Tasks Only)")
+        rich_logger.info(f"Average time: {mean(successful_times):.2f} seconds")
+        rich_logger.info(f"Median time: {median(successful_times):.2f} seconds")
+        rich_logger.info(f"Min time: {min(successful_times):.2f} seconds")
+        rich_logger.info(f"Max time: {max(successful_times):.2f} seconds")
+        if len(successful_times) > 1:
+            rich_logger.info(f"Std deviation: {stdev(successful_times):.2f} seconds")
+
+    # Print screenshot storage savings (only when screenshots were deduplicated)
+    n_screenshots = sum(r.get("stats.cum_n_screenshots") or 0 for r in results.values())
+    if n_screenshots:
+        n_deduplicated = sum(
+            r.get("stats.cum_n_screenshots_deduplicated") or 0 for r in results.values()
+        )
+        bytes_written = sum(
+            r.get("stats.cum_screenshot_bytes_written") or 0 for r in results.values()
+        )
+        bytes_saved = sum(
+            r.get("stats.cum_screenshot_bytes_saved") or 0 for r in results.values()
+        )
+        total_bytes = bytes_written + bytes_saved
+        rich_logger.header("Screenshot Storage")
+        rich_logger.info(f"Screenshots deduplicated: {n_deduplicated}/{n_screenshots}")
+        rich_logger.info(
+            f"Storage: {bytes_written / 1e6:.2f} MB written, {bytes_saved / 1e6:.2f} MB saved"
+            f" ({bytes_saved / total_bytes * 100 if total_bytes else 0:.1f}%)"
+        )
+
+    # Group results by task type
+    task_type_results = {}
+    for task_name, record in results.items():
+        # Extract task type (e.g., "omnizon" from "v2.omnizon-1")
+        task_type = task_site(task_name)
+
+        if task_type not in task_type_results:
+            task_type_results[task_type] = {"total": 0, "success": 0, "times": []}
+
+        task_type_results[task_type]["total"] += 1
+        task_type_results[task_type]["times"].append(record.get("elapsed_time", 0))
+        if record.get("cum_reward", 0) == 1:
+            task_type_results[task_type]["success"] += 1
+
+    # Print results by task type
+    print("\nResults by task type:")
+    for task_type, stats in sorted(task_type_results.items()):
+        success_rate = (stats["success"] / stats["total"]) * 100
+        avg_time = mean(stats["times"]) if stats["times"] else 0
+        print(
+            f"  {task_type}: {stats['success']}/{stats['total']} ({success_rate:.2f}%) - Avg time: {avg_time:.2f}s"
+        )
+
+
+class _RunProgress:
+    """Progress and running summary of a run, rewritten after each completed task."""
+
+    def __init__(self, path: Path, run_uuid: str, n_tasks: int):
+        self.path = path
+        self.start_time = time.time()
+        self.state = {
+            "run_uuid": run_uuid,
+            "status": "running",
+            "n_tasks": n_tasks,
+            "n_completed": 0,
+            "n_from_cache": 0,
+            "n_success": 0,
+            "n_failed": 0,
+            "success_rate": 0.0,
+            "elapsed": 0.0,
+            "tasks": {},
+        }
+
+    def update(self, task_name: str, record: dict[str, Any], from_cache: bool = False) -> None:
+        success = record.get("cum_reward", 0) == 1
+        failed = bool(record.get("err_msg"))
+        state = self.state
+        state["n_completed"] += 1
+        state["n_from_cache"] += from_cache
+        state["n_success"] += success
+        state["n_failed"] += failed
+        state["success_rate"] = state["n_success"] / state["n_completed"]
+        state["tasks"][task_name] = {
+            "status": "success" if success else "failed" if failed else "completed",
+            "cum_reward": record.get("cum_reward", 0),
+            "elapsed_time": record.get("elapsed_time"),
+            "exp_dir": str(record["exp_dir"]) if record.get("exp_dir") else None,
+            "from_cache": from_cache,
+        }
+        self._write()
+
+    def finish(self) -> None:
+        self.state["status"] = "completed"
+        self._write()
+
+    def _write(self) -> None:
+        self.state["elapsed"] = time.time() - self.start_time
+        tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self.state, f, indent=4)
+        os.replace(tmp_path, self.path)
+
 
 class harness:
     """
@@ -173,6 +484,15 @@ class harness:
         run_name: str = None,
         model_id_name: str = None,
         system_message_handling: str = None,
+        trace: bool = False,
+        backend: str = None,
+        task_timeout: float = None,
+        min_workers: int = None,
+        max_workers: int = None,
+        schedule: str = "lpt",
+        shard: str = None,
+        shard_plan: str = None,
+        result_cache: Union[str, ResultCache] = None,
     ):
         """
         Initialize the harness with the provided configuration.
@@ -206,6 +526,32 @@ class harness:
             model_id_name: Model ID name for API (defaults to model parameter)
             system_message_handling: How to handle system messages - "separate" (default) or "combined" (no system prompt).
                                    Only applies when using the model parameter. For o1-mini, defaults to "combined".
+            trace: Whether to save a Chrome trace (Perfetto) of each episode, merged into a
+                   single trace for the whole run in the results directory
+            backend: How tasks are executed - "sequential", "local" (pool of num_workers local
+                     processes), "ray" or "async" (num_workers concurrent episodes in this
+                     process, sharing one event loop and one browser). Defaults to "ray" if
+                     num_workers > 1, else "sequential"
+            task_timeout: Maximum duration of a task in seconds, after which it is cancelled
+                          and reported as failed (local, ray and async backends)
+            min_workers: Lower bound of the number of concurrent tasks, when adaptive (default 1)
+            max_workers: If set, the number of concurrent tasks adapts during the run between
+                         min_workers and max_workers (starting at num_workers) to the free
+                         memory, CPU load, env step latency and LLM rate limiting. Each change is
+                         logged to concurrency_<run_uuid>.jsonl in the results directory
+            schedule: Order in which tasks are dispatched - "lpt" (longest expected first, from
+                      the durations of past runs kept in the results directory) or "fifo"
+            shard: Run only the i-th of N shards of the task list, given as "i/N" (0 <= i < N).
+                   The split only depends on the task list (see sharding.py); merge the runs
+                   of the shards with merge_runs
+            shard_plan: Optional path of a shard plan, on a filesystem shared by the shards, to
+                        balance the shards by the expected task durations: the first shard to
+                        start writes it from its duration history, the others load it
+            result_cache: Optional result cache shared across machines, replacing the lookup
+                          of cached results in results_dir: a directory (local or on a shared
+                          filesystem), an SQLite file (.sqlite/.db) or a ResultCache. Results
+                          are keyed by a hash of the task, agent and environment arguments and
+                          SDK version (see result_cache.py)
         """
         self.results_dir = results_dir
         self.num_workers = num_workers
@@ -215,6 +561,29 @@ class harness:
         self.leaderboard = leaderboard
         self.run_id = run_id
         self.sample_tasks = sample_tasks
+        self.trace = trace
+        if max_workers is not None:
+            min_workers = min_workers or 1
+            if not 1 <= min_workers <= max_workers:
+                raise ValueError(
+                    f"Expected 1 <= min_workers <= max_workers, got {min_workers} and {max_workers}"
+                )
+            num_workers = min(max(num_workers, min_workers), max_workers)
+            self.num_workers = num_workers
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        if backend is None:
+            backend = "ray" if max(num_workers, max_workers or 0) > 1 else "sequential"
+        if backend not in BACKENDS:
+            raise ValueError(f"backend must be one of {BACKENDS}, got: {backend}")
+        self.backend = backend
+        self.task_timeout = task_timeout
+        if schedule not in SCHEDULES:
+            raise ValueError(f"schedule must be one of {SCHEDULES}, got: {schedule}")
+        self.schedule = schedule
+        self.shard = parse_shard(shard) if shard is not None else None
+        self.shard_plan = shard_plan
+        self.result_cache = open_result_cache(result_cache) if result_cache is not None else None
 
         logger.info(
             f"Harness initialized with model={model or 'custom'}, task={task_name or task_type}, Sampling each task {sample_tasks} times"
@@ -332,17 +701,61 @@ class harness:
         if not os.path.exists(results_dir):
             os.makedirs(results_dir)
 
-    def run(self, tasks: list[str] = None) -> dict[str, Any]:
+    def run(self, tasks: list[str] = None, resume: Optional[str] = None) -> dict[str, Any]:
         """
         Run the tasks with the configured agent and environment.
 
         Args:
             tasks: Optional list of specific task names to run. If not provided,
                   tasks will be determined based on task_name, task_type, and task_id.
+            resume: Optional directory (results_dir/runs/<run_uuid>) or UUID of an interrupted
+                    run to resume instead of starting a new one
 
         Returns:
             Dictionary of results indexed by task name
         """
+        results = dict(self.run_iter(tasks, resume=resume))
+
+        # Format and return results
+        self._format_results(results)
+
+        return results
+
+    def run_iter(
+        self, tasks: list[str] = None, resume: Optional[str] = None
+    ) -> Iterator[tuple[str, dict[str, Any]]]:
+        """
+        Run the tasks with the configured agent and environment, yielding each result as soon
+        as its task completes (cached results first).
+
+        The progress of the run is written to progress_<run_uuid>.json in the results
+        directory after each task, and the state of each task (queued, running, done, failed)
+        to the run manifest, runs/<run_uuid>/manifest.jsonl. Tasks exceeding task_timeout are
+        cancelled and yielded as failed (local, ray and async backends).
+
+        Args:
+            tasks: Optional list of specific task names to run. If not provided,
+                  tasks will be determined based on task_name, task_type, and task_id.
+            resume: Optional directory (results_dir/runs/<run_uuid>) or UUID of an interrupted
+                    run to resume: the results of its finished tasks are yielded first, the
+                    partial experiment directories of its interrupted tasks are removed and
+                    only its unfinished tasks are run, under the same run UUID
+
+        Yields:
+            (task_name, result) tuples, in order of completion
+        """
+        manifest = None
+        if resume is not None:
+            if tasks is not None:
+                raise ValueError("The tasks of a resumed run are those of its manifest")
+            manifest = RunManifest.load(resume, self.results_dir)
+            manifest.recover(self._completed_experiment_record)
+            tasks = manifest.remaining_tasks()
+            rich_logger.info(
+                f"⏯️  Resuming run {manifest.run_uuid}: "
+                f"{len(manifest.tasks) - len(tasks)}/{len(manifest.tasks)} tasks already finished"
+            )
+
         if tasks is not None:
             tasks = [self._canonicalize_task_name(t) for t in tasks]
 
@@ -356,13 +769,35 @@ class harness:
                 tasks = self._get_tasks(task_type=self.task_type, task_id=self.task_id)
                 logger.info(f"Running {len(tasks)} tasks")
 
-        if not tasks:
+        if not tasks and manifest is None:
             raise ValueError("No tasks found to run")
 
+        shard = manifest.shard if manifest is not None else None
+        if self.shard is not None and manifest is None:
+            index, num_shards = self.shard
+            assignment = None
+            if self.shard_plan is not None:
+
+                def durations():
+                    estimates = TaskDurationHistory.load(self.results_dir).estimates(set(tasks))
+                    return {task_name: val for task_name, (val, _) in estimates.items()}
+
+                assignment = shared_shard_plan(self.shard_plan, tasks, num_shards, durations)
+            shard = {
+                "index": index,
+                "num_shards": num_shards,
+                "tasks": tasks,
+                "plan": self.shard_plan,
+            }
+            tasks = shard_tasks(tasks, index, num_shards, assignment)
+            rich_logger.info(
+                f"🧩 Shard {index}/{num_shards}: {len(tasks)} of {len(shard['tasks'])} tasks"
+            )
+
         logger.info(f"Running {len(tasks)} tasks")
 
-        # Run the tasks and get results
-        results = self._run_tasks(
+        # Run the tasks and yield their results
+        yield from self._iter_tasks(
             tasks=tasks,
             agent_args=self.agent_args,
             env_args_dict=self.env_args,
@@ -371,84 +806,13 @@ class harness:
             use_cache=self.use_cache,
             cache_only=self.cache_only,
             force_refresh=self.force_refresh,
+            manifest=manifest,
+            shard=shard,
         )
 
-        # Format and return results
-        self._format_results(results)
-
-        return results
-
     def _format_results(self, results: dict[str, Any]) -> None:
         """Format and print benchmark results."""
-        if not results:
-            rich_logger.warning("No results to display.")
-            return
-
-        # Calculate aggregate score
-        success_count = sum(1 for _, r in results.items() if r.get("cum_reward", 0) == 1)
-        success_rate = success_count / len(results) * 100
-
-        # Collect timing statistics
-        all_times = [r.get("elapsed_time", 0) for _, r in results.items()]
-        successful_times = [
-            r.get("elapsed_time", 0) for _, r in results.items() if r.get("cum_reward", 0) == 1
-        ]
-
-        rich_logger.success("BENCHMARK RESULTS")
-        rich_logger.info(f"Tasks completed successfully: {success_count}/{len(results)}")
-        rich_logger.info(f"Success rate: {success_rate:.2f}%")
-
-        # Print timing statistics
-        if all_times:
-            rich_logger.header("Timing Statistics")
-            rich_logger.info(f"Average time: {mean(all_times):.2f} seconds")
-            rich_logger.info(f"Median time: {median(all_times):.2f} seconds")
-            rich_logger.info(f"Min time: {min(all_times):.2f} seconds")
-            rich_logger.info(f"Max time: {max(all_times):.2f} seconds")
-            if len(all_times) > 1:
-                rich_logger.info(f"Std deviation: {stdev(all_times):.2f} seconds")
-
-        if successful_times:
-            rich_logger.header("Timing Statistics (Successful Tasks Only)")
-            rich_logger.info(f"Average time: {mean(successful_times):.2f} seconds")
-            rich_logger.info(f"Median time: {median(successful_times):.2f} seconds")
-            rich_logger.info(f"Min time: {min(successful_times):.2f} seconds")
-            rich_logger.info(f"Max time: {max(successful_times):.2f} seconds")
-            if len(successful_times) > 1:
-                rich_logger.info(f"Std deviation: {stdev(successful_times):.2f} seconds")
-
-        # Group results by task type
-        task_type_results = {}
-        for task_name, record in results.items():
-            # Extract task type (e.g., "omnizon" from "v2.omnizon-1")
-            task_full_name = task_name.split(".")[1] if "." in task_name else task_name
-            parts = task_full_name.split("-")
-
-            # Find where the numeric part starts
-            for i, part in enumerate(parts[1:], 1):
-                if part and part[0].isdigit():
-                    task_type = "-".join(parts[:i])
-                    break
-            else:
-                # Fallback if no numeric part is found
-                task_type = parts[0]
-
-            if task_type not in task_type_results:
-                task_type_results[task_type] = {"total": 0, "success": 0, "times": []}
-
-            task_type_results[task_type]["total"] += 1
-            task_type_results[task_type]["times"].append(record.get("elapsed_time", 0))
-            if record.get("cum_reward", 0) == 1:
-                task_type_results[task_type]["success"] += 1
-
-        # Print results by task type
-        print("\nResults by task type:")
-        for task_type, stats in sorted(task_type_results.items()):
-            success_rate = (stats["success"] / stats["total"]) * 100
-            avg_time = mean(stats["times"]) if stats["times"] else 0
-            print(
-                f"  {task_type}: {stats['success']}/{stats['total']} ({success_rate:.2f}%) - Avg time: {avg_time:.2f}s"
-            )
+        format_results(results)
 
     def _get_tasks(
         self,
@@ -550,7 +914,42 @@ class harness:
         force_refresh: bool = False,
     ) -> dict[str, Any]:
         """
-        Run tasks with the provided agent and environment configuration.
+        Run tasks with the provided agent and environment configuration (see _iter_tasks).
+
+        Returns:
+            Dictionary of results indexed by task name
+        """
+        return dict(
+            self._iter_tasks(
+                tasks=tasks,
+                agent_args=agent_args,
+                env_args_dict=env_args_dict,
+                results_dir=results_dir,
+                num_workers=num_workers,
+                continue_previous=continue_previous,
+                use_cache=use_cache,
+                cache_only=cache_only,
+                force_refresh=force_refresh,
+            )
+        )
+
+    def _iter_tasks(
+        self,
+        tasks: list[str],
+        agent_args: AbstractAgentArgs,
+        env_args_dict: dict[str, Any],
+        results_dir: str = "./results",
+        num_workers: int = 1,
+        continue_previous: bool = False,
+        use_cache: bool = True,
+        cache_only: bool = False,
+        force_refresh: bool = False,
+        manifest: Optional[RunManifest] = None,
+        shard: Optional[dict[str, Any]] = None,
+    ) -> Iterator[tuple[str, dict[str, Any]]]:
+        """
+        Run tasks with the provided agent and environment configuration, yielding each result
+        as it completes.
 
         Args:
             tasks: List of task names to run
@@ -562,14 +961,18 @@ class harness:
             use_cache: Whether to use and update the cache
             cache_only: Whether to only use cached results without running missing tasks
             force_refresh: Whether to force re-running tasks even if cached results exist
+            manifest: Manifest of a resumed run, whose finished tasks are yielded first (tasks
+                      being its unfinished tasks). Otherwise a new run manifest is created
+            shard: Shard of a task list that tasks are (index, num_shards and full task list),
+                   recorded in the run manifest for merge_runs
 
-        Returns:
-            Dictionary of results indexed by task name
+        Yields:
+            (task_name, result) tuples, in order of completion
         """
         # Generate a unique run ID for this batch (but potentially override with cached run_id for leaderboard)
 
-        # Initialize with a new UUID
-        run_uuid = str(uuid.uuid4())
+        # Initialize with a new UUID (a resumed run keeps its own)
+        run_uuid = manifest.run_uuid if manifest is not None else str(uuid.uuid4())
 
         """
             Identify and Use Cached Run IDs:
@@ -585,10 +988,10 @@ class harness:
         """
         # Check if there's a consistent run_id we should use from the cache for leaderboard submissions
         cached_run_id = None
-        if self.leaderboard and use_cache and not force_refresh:
+        if self.leaderboard and use_cache and not force_refresh and manifest is None:
             # Try to find a cached leaderboard result to extract its run_id
             for task_name in tasks[:1]:  # Just check one task to determine the run_id
-                cached_result = self._find_cached_result(
+                cached_result = self._lookup_cached_result(
                     task_name, agent_args, env_args_dict, results_dir
                 )
                 if cached_result and cached_result.get("leaderboard", False):
@@ -600,7 +1003,7 @@ class harness:
 
         # If this is a leaderboard run, set the RUNID environment variable
         if self.leaderboard:
-            if hasattr(self, "run_id") and self.run_id:
+            if hasattr(self, "run_id") and self.run_id and manifest is None:
                 # If harness was initialized with a specific run_id, use that instead
                 run_uuid = self.run_id
                 print(f"Using explicitly provided run_id: {run_uuid}")
@@ -612,7 +1015,7 @@ class harness:
         import time
 
         run_timestamp = time.time()
-        {
+        run_metadata = {
             "run_uuid": run_uuid,
             "run_timestamp": run_timestamp,
             "agent_type": agent_args.agent_name
@@ -621,11 +1024,21 @@ class harness:
             "model_name": getattr(agent_args, "model_name", "unknown"),
             "total_tasks": len(tasks),
             "leaderboard": self.leaderboard if hasattr(self, "leaderboard") else False,
+            "shard": shard,
         }
         rich_logger.info(f"🆔 Starting run with ID: {run_uuid}")
 
+        # Journal the state of each task, to be able to resume the run if it gets interrupted
+        resumed_results = []
+        if manifest is None:
+            manifest = RunManifest.create(results_dir, run_uuid, tasks, config=run_metadata)
+        else:
+            resumed_results = manifest.results()
+
         # Initialize results dictionary
         results = {}
+        cached_results = {}
+        concurrency = None
 
         # Determine which tasks need to be run
         tasks_to_run = []
@@ -633,7 +1046,7 @@ class harness:
         if use_cache and not force_refresh:
             for task_name in tasks:
                 # Try to find a cached result
-                cached_result = self._find_cached_result(
+                cached_result = self._lookup_cached_result(
                     task_name, agent_args, env_args_dict, results_dir
                 )
 
@@ -642,7 +1055,7 @@ class harness:
                     rich_logger.info(
                         f"💾 Using cached result for {task_name} from {cached_result.get('exp_dir', 'unknown')}"
                     )
-                    results[task_name] = cached_result
+                    cached_results[task_name] = cached_result
                 elif not cache_only:
                     # Need to run this task
                     tasks_to_run.append(task_name)
@@ -653,54 +1066,110 @@ class harness:
             if not cache_only:
                 tasks_to_run = tasks
 
+        # Track the progress of the run in the results directory
+        progress = _RunProgress(
+            Path(results_dir) / f"progress_{run_uuid}.json",
+            run_uuid,
+            n_tasks=len(resumed_results) + len(tasks),
+        )
+        for task_name, resumed_result in resumed_results:
+            progress.update(task_name, resumed_result)
+            yield task_name, resumed_result
+        for task_name, cached_result in cached_results.items():
+            results[task_name] = cached_result
+            manifest.finished(task_name, cached_result, from_cache=True)
+            progress.update(task_name, cached_result, from_cache=True)
+            yield task_name, cached_result
+
+        # Order the tasks from their expected durations (past runs of the same tasks)
+        history = TaskDurationHistory.load(results_dir)
+        projected = None
+        if tasks_to_run:
+            if any(task_name not in history for task_name in tasks_to_run):
+                history.add_summaries(
+                    self._get_experiment_info(exp_dir)
+                    for exp_dir in self._find_experiment_dirs(results_dir)
+                )
+            estimates = history.estimates(set(tasks_to_run))
+            durations = {task_name: val for task_name, (val, _) in estimates.items()}
+            if self.schedule == "lpt":
+                tasks_to_run = lpt_order(tasks_to_run, durations)
+            projected = projected_makespan([durations[t] for t in tasks_to_run], num_workers)
+            n_known = sum(source in ("elapsed", "steps") for _, source in estimates.values())
+            order = "longest expected first" if self.schedule == "lpt" else "in order"
+            rich_logger.info(
+                f"📅 Dispatching tasks {order} ({n_known}/{len(estimates)} with past durations), "
+                f"projected makespan: {projected:.0f}s"
+            )
+
         # Run tasks if needed
+        run_start_time = time.time()
         if tasks_to_run:
             rich_logger.info(f"🏃 Running {len(tasks_to_run)} tasks...")
             rich_logger.info(f"💻 Number of workers configured: {num_workers}")
 
-            if num_workers > 1:
-                if not RAY_AVAILABLE:
-                    raise RuntimeError(
-                        "Ray is required for parallel execution but not available. Please install Ray with: pip install ray"
-                    )
-
-                if not ray.is_initialized():
-                    # Initialize Ray with memory tokens as concurrency limit and suppress verbose logging
-                    ray.init(resources={"memory_gb": num_workers})
-
-                # Submit all tasks as futures - Ray will queue them based on memory_gb availability
-                ray_futures = [
-                    run_task_ray.remote(
-                        task_name=task_name,
-                        agent_args=agent_args,
-                        env_args_dict=env_args_dict,
-                        results_dir=results_dir,
-                        continue_previous=continue_previous,
-                        use_cache=use_cache,
-                        run_uuid=run_uuid,
-                    )
-                    for task_name in tasks_to_run
-                ]
-
-                # Get results from Ray workers
-                ray_results = ray.get(ray_futures)
-                new_results = dict(ray_results)
+            task_kwargs = dict(
+                agent_args=agent_args,
+                env_args_dict=env_args_dict,
+                results_dir=results_dir,
+                continue_previous=continue_previous,
+                use_cache=use_cache,
+                run_uuid=run_uuid,
+                trace=self.trace,
+                manifest_path=str(manifest.path),
+            )
 
-                # Merge with cached results
-                results.update(new_results)
+            # Adapt the number of concurrent tasks during the run, if asked
+            max_running = None
+            pool_size = num_workers
+            if self.max_workers is not None and self.backend != "sequential":
+                concurrency = AdaptiveConcurrency(
+                    self.min_workers,
+                    self.max_workers,
+                    initial_workers=num_workers,
+                    log_path=Path(results_dir) / f"concurrency_{run_uuid}.jsonl",
+                )
+                max_running = concurrency.update
+                pool_size = self.max_workers
+
+            for task_name in tasks_to_run:
+                manifest.queued(task_name)
+            if self.backend == "local":
+                completed = self._iter_tasks_local(
+                    tasks_to_run, task_kwargs, pool_size, max_running
+                )
+            elif self.backend == "ray":
+                memory_mb = {
+                    task_name: peak * MEMORY_SAFETY_MARGIN
+                    for task_name, (peak, _) in history.memory_estimates(set(tasks_to_run)).items()
+                }
+                completed = self._iter_tasks_ray(
+                    tasks_to_run, task_kwargs, pool_size, max_running, memory_mb
+                )
+            elif self.backend == "async":
+                completed = self._iter_tasks_async(
+                    tasks_to_run, task_kwargs, pool_size, max_running
+                )
             else:
-                # Run tasks sequentially
-                for task_name in tasks_to_run:
-                    task_name, exp_record = self._run_single_task(
-                        task_name=task_name,
-                        agent_args=agent_args,
-                        env_args_dict=env_args_dict,
-                        results_dir=results_dir,
-                        continue_previous=continue_previous,
-                        use_cache=use_cache,
-                        run_uuid=run_uuid,
-                    )
-                    results[task_name] = exp_record
+                completed = self._iter_tasks_sequential(tasks_to_run, task_kwargs)
+
+            for task_name, exp_record in completed:
+                if concurrency is not None:
+                    concurrency.observe(exp_record)
+                history.add_record(task_name, exp_record)
+                results[task_name] = exp_record
+                manifest.finished(task_name, exp_record)
+                if use_cache and self.result_cache is not None:
+                    self._store_cached_result(task_name, agent_args, env_args_dict, exp_record)
+                progress.update(task_name, exp_record)
+                yield task_name, exp_record
+
+        run_wall_time = time.time() - run_start_time
+        if tasks_to_run:
+            try:
+                history.save()
+            except OSError as e:
+                logger.warning(f"Could not save the task durations: {e}")
 
         # Gather statistics for this run using the run_uuid
         cache_hits = len(tasks) - len(tasks_to_run)
@@ -735,7 +1204,148 @@ class harness:
             f"  Tasks with errors: {exps_with_errors} of {total_exps} ({exps_with_errors / total_exps * 100 if total_exps > 0 else 0:.1f}%)"
         )
 
-        return results
+        if self.trace and tasks_to_run:
+            self._merge_traces(results, results_dir, run_uuid)
+
+        if tasks_to_run:
+            if concurrency is not None:
+                # the limit changed during the run: time-weighted mean number of workers
+                effective_workers = concurrency.mean_limit(run_start_time + run_wall_time)
+            elif self.backend == "sequential":
+                effective_workers = 1
+            else:
+                effective_workers = pool_size
+            report = build_performance_report(
+                results,
+                wall_time=run_wall_time,
+                num_workers=effective_workers,
+                run_uuid=run_uuid,
+            )
+            report["makespan"] = {
+                "schedule": self.schedule,
+                "projected": projected,
+                "actual": run_wall_time,
+            }
+            if concurrency is not None:
+                report["concurrency_changes"] = concurrency.changes
+                rich_logger.info(
+                    f"⚖️  Concurrency changed {len(concurrency.changes)} times during the run "
+                    f"(final: {concurrency.limit}, bounds: "
+                    f"{concurrency.min_workers}-{concurrency.max_workers})"
+                )
+            print_performance_report(report)
+            save_performance_report(
+                report, Path(results_dir) / f"performance_report_{run_uuid}.json"
+            )
+
+        progress.finish()
+
+    def _iter_tasks_sequential(
+        self, tasks_to_run: list[str], task_kwargs: dict[str, Any]
+    ) -> Iterator[tuple[str, dict[str, Any]]]:
+        """Run tasks one after the other in this process."""
+        if self.task_timeout:
+            logger.warning("task_timeout is not enforced by the sequential backend")
+        if self.max_workers is not None:
+            logger.warning("max_workers is ignored by the sequential backend")
+        for task_name in tasks_to_run:
+            yield self._run_single_task(task_name=task_name, **task_kwargs)
+
+    def _iter_tasks_ray(
+        self,
+        tasks_to_run: list[str],
+        task_kwargs: dict[str, Any],
+        num_workers: int,
+        max_running: Optional[Callable[[int], int]] = None,
+        memory_mb: Optional[dict[str, float]] = None,
+    ) -> Iterator[tuple[str, dict[str, Any]]]:
+        """
+        Run tasks on Ray, yielding their results as they complete.
+
+        At most num_workers tasks are submitted at a time (or max_running(n_running), if
+        given), so that the deadline of a task (task_timeout) starts when it can actually start
+        running. Each task reserves memory_mb[task_name] MB of the memory of its node (Ray
+        "memory" resource), so that nodes do not get more browsers than their memory holds. A
+        task killed for lack of memory is retried (up to MAX_OOM_RETRIES times) with a larger
+        reservation, spread to the least loaded nodes.
+        """
+        if not RAY_AVAILABLE:
+            raise RuntimeError(
+                "Ray is required for parallel execution but not available. Please install Ray with: pip install ray"
+            )
+
+        if not ray.is_initialized():
+            # Each node registers the memory available to tasks as its "memory" resource
+            ray.init()
+        node_memory_mb = max(
+            (node["Resources"].get("memory", 0) for node in ray.nodes() if node["Alive"]),
+            default=0,
+        ) / 1024**2
+
+        pending = [(task_name, 0) for task_name in reversed(tasks_to_run)]
+        in_flight = {}  # future -> (task name, deadline, attempt)
+        try:
+            while pending or in_flight:
+                limit = num_workers
+                if pending and max_running is not None:
+                    limit = max_running(len(in_flight))
+                while pending and len(in_flight) < limit:
+                    task_name, attempt = pending.pop()
+                    options = {}
+                    if memory_mb and task_name in memory_mb:
+                        request = memory_mb[task_name] * OOM_RETRY_MEMORY_FACTOR**attempt
+                        if node_memory_mb:
+                            request = min(request, node_memory_mb)
+                        options["memory"] = int(request * 1024**2)
+                    if attempt:
+                        options["scheduling_strategy"] = "SPREAD"
+                    future = run_task_ray.options(**options).remote(
+                        task_name=task_name, **task_kwargs
+                    )
+                    deadline = time.time() + self.task_timeout if self.task_timeout else None
+                    in_flight[future] = (task_name, deadline, attempt)
+
+                ready, _ = ray.wait(list(in_flight), num_returns=1, timeout=1.0)
+                for future in ready:
+                    task_name, _, attempt = in_flight.pop(future)
+                    try:
+                        result = ray.get(future)
+                    except (
+                        ray.exceptions.OutOfMemoryError,
+                        ray.exceptions.WorkerCrashedError,
+                    ) as e:
+                        err_msg = f"{type(e).__name__}: {e}"
+                        if attempt < MAX_OOM_RETRIES:
+                            rich_logger.warning(
+                                f"⚠️ Task {task_name} was killed ({type(e).__name__}), "
+                                "retrying with more memory"
+                            )
+                            pending.append((task_name, attempt + 1))
+                            continue
+                    except Exception as e:
+                        err_msg = f"{type(e).__name__}: {e}"
+                    else:
+                        yield result
+                        continue
+                    rich_logger.error(f"Task {task_name} failed: {err_msg.splitlines()[0]}")
+                    yield task_name, self._failed_task_record(
+                        task_name, err_msg, task_kwargs["run_uuid"]
+                    )
+
+                # cancel the stragglers
+                now = time.time()
+                for future, (task_name, deadline, _) in list(in_flight.items()):
+                    if deadline is not None and now > deadline:
+                        ray.cancel(future, force=True)
+                        del in_flight[future]
+                        err_msg = f"TimeoutError: task exceeded {self.task_timeout}s"
+                        rich_logger.error(f"Task {task_name} failed: {err_msg}")
+                        yield task_name, self._failed_task_record(
+                            task_name, err_msg, task_kwargs["run_uuid"]
+                        )
+        finally:
+            for future in in_flight:
+                ray.cancel(future, force=True)
 
     def _run_single_task(
         self,
@@ -746,99 +1356,171 @@ class harness:
         continue_previous: bool = False,
         use_cache: bool = True,
         run_uuid: Optional[str] = None,
+        trace: bool = False,
+        manifest_path: Optional[str] = None,
     ) -> tuple[str, dict[str, Any]]:
-        """
-        Run a single task with the provided agent and environment configuration.
-
-        Args:
-            task_name: Name of the task to run
-            agent_args: Arguments for the agent
-            env_args_dict: Dictionary of arguments for the environment
-            results_dir: Directory to store results
-            continue_previous: Whether to try to continue from a previous run
-            use_cache: Whether to update the cache with results
-            run_uuid: Optional UUID for tracking this run batch
-
-        Returns:
-            Tuple of (task_name, results_dict)
-        """
-        print(f"Running task: {task_name}")
-
-        # Set task name in env args
-        env_args_dict["task_name"] = task_name
-
-        # Create EnvArgs from dictionary
-        env_args = EnvArgs(**env_args_dict)
-
-        # Set up experiment
-        exp_args = ExpArgs(env_args=env_args, agent_args=agent_args)
-
-        # Start timing
-        start_time = time.time()
-
-        # Run experiment
-        exp_args.prepare(results_dir)
+        """Run a single task in this process (see run_single_task)."""
+        return run_single_task(
+            task_name,
+            agent_args,
+            env_args_dict,
+            results_dir,
+            continue_previous=continue_previous,
+            use_cache=use_cache,
+            run_uuid=run_uuid,
+            trace=trace,
+            manifest_path=manifest_path,
+            leaderboard=getattr(self, "leaderboard", False),
+        )
 
-        # Add essential metadata to summary_info.json before running the experiment
-        # This ensures the cache has what it needs even if there's a crash
-        summary_info_path = Path(exp_args.exp_dir) / "summary_info.json"
+    def _iter_tasks_local(
+        self,
+        tasks_to_run: list[str],
+        task_kwargs: dict[str, Any],
+        num_workers: int,
+        max_running: Optional[Callable[[int], int]] = None,
+    ) -> Iterator[tuple[str, dict[str, Any]]]:
+        """Run tasks in a pool of local worker processes, yielding their results as they
+        complete (see LocalWorkerPool)."""
+        pool = LocalWorkerPool(
+            num_workers, _run_task_local, task_timeout=self.task_timeout, max_running=max_running
+        )
+        jobs = self._task_jobs(tasks_to_run, task_kwargs)
+        for i, ok, value in pool.imap_unordered(jobs):
+            if ok:
+                yield value
+            else:
+                task_name = tasks_to_run[i]
+                rich_logger.error(f"Task {task_name} failed: {value.splitlines()[0]}")
+                yield task_name, self._failed_task_record(task_name, value, task_kwargs["run_uuid"])
+        if pool.n_respawned:
+            rich_logger.warning(f"Respawned {pool.n_respawned} hung or crashed workers")
 
-        # Extract metadata for cache key
-        agent_type = (
-            agent_args.agent_name
-            if hasattr(agent_args, "agent_name")
-            else type(agent_args).__name__
+    def _iter_tasks_async(
+        self,
+        tasks_to_run: list[str],
+        task_kwargs: dict[str, Any],
+        num_workers: int,
+        max_running: Optional[Callable[[int], int]] = None,
+    ) -> Iterator[tuple[str, dict[str, Any]]]:
+        """Run tasks concurrently in this process, on one event loop and one shared browser,
+        yielding their results as they complete (see AsyncEpisodePool)."""
+        if task_kwargs["trace"]:
+            # the tracer is per process, it cannot tell concurrent episodes apart
+            logger.warning("trace is not supported by the async backend, disabling it")
+            task_kwargs = dict(task_kwargs, trace=False)
+        pool = AsyncEpisodePool(
+            num_workers,
+            _run_task_local,
+            task_timeout=self.task_timeout,
+            headless=self.env_args["headless"],
+            max_running=max_running,
         )
-        model_name = getattr(agent_args, "model_name", "unknown")
-        max_steps = env_args.max_steps
+        jobs = self._task_jobs(tasks_to_run, task_kwargs)
+        for i, ok, value in pool.imap_unordered(jobs):
+            if ok:
+                yield value
+            else:
+                task_name = tasks_to_run[i]
+                rich_logger.error(f"Task {task_name} failed: {value.splitlines()[0]}")
+                yield task_name, self._failed_task_record(task_name, value, task_kwargs["run_uuid"])
 
-        # Check if this is a leaderboard run
-        is_leaderboard = self.leaderboard if hasattr(self, "leaderboard") else False
-        leaderboard_suffix = "_leaderboard" if is_leaderboard else ""
+    def _task_jobs(self, tasks_to_run: list[str], task_kwargs: dict[str, Any]) -> list[tuple]:
+        """
+        Jobs of the local and async backends: only the arguments of run_single_task, never the
+        harness itself (whose result cache, for instance, cannot be sent to worker processes).
+        """
+        env_args_dict = task_kwargs["env_args_dict"]
+        return [
+            (
+                i,
+                (
+                    dict(
+                        task_kwargs,
+                        task_name=task_name,
+                        env_args_dict=dict(env_args_dict),
+                        leaderboard=self.leaderboard,
+                    ),
+                ),
+            )
+            for i, task_name in enumerate(tasks_to_run)
+        ]
 
-        # Create initial summary info with metadata
-        initial_summary = {
+    def _failed_task_record(
+        self, task_name: str, err_msg: str, run_uuid: Optional[str]
+    ) -> dict[str, Any]:
+        """Result record of a task whose worker timed out or crashed before returning."""
+        return {
             "task_name": task_name,
-            "agent_type": agent_type,
-            "model_name": model_name,
-            "max_steps": max_steps,
-            "leaderboard": is_leaderboard,  # Store leaderboard flag in metadata
-            "cache_key": f"{task_name}_{agent_type}_{model_name}_{max_steps}{leaderboard_suffix}",
-            "experiment_status": "started",
-            "run_uuid": run_uuid,  # Add the run UUID for tracking
+            "cum_reward": 0,
+            "n_steps": 0,
+            "err_msg": err_msg,
+            "stack_trace": None,
+            "experiment_status": "failed",
+            "elapsed_time": self.task_timeout if err_msg.startswith("TimeoutError") else 0,
+            "exp_dir": None,
+            "run_uuid": run_uuid,
         }
 
-        # Write initial summary info
-        with open(summary_info_path, "w") as f:
-            json.dump(initial_summary, f, indent=4)
-
-        # Run the experiment
-        exp_args.run()
-
-        # End timing
-        end_time = time.time()
-        elapsed_time = end_time - start_time
-
-        # Get results
-        exp_result = get_exp_result(exp_args.exp_dir)
-        exp_record = exp_result.get_exp_record()
-
-        # Add timing information to the record
-        exp_record["elapsed_time"] = elapsed_time
-
-        # Add experiment directory to the record
-        exp_record["exp_dir"] = str(exp_args.exp_dir)
-
-        # Print current task result using Rich logging
-        success = exp_record.get("cum_reward", 0) == 1
-        reward = exp_record.get("cum_reward", 0)
+    def _merge_traces(self, results: dict[str, Any], results_dir: str, run_uuid: str) -> None:
+        """Merge the traces of the episodes of this run into a single trace file."""
+        trace_files = [
+            Path(record["exp_dir"]) / TRACE_FILE
+            for record in results.values()
+            if record.get("exp_dir") and (Path(record["exp_dir"]) / TRACE_FILE).exists()
+        ]
+        if not trace_files:
+            return
+        output_file = Path(results_dir) / f"trace_{run_uuid}.json"
+        n_traces = merge_traces(trace_files, output_file)
+        rich_logger.info(f"Merged {n_traces} episode traces into {output_file}")
 
-        # Extract task_id from task_name (e.g., "omnizon-1" from "v2.omnizon-1")
-        task_id = task_name.split(".", 1)[1] if "." in task_name else task_name
+    def _lookup_cached_result(
+        self,
+        task_name: str,
+        agent_args: AbstractAgentArgs,
+        env_args_dict: dict[str, Any],
+        results_dir: str,
+    ) -> Optional[dict[str, Any]]:
+        """
+        Find a cached result for the given task and agent configuration, in the result cache
+        if the harness has one, otherwise in the results directory (see _find_cached_result).
+        """
+        if self.result_cache is None:
+            return self._find_cached_result(task_name, agent_args, env_args_dict, results_dir)
 
-        rich_logger.task_complete(success, reward, elapsed_time, task_id)
+        key = result_cache_key(task_name, agent_args, env_args_dict, leaderboard=self.leaderboard)
+        if key is None:
+            return None
+        try:
+            entry = self.result_cache.get(key)
+        except Exception as e:
+            logger.warning(f"Result cache lookup failed for {task_name}: {e}")
+            return None
+        if entry is None:
+            return None
+        return dict(entry["record"], result_cache_key=key, artifacts=entry["artifacts"])
 
-        return task_name, exp_record
+    def _store_cached_result(
+        self,
+        task_name: str,
+        agent_args: AbstractAgentArgs,
+        env_args_dict: dict[str, Any],
+        record: dict[str, Any],
+    ) -> None:
+        """Store the result of a task in the result cache (unless it has errors)."""
+        if record.get("err_msg") is not None or record.get("stack_trace") is not None:
+            return
+        key = result_cache_key(task_name, agent_args, env_args_dict, leaderboard=self.leaderboard)
+        if key is None:
+            return
+        artifacts = {}
+        if record.get("exp_dir"):
+            artifacts = {"host": socket.gethostname(), "exp_dir": record["exp_dir"]}
+        try:
+            self.result_cache.put(key, record, artifacts)
+        except Exception as e:
+            logger.warning(f"Could not store the result of {task_name} in the result cache: {e}")
 
     def _find_cached_result(
         self,
@@ -964,6 +1646,15 @@ class harness:
 
         return exp_dirs
 
+    def _completed_experiment_record(self, exp_dir: Path) -> Optional[dict[str, Any]]:
+        """The result of an experiment, or None if it did not complete (to resume a run)."""
+        if not (exp_dir / "summary_info.json").exists():
+            return None
+        info = self._get_experiment_info(exp_dir)
+        if info is None or info.get("experiment_status") != "completed":
+            return None
+        return info
+
     def _get_experiment_info(self, exp_dir: Path) -> Optional[dict[str, Any]]:
         """
         Extract information about an experiment from its directory.
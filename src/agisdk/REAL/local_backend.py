@@ -0,0 +1,226 @@
+"""
+Local parallel execution backend: a pool of worker processes, without Ray.
+
+Each worker process runs one task at a time. Jobs are pickled in the parent before being handed to
+a worker, so that arguments that cannot be sent to another process fail the job instead of being
+lost. A task that exceeds its timeout (counted from its submission) gets its worker killed (along with the browsers it started) and replaced by a fresh one, as does a worker that
+dies unexpectedly. Results are yielded as tasks complete.
+"""
+
+import logging
+import multiprocessing
+import os
+import pickle
+import queue
+import signal
+import time
+import traceback
+from collections import deque
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _worker_main(slot: int, generation: int, fn: Callable, task_queue, result_queue) -> None:
+    """Main loop of a worker process: run the jobs it is given until it gets None."""
+    if hasattr(os, "setsid"):
+        # own process group, so that killing the worker also kills the browsers it started
+        os.setsid()
+    while True:
+        job = task_queue.get()
+        if job is None:
+            return
+        job_id, payload = job
+        result_queue.put((slot, generation, job_id, "started", None))
+        try:
+            result_queue.put((slot, generation, job_id, "done", fn(*pickle.loads(payload))))
+        except BaseException as e:
+            err_msg = f"{type(e).__name__}: {e}\n{traceback.format_exc()}"
+            result_queue.put((slot, generation, job_id, "failed", err_msg))
+
+
+class _Worker:
+    def __init__(self, ctx, slot: int, generation: int, fn: Callable, result_queue):
+        self.slot = slot
+        self.generation = generation
+        self.task_queue = ctx.Queue()
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=(slot, generation, fn, self.task_queue, result_queue),
+            name=f"harness-worker-{slot}",
+            daemon=True,
+        )
+        self.process.start()
+        self.job_id = None
+        self.deadline = None
+
+    def submit(self, job_id, payload: bytes, task_timeout: Optional[float]) -> None:
+        self.job_id = job_id
+        # from the submission: a job that never reaches the worker (e.g. the worker died while
+        # starting) must time out as well
+        self.deadline = time.time() + task_timeout if task_timeout else None
+        self.task_queue.put((job_id, payload))
+
+    def kill(self) -> None:
+        if self.process.is_alive():
+            try:
+                if hasattr(os, "killpg"):
+                    os.killpg(self.process.pid, signal.SIGKILL)
+                else:
+                    self.process.kill()
+            except (ProcessLookupError, PermissionError):
+                self.process.kill()
+        self.process.join(timeout=5)
+
+    def stop(self) -> None:
+        if self.process.is_alive():
+            self.task_queue.put(None)
+            self.process.join(timeout=5)
+        self.kill()
+
+
+class LocalWorkerPool:
+    """
+    Pool of worker processes running jobs with per-job timeouts.
+
+    Args:
+        num_workers: Number of worker processes
+        fn: Function run by the workers, called as fn(*args) (must be picklable)
+        task_timeout: Maximum duration of a job, in seconds (None for no limit)
+        poll_interval: How often the pool checks for timed out or dead workers, in seconds
+        start_method: Multiprocessing start method ("spawn" by default, as forking a process
+                      that uses Playwright is unsafe)
+        max_running: Optional function called with the number of running jobs while jobs are
+                     pending, returning how many jobs may run at the same time (at most
+                     num_workers), to adapt the concurrency during the run
+    """
+
+    def __init__(
+        self,
+        num_workers: int,
+        fn: Callable,
+        task_timeout: Optional[float] = None,
+        poll_interval: float = 1.0,
+        start_method: str = "spawn",
+        max_running: Optional[Callable[[int], int]] = None,
+    ):
+        self.num_workers = max(1, num_workers)
+        self.fn = fn
+        self.task_timeout = task_timeout
+        self.poll_interval = poll_interval
+        self.max_running = max_running
+        self.n_respawned = 0
+        self._ctx = multiprocessing.get_context(start_method)
+        self._result_queue = None
+        self._workers = []
+
+    def imap_unordered(
+        self, jobs: Iterable[tuple[Any, tuple]]
+    ) -> Iterator[tuple[Any, bool, Any]]:
+        """
+        Run the jobs, yielding their results as they complete.
+
+        Args:
+            jobs: Iterable of (job_id, args) tuples
+
+        Yields:
+            (job_id, ok, value) tuples: the return value of the job if ok, otherwise an error
+            message (exception raised, arguments that cannot be pickled, timeout or worker
+            crash)
+        """
+        pending = deque(jobs)
+        n_running = 0
+        self._result_queue = self._ctx.Queue()
+        self._workers = []
+        try:
+            while pending or n_running:
+                limit = self.num_workers
+                if pending and self.max_running is not None:
+                    limit = min(self.max_running(n_running), self.num_workers)
+                unpicklable = []
+                for worker in self._workers:
+                    if worker.job_id is None and n_running < limit:
+                        job = self._next_job(pending, unpicklable)
+                        if job is None:
+                            break
+                        worker.submit(*job, self.task_timeout)
+                        n_running += 1
+                # workers are started when first needed
+                while n_running < limit and len(self._workers) < self.num_workers:
+                    job = self._next_job(pending, unpicklable)
+                    if job is None:
+                        break
+                    worker = _Worker(self._ctx, len(self._workers), 0, self.fn, self._result_queue)
+                    self._workers.append(worker)
+                    worker.submit(*job, self.task_timeout)
+                    n_running += 1
+                for job_id, err_msg in unpicklable:
+                    yield job_id, False, err_msg
+
+                try:
+                    slot, generation, job_id, status, value = self._result_queue.get(
+                        timeout=self.poll_interval
+                    )
+                except queue.Empty:
+                    pass
+                else:
+                    worker = self._workers[slot]
+                    # ignore messages of killed workers
+                    if worker.generation == generation and worker.job_id == job_id:
+                        if status != "started":
+                            worker.job_id = None
+                            n_running -= 1
+                            yield job_id, status == "done", value
+
+                now = time.time()
+                for worker in list(self._workers):
+                    if worker.job_id is None:
+                        continue
+                    if worker.deadline is not None and now > worker.deadline:
+                        err_msg = f"TimeoutError: task exceeded {self.task_timeout}s"
+                    elif not worker.process.is_alive():
+                        err_msg = (
+                            f"WorkerCrashed: worker process exited with code "
+                            f"{worker.process.exitcode}"
+                        )
+                    else:
+                        continue
+                    job_id = worker.job_id
+                    logger.warning(f"Worker {worker.slot} failed on job {job_id}: {err_msg}")
+                    self._respawn(worker)
+                    n_running -= 1
+                    yield job_id, False, err_msg
+        finally:
+            self.close()
+
+    @staticmethod
+    def _next_job(pending: deque, unpicklable: list) -> Optional[tuple[Any, bytes]]:
+        """
+        Pop the next job and pickle its arguments, here rather than in the feeder thread of the
+        worker queue, which would only log the error and never deliver the job. Jobs whose
+        arguments cannot be pickled are added to unpicklable, with an error message.
+        """
+        while pending:
+            job_id, args = pending.popleft()
+            try:
+                return job_id, pickle.dumps(args)
+            except Exception as e:
+                err_msg = f"PicklingError: cannot send the job to a worker: {type(e).__name__}: {e}"
+                unpicklable.append((job_id, err_msg))
+        return None
+
+    def _respawn(self, worker: _Worker) -> None:
+        worker.kill()
+        self._workers[worker.slot] = _Worker(
+            self._ctx, worker.slot, worker.generation + 1, self.fn, self._result_queue
+        )
+        self.n_respawned += 1
+
+    def close(self) -> None:
+        """Stop all the workers (killing the ones still running a job)."""
+        for worker in self._workers:
+            if worker.job_id is None:
+                worker.stop()
+            else:
+                worker.kill()
+        self._workers = []
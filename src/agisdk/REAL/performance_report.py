@@ -0,0 +1,166 @@
+"""
+Run-level performance report: where the time of a run goes.
+
+Aggregates the per-step phase timings saved in the summary of each episode (`phase_timings`)
+into p50/p90/p99 per phase, overall, by site and by worker, along with the throughput of the
+run (tasks/hour, steps/second) and the utilization of its workers.
+"""
+
+import json
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Optional
+
+import numpy as np
+
+from agisdk.REAL.logging import logger as rich_logger
+
+# phases of an episode, as saved in summary_info["phase_timings"]
+PHASES = ("reset", "env_step", "agent", "obs_extract", "eval", "disk_write")
+PHASE_LABELS = {
+    "reset": "Reset",
+    "env_step": "Env step",
+    "agent": "Agent / LLM",
+    "obs_extract": "Observation extraction",
+    "eval": "Evaluation",
+    "disk_write": "Disk writes",
+}
+
+
+def task_site(task_name: str) -> str:
+    """Return the site of a task (e.g. "omnizon" for "v2.omnizon-1")."""
+    task_full_name = task_name.split(".")[1] if "." in task_name else task_name
+    parts = task_full_name.split("-")
+    # the site is everything before the numeric part
+    for i, part in enumerate(parts[1:], 1):
+        if part and part[0].isdigit():
+            return "-".join(parts[:i])
+    return parts[0]
+
+
+def _percentiles(values: list[float]) -> dict[str, float]:
+    return {
+        "n": len(values),
+        "mean": float(np.mean(values)),
+        "p50": float(np.percentile(values, 50)),
+        "p90": float(np.percentile(values, 90)),
+        "p99": float(np.percentile(values, 99)),
+        "total": float(np.sum(values)),
+    }
+
+
+def _phase_stats(records: list[dict[str, Any]]) -> dict[str, dict[str, float]]:
+    values = defaultdict(list)
+    for record in records:
+        phase_timings = record.get("phase_timings") or {}
+        for phase in PHASES:
+            values[phase].extend(phase_timings.get(phase, []))
+    return {phase: _percentiles(values[phase]) for phase in PHASES if values[phase]}
+
+
+def build_performance_report(
+    results: dict[str, Any],
+    wall_time: Optional[float] = None,
+    num_workers: Optional[float] = None,
+    run_uuid: Optional[str] = None,
+) -> dict[str, Any]:
+    """
+    Build the performance report of a run.
+
+    Args:
+        results: Dictionary of results indexed by task name, as returned by the harness
+        wall_time: Wall time of the run, in seconds (for the throughput and utilization)
+        num_workers: Number of workers of the run, time-weighted mean if it changed during the
+                     run (for the utilization)
+        run_uuid: Only report on the tasks executed by this run (not the cached ones)
+
+    Returns:
+        The report, as a JSON-serializable dictionary
+    """
+    records = [
+        dict(record, task_name=task_name)
+        for task_name, record in results.items()
+        if run_uuid is None or record.get("run_uuid") == run_uuid
+    ]
+
+    by_site = defaultdict(list)
+    by_worker = defaultdict(list)
+    for record in records:
+        by_site[task_site(record["task_name"])].append(record)
+        by_worker[record.get("worker_id") or "unknown"].append(record)
+
+    n_steps = sum(record.get("n_steps") or 0 for record in records)
+    busy_time = sum(record.get("elapsed_time") or 0 for record in records)
+    report = {
+        "run_uuid": run_uuid,
+        "n_tasks": len(records),
+        "n_steps": n_steps,
+        "wall_time": wall_time,
+        "num_workers": num_workers,
+        "phases": _phase_stats(records),
+        "by_site": {
+            site: {"n_tasks": len(site_records), "phases": _phase_stats(site_records)}
+            for site, site_records in sorted(by_site.items())
+        },
+        "by_worker": {
+            worker: {
+                "n_tasks": len(worker_records),
+                "busy_time": sum(record.get("elapsed_time") or 0 for record in worker_records),
+                "phases": _phase_stats(worker_records),
+            }
+            for worker, worker_records in sorted(by_worker.items())
+        },
+    }
+    if wall_time:
+        report["throughput"] = {
+            "tasks_per_hour": len(records) / wall_time * 3600,
+            "steps_per_second": n_steps / wall_time,
+            "worker_utilization": busy_time / (wall_time * (num_workers or 1)),
+        }
+    return report
+
+
+def print_performance_report(report: dict[str, Any]) -> None:
+    """Print the performance report of a run."""
+    rich_logger.header("Performance Report")
+    throughput = report.get("throughput")
+    if throughput:
+        rich_logger.info(
+            f"Throughput: {throughput['tasks_per_hour']:.1f} tasks/hour, "
+            f"{throughput['steps_per_second']:.2f} steps/s, "
+            f"worker utilization {throughput['worker_utilization'] * 100:.1f}%"
+        )
+    makespan = report.get("makespan")
+    if makespan and makespan.get("projected") is not None:
+        rich_logger.info(
+            f"Makespan: {makespan['actual']:.0f}s (projected {makespan['projected']:.0f}s, "
+            f"{makespan['schedule']} schedule)"
+        )
+
+    if not report["phases"]:
+        return
+    print("\nTime per phase (seconds):")
+    print(f"  {'phase':<24}{'n':>7}{'p50':>9}{'p90':>9}{'p99':>9}{'total':>11}")
+    for phase, stats in report["phases"].items():
+        print(
+            f"  {PHASE_LABELS[phase]:<24}{stats['n']:>7}{stats['p50']:>9.2f}"
+            f"{stats['p90']:>9.2f}{stats['p99']:>9.2f}{stats['total']:>11.1f}"
+        )
+
+    for group in ("by_site", "by_worker"):
+        if len(report[group]) < 2:
+            continue
+        print(f"\nTime per phase {group.replace('_', ' ')} (p50 / p90 seconds):")
+        for name, group_report in report[group].items():
+            phases = ", ".join(
+                f"{phase} {stats['p50']:.2f}/{stats['p90']:.2f}"
+                for phase, stats in group_report["phases"].items()
+            )
+            print(f"  {name} ({group_report['n_tasks']} tasks): {phases}")
+
+
+def save_performance_report(report: dict[str, Any], path) -> None:
+    """Write the performance report of a run as JSON."""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=4)
@@ -0,0 +1,319 @@
+"""
+Content-addressed cache of task results, shareable across machines.
+
+A result is stored under a canonical hash of everything it depends on: task id and version,
+agent arguments (model included), environment arguments and SDK version. Whatever the backend,
+a lookup is a single read of that key:
+
+- DirectoryResultCache: one small JSON file per result, in a local directory or a directory on a
+  shared filesystem (NFS, SMB, mounted bucket), written atomically;
+- SQLiteResultCache: one row per result in an SQLite file.
+
+Each entry is a compact record (the scalar fields of the result record) and optional artifact
+pointers (e.g. the host and experiment directory holding the full logs and screenshots).
+"""
+
+import dataclasses
+import enum
+import hashlib
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Optional, Union
+
+from agisdk.REAL.browsergym.webclones.task_config import split_task_reference
+
+logger = logging.getLogger(__name__)
+
+# version of the format of the cache keys and entries
+CACHE_FORMAT_VERSION = 2
+# argument names left out of the cache key: secrets, and settings without effect on results
+SECRET_ARG_MARKERS = ("api_key", "token", "secret", "password")
+IGNORED_ENV_ARGS = ("task_name", "headless")
+# environment arguments holding paths, keyed by their base name to match across machines
+PATH_ENV_ARGS = ("golden_user_data_dir", "extensions_dir")
+# reasons already reported for arguments that cannot be cached (reported once per process)
+_REPORTED_UNCACHEABLE = set()
+
+
+def sdk_version() -> str:
+    try:
+        from importlib.metadata import PackageNotFoundError, version
+
+        return version("agisdk")
+    except (ImportError, PackageNotFoundError):
+        return "unknown"
+
+
+class UncacheableError(ValueError):
+    """Raised when the arguments of a result have no canonical form (see _canonical)."""
+
+
+def _is_secret(name: str) -> bool:
+    return any(marker in name for marker in SECRET_ARG_MARKERS)
+
+
+def _canonical(obj: Any, _parents: tuple = ()) -> Any:
+    """
+    JSON-compatible canonical form of a value (stable across processes and machines).
+
+    Objects are reduced to their class and attributes (dataclass fields, or vars() of other
+    objects), secrets left out.
+
+    Raises:
+        UncacheableError: If the value holds an object without a stable canonical form (e.g. a
+                          function, a class or an object without __dict__)
+    """
+    if obj is None or isinstance(obj, (bool, int, float, str)):
+        return obj
+    if isinstance(obj, Path):
+        return str(obj)
+    if isinstance(obj, enum.Enum):
+        return {"__class__": type(obj).__qualname__, "value": _canonical(obj.value)}
+    if id(obj) in _parents:
+        raise UncacheableError(f"Reference cycle through {type(obj).__qualname__}")
+    parents = _parents + (id(obj),)
+    if isinstance(obj, dict):
+        return {str(key): _canonical(val, parents) for key, val in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_canonical(val, parents) for val in obj]
+    if isinstance(obj, (set, frozenset)):
+        return sorted((_canonical(val, parents) for val in obj), key=json.dumps)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        attributes = {field.name: getattr(obj, field.name) for field in dataclasses.fields(obj)}
+    elif not callable(obj) and hasattr(obj, "__dict__"):
+        attributes = vars(obj)
+    else:
+        raise UncacheableError(
+            f"No canonical form for {type(obj).__module__}.{type(obj).__qualname__}"
+        )
+    attributes = {key: val for key, val in attributes.items() if not _is_secret(key)}
+    return {"__class__": type(obj).__qualname__, **_canonical(attributes, parents)}
+
+
+def result_cache_key(
+    task_name: str,
+    agent_args: Any,
+    env_args_dict: dict[str, Any],
+    leaderboard: bool = False,
+) -> Optional[str]:
+    """
+    Canonical key of the result of a task.
+
+    Args:
+        task_name: Task name ('<version>.<task_name>', or '<task_name>' for the default version)
+        agent_args: Arguments of the agent (secrets left out)
+        env_args_dict: Arguments of the environment (see IGNORED_ENV_ARGS and PATH_ENV_ARGS)
+        leaderboard: Whether the result was submitted to the leaderboard
+
+    Returns:
+        SHA-256 hex digest of the canonical JSON of all of these, or None if they have no
+        canonical form (the result must not be cached)
+    """
+    version, name = split_task_reference(task_name)
+    env_args = {}
+    for key, val in env_args_dict.items():
+        if key in IGNORED_ENV_ARGS:
+            continue
+        if key in PATH_ENV_ARGS and val:
+            val = os.path.basename(os.path.normpath(str(val)))
+        env_args[key] = val
+    material = {
+        "format": CACHE_FORMAT_VERSION,
+        "task_id": name,
+        "task_version": version,
+        "agent_type": getattr(agent_args, "agent_name", type(agent_args).__name__),
+        "model_name": getattr(agent_args, "model_name", None),
+        "agent_args": agent_args,
+        "env_args": env_args,
+        "leaderboard": leaderboard,
+        "sdk_version": sdk_version(),
+    }
+    try:
+        canonical_json = json.dumps(_canonical(material), sort_keys=True, separators=(",", ":"))
+    except UncacheableError as e:
+        if str(e) not in _REPORTED_UNCACHEABLE:
+            _REPORTED_UNCACHEABLE.add(str(e))
+            logger.warning(f"Not caching results: {e} (in the arguments of {task_name})")
+        return None
+    return hashlib.sha256(canonical_json.encode()).hexdigest()
+
+
+def compact_record(record: dict[str, Any]) -> dict[str, Any]:
+    """The scalar fields of a result record (the ones its summary is computed from)."""
+    return {
+        key: val
+        for key, val in record.items()
+        if val is None or isinstance(val, (bool, int, float, str))
+    }
+
+
+class ResultCache(ABC):
+    """Base class of the result cache backends."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[dict[str, Any]]:
+        """
+        Look up a result.
+
+        Returns:
+            The cache entry ({"key", "record", "artifacts", "created", "host"}), or None
+        """
+
+    @abstractmethod
+    def put(
+        self, key: str, record: dict[str, Any], artifacts: Optional[dict[str, Any]] = None
+    ) -> None:
+        """
+        Store a result (replacing the previous one of the same key).
+
+        Args:
+            key: Cache key (see result_cache_key)
+            record: Result record, stored compacted (see compact_record)
+            artifacts: Optional pointers to the artifacts of the result (e.g. experiment dir)
+        """
+
+    def close(self) -> None:
+        pass
+
+    @staticmethod
+    def _entry(
+        key: str, record: dict[str, Any], artifacts: Optional[dict[str, Any]]
+    ) -> dict[str, Any]:
+        return {
+            "key": key,
+            "record": compact_record(record),
+            "artifacts": artifacts or {},
+            "created": time.time(),
+            "host": socket.gethostname(),
+        }
+
+
+class DirectoryResultCache(ResultCache):
+    """
+    Result cache in a directory, local or on a shared filesystem: one JSON file per result,
+    at <path>/<key[:2]>/<key>.json. Entries are written to a temporary file and renamed, so
+    that readers on other machines never see partial entries.
+
+    Args:
+        path: Directory of the cache (created if needed)
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def _entry_path(self, key: str) -> Path:
+        return self.path / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[dict[str, Any]]:
+        try:
+            with open(self._entry_path(key)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read the cached result {key}: {e}")
+            return None
+
+    def put(
+        self, key: str, record: dict[str, Any], artifacts: Optional[dict[str, Any]] = None
+    ) -> None:
+        entry_path = self._entry_path(key)
+        entry_path.parent.mkdir(exist_ok=True)
+        tmp_path = entry_path.with_name(f".{key}.{socket.gethostname()}.{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self._entry(key, record, artifacts), f, default=str)
+        os.replace(tmp_path, entry_path)
+
+
+class SQLiteResultCache(ResultCache):
+    """
+    Result cache in an SQLite file, one row per result (primary key lookups).
+
+    The connection is opened on first use in each process, so that the cache can be pickled
+    (e.g. sent to worker processes along with the harness).
+
+    Args:
+        path: SQLite database file (created if needed)
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = None
+        self._pid = None
+        with self._lock, self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, entry TEXT NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        """The connection of this process (to call with the lock held)."""
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = sqlite3.connect(
+                str(self.path), timeout=30, check_same_thread=False
+            )
+            self._pid = os.getpid()
+        return self._connection
+
+    def __getstate__(self) -> dict[str, Any]:
+        return {"path": self.path}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.path = state["path"]
+        self._lock = threading.Lock()
+        self._connection = None
+        self._pid = None
+
+    def get(self, key: str) -> Optional[dict[str, Any]]:
+        with self._lock:
+            row = (
+                self._connect()
+                .execute("SELECT entry FROM results WHERE key = ?", (key,))
+                .fetchone()
+            )
+        return json.loads(row[0]) if row else None
+
+    def put(
+        self, key: str, record: dict[str, Any], artifacts: Optional[dict[str, Any]] = None
+    ) -> None:
+        entry = json.dumps(self._entry(key, record, artifacts), default=str)
+        with self._lock, self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO results (key, entry) VALUES (?, ?)", (key, entry)
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None and self._pid == os.getpid():
+                self._connection.close()
+            self._connection = None
+
+
+SQLITE_SUFFIXES = (".sqlite", ".sqlite3", ".db")
+
+
+def open_result_cache(cache: Union[str, Path, ResultCache]) -> ResultCache:
+    """
+    Open a result cache.
+
+    Args:
+        cache: A ResultCache, the path of an SQLite file (.sqlite, .sqlite3 or .db suffix, or
+               "sqlite://<path>"), or the path of a directory (local or on a shared filesystem)
+    """
+    if isinstance(cache, ResultCache):
+        return cache
+    cache = str(cache)
+    if cache.startswith("sqlite://"):
+        return SQLiteResultCache(cache[len("sqlite://") :])
+    if cache.endswith(SQLITE_SUFFIXES):
+        return SQLiteResultCache(cache)
+    return DirectoryResultCache(cache)
@@ -0,0 +1,49 @@
+import pickle
+
+import pytest
+
+from agisdk.REAL.result_cache import (
+    DirectoryResultCache,
+    SQLiteResultCache,
+    open_result_cache,
+    result_cache_key,
+)
+
+
+@pytest.fixture(params=["directory", "sqlite"])
+def cache(request, tmp_path):
+    path = tmp_path / "cache" if request.param == "directory" else tmp_path / "cache.sqlite"
+    cache = open_result_cache(path)
+    yield cache
+    cache.close()
+
+
+def test_backends_are_selected_by_path(tmp_path):
+    assert isinstance(open_result_cache(tmp_path / "cache"), DirectoryResultCache)
+    assert isinstance(open_result_cache(tmp_path / "cache.db"), SQLiteResultCache)
+    assert isinstance(open_result_cache(f"sqlite://{tmp_path / 'results'}"), SQLiteResultCache)
+
+
+def test_get_put_round_trip(cache):
+    key = result_cache_key("v2.omnizon-1", {"model_name": "gpt-4o"}, {"max_steps": 5})
+    assert cache.get(key) is None
+
+    record = {"cum_reward": 1, "n_steps": 3, "err_msg": None, "steps": [{"large": "field"}]}
+    cache.put(key, record, {"host": "worker-1", "exp_dir": "/results/exp"})
+    entry = cache.get(key)
+    assert entry["key"] == key
+    assert entry["record"] == {"cum_reward": 1, "n_steps": 3, "err_msg": None}
+    assert entry["artifacts"] == {"host": "worker-1", "exp_dir": "/results/exp"}
+
+    cache.put(key, dict(record, cum_reward=0))
+    assert cache.get(key)["record"]["cum_reward"] == 0
+
+
+def test_caches_can_be_pickled(cache):
+    cache.put("key", {"cum_reward": 1})
+    copy = pickle.loads(pickle.dumps(cache))
+    assert copy.get("key")["record"] == {"cum_reward": 1}
+
+    copy.put("other", {"cum_reward": 0})
+    assert cache.get("other")["record"] == {"cum_reward": 0}
+    copy.close()
@@ -0,0 +1,208 @@
+"""
+Crash-resumable run manifest: an append-only journal of the state of each task of a run.
+
+The journal (runs/<run_uuid>/manifest.jsonl in the results directory) starts with the list of
+tasks of the run, followed by one JSON line per state change:
+
+- queued: the task was handed to a backend;
+- running: a worker started the task (worker, pid and experiment directory), written by the
+  worker itself;
+- done: the task completed (experiment directory and result record);
+- failed: the task failed before producing a result (timeout, crashed worker).
+
+Lines are small and written with a single append, so that concurrent writers (the driver and
+local workers) do not interleave, and each line is flushed to disk before going on. A run whose
+driver died can be resumed from its journal (`harness.run(resume=<run_dir>)`): completed tasks
+are not run again, and the experiment directories left behind by interrupted tasks are removed.
+"""
+
+import json
+import logging
+import os
+import shutil
+import socket
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+RUNS_DIR = "runs"
+MANIFEST_FILE = "manifest.jsonl"
+
+
+def append_event(path, event: dict[str, Any]) -> None:
+    """Append an event to a manifest (from any process)."""
+    line = json.dumps(dict(event, time=time.time()), default=str) + "\n"
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, line.encode())
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class RunManifest:
+    """
+    Journal of the tasks of a run.
+
+    Args:
+        run_dir: Directory of the run (results_dir/runs/<run_uuid>)
+    """
+
+    def __init__(self, run_dir):
+        self.run_dir = Path(run_dir)
+        self.path = self.run_dir / MANIFEST_FILE
+        self.run_uuid = None
+        self.tasks = []
+        self.shard = None  # shard of a task list (see sharding.py)
+        self.events = []
+
+    @classmethod
+    def create(
+        cls, results_dir, run_uuid: str, tasks: list[str], config: Optional[dict] = None
+    ) -> "RunManifest":
+        """Start the manifest of a new run."""
+        manifest = cls(Path(results_dir) / RUNS_DIR / run_uuid)
+        manifest.run_dir.mkdir(parents=True, exist_ok=True)
+        manifest.run_uuid = run_uuid
+        manifest.tasks = list(tasks)
+        manifest.shard = (config or {}).get("shard")
+        manifest.append(
+            {"event": "run", "run_uuid": run_uuid, "tasks": manifest.tasks, "config": config or {}}
+        )
+        return manifest
+
+    @classmethod
+    def load(cls, run_dir: Union[str, Path], results_dir=None) -> "RunManifest":
+        """
+        Load the manifest of a run.
+
+        Args:
+            run_dir: Directory of the run, or its run UUID (looked up in results_dir)
+            results_dir: Results directory, to look up a run by its UUID
+        """
+        run_dir = Path(run_dir)
+        if not (run_dir / MANIFEST_FILE).exists() and results_dir is not None:
+            run_dir = Path(results_dir) / RUNS_DIR / str(run_dir)
+        manifest = cls(run_dir)
+        if not manifest.path.exists():
+            raise FileNotFoundError(f"No run manifest found in {run_dir}")
+        with open(manifest.path) as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue  # torn last line of a crashed writer
+                manifest.events.append(event)
+                if event.get("event") == "run":
+                    manifest.run_uuid = event["run_uuid"]
+                    manifest.tasks = event["tasks"]
+                    manifest.shard = event.get("config", {}).get("shard")
+        if manifest.run_uuid is None:
+            raise ValueError(f"Invalid run manifest {manifest.path}: missing run header")
+        return manifest
+
+    def append(self, event: dict[str, Any]) -> None:
+        append_event(self.path, event)
+        self.events.append(event)
+
+    def queued(self, task_name: str) -> None:
+        self.append({"event": "queued", "task": task_name})
+
+    def finished(self, task_name: str, record: dict[str, Any], from_cache: bool = False) -> None:
+        """Record the result of a task, as done or failed."""
+        failed = record.get("experiment_status") == "failed" and not record.get("exp_dir")
+        self.append(
+            {
+                "event": "failed" if failed else "done",
+                "task": task_name,
+                "exp_dir": record.get("exp_dir"),
+                "from_cache": from_cache,
+                "record": record,
+            }
+        )
+
+    def results(self) -> list[tuple[str, dict[str, Any]]]:
+        """The results of the finished (done or failed) tasks, in order of completion."""
+        return [
+            (event["task"], event["record"])
+            for event in self.events
+            if event.get("event") in ("done", "failed")
+        ]
+
+    def remaining_tasks(self) -> list[str]:
+        """The tasks of the run that did not finish, in the order of the run."""
+        finished = Counter(task_name for task_name, _ in self.results())
+        remaining = []
+        for task_name in self.tasks:
+            if finished[task_name] > 0:
+                finished[task_name] -= 1
+            else:
+                remaining.append(task_name)
+        return remaining
+
+    def interrupted_exp_dirs(self) -> list[dict[str, Any]]:
+        """The "running" events of the tasks that were interrupted before finishing."""
+        finished_dirs = {
+            str(event.get("exp_dir"))
+            for event in self.events
+            if event.get("event") in ("done", "failed") and event.get("exp_dir")
+        }
+        return [
+            event
+            for event in self.events
+            if event.get("event") == "running"
+            and event.get("exp_dir")
+            and str(event["exp_dir"]) not in finished_dirs
+        ]
+
+    def recover(self, load_record) -> None:
+        """
+        Settle the tasks that were running when the run stopped: the ones whose experiment
+        completed anyway are recorded as done, the partial experiment directories of the others
+        are removed.
+
+        Args:
+            load_record: Function returning the result record of a completed experiment
+                         directory, or None if the experiment did not complete
+        """
+        remaining = Counter(self.remaining_tasks())
+        for event in self.interrupted_exp_dirs():
+            exp_dir = Path(event["exp_dir"])
+            record = None
+            if exp_dir.exists():
+                try:
+                    record = load_record(exp_dir)
+                except Exception as e:
+                    logger.warning(f"Could not load the results of {exp_dir}: {e}")
+            if record is not None:
+                if remaining[event["task"]] > 0:  # not already failed (e.g. timed out)
+                    remaining[event["task"]] -= 1
+                    record.setdefault("worker_id", event.get("worker"))
+                    logger.info(f"Recovered the completed experiment {exp_dir}")
+                    self.finished(event["task"], record)
+            else:
+                logger.info(f"Removing the partial experiment directory {exp_dir}")
+                shutil.rmtree(exp_dir, ignore_errors=True)
+                self.append({"event": "cleaned", "task": event["task"], "exp_dir": str(exp_dir)})
+
+
+def record_running(manifest_path, task_name: str, exp_dir) -> None:
+    """Record, from the worker running it, that a task started (no-op without manifest)."""
+    if not manifest_path:
+        return
+    try:
+        append_event(
+            manifest_path,
+            {
+                "event": "running",
+                "task": task_name,
+                "exp_dir": str(exp_dir),
+                "worker": socket.gethostname(),
+                "pid": os.getpid(),
+            },
+        )
+    except OSError as e:
+        logger.warning(f"Could not record the start of {task_name} in {manifest_path}: {e}")
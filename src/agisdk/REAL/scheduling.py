@@ -0,0 +1,197 @@
+"""
+Task scheduling from historical durations and memory usage.
+
+Dispatching tasks in directory order leaves a long tail when long multi-step tasks come last: one
+worker still runs while the others sit idle. The harness keeps the durations of past runs in
+task_durations.json in the results directory and dispatches the longest expected tasks first
+(LPT), which keeps the makespan within 4/3 of the optimum.
+
+The same history keeps the peak resident memory of the process tree (worker, browser) of each
+task, from which the Ray backend sizes the memory requests of the tasks.
+"""
+
+import heapq
+import json
+import logging
+import os
+from collections import defaultdict
+from pathlib import Path
+from statistics import median
+from typing import Any, Iterable, Optional
+
+from agisdk.REAL.performance_report import task_site
+
+logger = logging.getLogger(__name__)
+
+HISTORY_FILE = "task_durations.json"
+# expected duration of a task when nothing is known about it or its site, in seconds
+DEFAULT_TASK_DURATION = 120.0
+# number of durations kept per task
+MAX_DURATIONS = 20
+# total duration of an episode relative to its env steps, when only the steps were measured
+DEFAULT_ELAPSED_PER_STEP_ELAPSED = 2.0
+# expected peak memory of a task when nothing is known about it or its site, in MB
+DEFAULT_TASK_MEMORY_MB = 2048.0
+# margin over the expected peak memory of a task when reserving memory for it
+MEMORY_SAFETY_MARGIN = 1.25
+
+
+class TaskDurationHistory:
+    """
+    Durations of the past runs of each task: total elapsed time of the task and cumulated
+    duration of its env steps (summary_info "stats.cum_step_elapsed"), and their peak memory
+    usage.
+
+    Args:
+        path: JSON file where the history is kept
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.tasks = {}
+        if self.path.exists():
+            try:
+                with open(self.path) as f:
+                    self.tasks = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not load the task durations from {self.path}: {e}")
+
+    @classmethod
+    def load(cls, results_dir) -> "TaskDurationHistory":
+        return cls(Path(results_dir) / HISTORY_FILE)
+
+    def __contains__(self, task_name: str) -> bool:
+        return task_name in self.tasks
+
+    def add(
+        self,
+        task_name: str,
+        elapsed_time: Optional[float] = None,
+        step_elapsed: Optional[float] = None,
+        peak_rss_mb: Optional[float] = None,
+    ) -> None:
+        entry = self.tasks.setdefault(task_name, {"elapsed_time": [], "step_elapsed": []})
+        for key, val in (
+            ("elapsed_time", elapsed_time),
+            ("step_elapsed", step_elapsed),
+            ("peak_rss_mb", peak_rss_mb),
+        ):
+            if val:
+                entry[key] = (entry.get(key, []) + [float(val)])[-MAX_DURATIONS:]
+
+    def add_record(self, task_name: str, record: dict[str, Any]) -> None:
+        """Add the durations of a completed task, from its result record."""
+        if record.get("experiment_status") == "failed" and not record.get("exp_dir"):
+            return  # timed out or crashed: its duration says nothing about the task
+        self.add(
+            task_name,
+            elapsed_time=record.get("elapsed_time"),
+            step_elapsed=record.get("stats.cum_step_elapsed"),
+            peak_rss_mb=record.get("peak_rss_mb"),
+        )
+
+    def add_summaries(self, summaries: Iterable[Optional[dict[str, Any]]]) -> None:
+        """Add the step durations of past experiments (summary_info dicts) of unknown tasks."""
+        known = set(self.tasks)
+        for summary in summaries:
+            if summary and summary.get("task_name") and summary["task_name"] not in known:
+                self.add(summary["task_name"], step_elapsed=summary.get("stats.cum_step_elapsed"))
+
+    def estimates(self, task_names: Iterable[str]) -> dict[str, tuple[float, str]]:
+        """
+        Expected durations of tasks.
+
+        Returns:
+            Dictionary of (duration in seconds, source of the estimate) indexed by task name. The
+            source is "elapsed" (median past duration), "steps" (median past env step duration,
+            scaled), "site" (median of the tasks of the same site), "all" (median of all tasks)
+            or "default"
+        """
+        ratio = self._elapsed_per_step_elapsed()
+        known = {}
+        for name, entry in self.tasks.items():
+            estimate = self._task_estimate(entry, ratio)
+            if estimate is not None:
+                known[name] = estimate
+        by_site = defaultdict(list)
+        for name, (duration, _) in known.items():
+            by_site[task_site(name)].append(duration)
+        all_median = median(duration for duration, _ in known.values()) if known else None
+
+        estimates = {}
+        for task_name in task_names:
+            if task_name in known:
+                estimates[task_name] = known[task_name]
+            elif by_site.get(task_site(task_name)):
+                estimates[task_name] = (median(by_site[task_site(task_name)]), "site")
+            elif all_median is not None:
+                estimates[task_name] = (all_median, "all")
+            else:
+                estimates[task_name] = (DEFAULT_TASK_DURATION, "default")
+        return estimates
+
+    def memory_estimates(self, task_names: Iterable[str]) -> dict[str, tuple[float, str]]:
+        """
+        Expected peak memory of tasks.
+
+        Returns:
+            Dictionary of (peak resident memory in MB, source of the estimate) indexed by task
+            name. The source is "task" (highest recent peak of the task), "site" (median of the
+            tasks of the same site), "all" (median of all tasks) or "default"
+        """
+        known = {
+            name: max(entry["peak_rss_mb"])
+            for name, entry in self.tasks.items()
+            if entry.get("peak_rss_mb")
+        }
+        by_site = defaultdict(list)
+        for name, peak in known.items():
+            by_site[task_site(name)].append(peak)
+        all_median = median(known.values()) if known else None
+
+        estimates = {}
+        for task_name in task_names:
+            if task_name in known:
+                estimates[task_name] = (known[task_name], "task")
+            elif by_site.get(task_site(task_name)):
+                estimates[task_name] = (median(by_site[task_site(task_name)]), "site")
+            elif all_median is not None:
+                estimates[task_name] = (all_median, "all")
+            else:
+                estimates[task_name] = (DEFAULT_TASK_MEMORY_MB, "default")
+        return estimates
+
+    def _task_estimate(self, entry: dict, ratio: float) -> Optional[tuple[float, str]]:
+        if entry["elapsed_time"]:
+            return median(entry["elapsed_time"]), "elapsed"
+        if entry["step_elapsed"]:
+            return median(entry["step_elapsed"]) * ratio, "steps"
+        return None
+
+    def _elapsed_per_step_elapsed(self) -> float:
+        ratios = [
+            median(entry["elapsed_time"]) / median(entry["step_elapsed"])
+            for entry in self.tasks.values()
+            if entry["elapsed_time"] and entry["step_elapsed"]
+        ]
+        return median(ratios) if ratios else DEFAULT_ELAPSED_PER_STEP_ELAPSED
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self.tasks, f, indent=4)
+        os.replace(tmp_path, self.path)
+
+
+def lpt_order(tasks: list[str], estimates: dict[str, float]) -> list[str]:
+    """Order tasks longest expected first (ties keep their original order)."""
+    return sorted(tasks, key=lambda task_name: -estimates[task_name])
+
+
+def projected_makespan(durations: list[float], num_workers: int) -> float:
+    """Makespan of tasks of the given durations, dispatched in order to the first free worker."""
+    workers = [0.0] * max(1, num_workers)
+    for duration in durations:
+        heapq.heappush(workers, heapq.heappop(workers) + duration)
+    return max(workers)
@@ -0,0 +1,280 @@
+"""
+Sharding of task sets across machines, and merging of the runs of the shards.
+
+harness(..., shard="i/N") runs the i-th of N shards (0 <= i < N) of the resolved task list. Each
+shard computes its tasks on its own host, so the split must only depend on inputs every shard
+sees identically:
+
+- by default, each run of a task (task name and replica index, for sample_tasks > 1) is
+  identified by a stable hash, and the runs are dealt to the shards in hash order: the shards
+  get the same number of tasks, whatever the state of each host;
+- with harness(..., shard_plan=<path>), the split is balanced by the expected task durations.
+  The first shard to start computes the plan from its task duration history (see scheduling.py)
+  and writes it to the given path, on a filesystem shared by the hosts; the other shards load it
+  instead of computing their own. A plan can also be written beforehand with save_shard_plan.
+
+merge_runs() combines the runs of the shards into the results of the whole task list.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import socket
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Optional, Union
+
+from agisdk.REAL.logging import logger as rich_logger
+from agisdk.REAL.run_manifest import MANIFEST_FILE, RUNS_DIR, RunManifest
+
+logger = logging.getLogger(__name__)
+
+
+def parse_shard(shard: str) -> tuple[int, int]:
+    """Parse a shard specification "i/N" into (i, N)."""
+    try:
+        index, num_shards = (int(part) for part in shard.split("/"))
+    except (AttributeError, ValueError):
+        raise ValueError(f'shard must be given as "i/N", got: {shard!r}') from None
+    if not 0 <= index < num_shards:
+        raise ValueError(f"Expected 0 <= i < N for shard i/N, got: {shard}")
+    return index, num_shards
+
+
+def task_run_key(task_name: str, replica: int) -> int:
+    """Stable (across processes and machines) hash of a run of a task."""
+    digest = hashlib.sha256(f"{task_name}#{replica}".encode()).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+def plan_shards(
+    tasks: list[str], num_shards: int, durations: Optional[dict[str, float]] = None
+) -> list[int]:
+    """
+    Split a task list into shards.
+
+    Args:
+        tasks: Full task list (a task appears once per replica)
+        num_shards: Number of shards
+        durations: Expected duration of each task. Without durations, the split only depends
+                   on the task list
+
+    Returns:
+        The shard of each task of the task list
+    """
+    replicas = Counter()
+    runs = []
+    for position, task_name in enumerate(tasks):
+        duration = durations[task_name] if durations is not None else 1.0
+        runs.append((-duration, task_run_key(task_name, replicas[task_name]), position))
+        replicas[task_name] += 1
+
+    # longest expected first to the least loaded shard, ties broken by the hash of the runs
+    loads = [(0.0, 0, shard) for shard in range(num_shards)]  # (duration, n_tasks, shard)
+    assignment = [0] * len(tasks)
+    for neg_duration, _, position in sorted(runs):
+        load, n_tasks, shard = min(loads)
+        loads[shard] = (load - neg_duration, n_tasks + 1, shard)
+        assignment[position] = shard
+    return assignment
+
+
+def shard_tasks(
+    tasks: list[str], index: int, num_shards: int, assignment: Optional[list[int]] = None
+) -> list[str]:
+    """
+    Select the tasks of a shard.
+
+    Args:
+        tasks: Full task list (a task appears once per replica)
+        index: Index of the shard, in [0, num_shards)
+        num_shards: Number of shards
+        assignment: Shard of each task, from a shard plan (default: plan_shards without
+                    durations)
+
+    Returns:
+        The tasks of the shard, in the order of the task list
+    """
+    if assignment is None:
+        assignment = plan_shards(tasks, num_shards)
+    return [task_name for task_name, shard in zip(tasks, assignment) if shard == index]
+
+
+def save_shard_plan(path, tasks: list[str], num_shards: int, assignment: list[int]) -> bool:
+    """
+    Write a shard plan, unless one already exists at this path.
+
+    The plan is written to a temporary file and linked to its path, so that of several shards
+    starting at the same time, exactly one writes it and the others never see a partial plan.
+
+    Returns:
+        Whether the plan was written (False if a plan already existed)
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{socket.gethostname()}.{os.getpid()}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump({"num_shards": num_shards, "tasks": tasks, "assignment": assignment}, f)
+    try:
+        os.link(tmp_path, path)
+        return True
+    except FileExistsError:
+        return False
+    finally:
+        os.remove(tmp_path)
+
+
+def load_shard_plan(path, tasks: list[str], num_shards: int) -> list[int]:
+    """
+    Load a shard plan, checking that it splits this task list into this number of shards.
+
+    Returns:
+        The shard of each task of the task list
+    """
+    with open(path) as f:
+        plan = json.load(f)
+    if plan["num_shards"] != num_shards or plan["tasks"] != tasks:
+        raise ValueError(
+            f"The shard plan {path} splits another task list or into another number of shards"
+        )
+    return plan["assignment"]
+
+
+def shared_shard_plan(
+    path, tasks: list[str], num_shards: int, durations: Callable[[], dict[str, float]]
+) -> list[int]:
+    """
+    Load the shard plan of a task list, computing and writing it first if it does not exist.
+
+    Args:
+        path: Path of the plan, on a filesystem shared by the shards
+        tasks: Full task list
+        num_shards: Number of shards
+        durations: Function returning the expected duration of each task (only called if the
+                   plan does not exist yet)
+
+    Returns:
+        The shard of each task of the task list, identical for all the shards
+    """
+    if not Path(path).exists():
+        if save_shard_plan(path, tasks, num_shards, plan_shards(tasks, num_shards, durations())):
+            rich_logger.info(f"🧩 Wrote the shard plan {path}")
+    return load_shard_plan(path, tasks, num_shards)
+
+
+@dataclass
+class MergedRuns:
+    """
+    Results of the runs of the shards of a task list.
+
+    Attributes:
+        results: Dictionary of results indexed by task name, as returned by harness.run
+        missing: Tasks of the task list without result, with their number of missing runs
+        duplicates: Tasks with more results than runs in the task list, with the number of
+                    extra results
+        run_dirs: Directories of the merged runs, indexed by shard index
+    """
+
+    results: dict[str, Any] = field(default_factory=dict)
+    missing: dict[str, int] = field(default_factory=dict)
+    duplicates: dict[str, int] = field(default_factory=dict)
+    run_dirs: dict[int, str] = field(default_factory=dict)
+
+    @property
+    def complete(self) -> bool:
+        return not self.missing and not self.duplicates
+
+    def save(self, path) -> None:
+        with open(path, "w") as f:
+            json.dump(
+                {
+                    "run_dirs": self.run_dirs,
+                    "missing": self.missing,
+                    "duplicates": self.duplicates,
+                    "results": self.results,
+                },
+                f,
+                indent=4,
+                default=str,
+            )
+
+
+def _latest_shard_run(results_dir: Path) -> Path:
+    runs = []
+    for manifest_path in (results_dir / RUNS_DIR).glob(f"*/{MANIFEST_FILE}"):
+        manifest = RunManifest.load(manifest_path.parent)
+        if manifest.shard is not None:
+            runs.append((manifest.events[0].get("time", 0), manifest_path.parent))
+    if not runs:
+        raise FileNotFoundError(f"No sharded run found in {results_dir}")
+    return max(runs)[1]
+
+
+def merge_runs(dirs: list[Union[str, Path]], print_results: bool = True) -> MergedRuns:
+    """
+    Merge the runs of the shards of a task list (harness(..., shard="i/N")).
+
+    Args:
+        dirs: Run directories (results_dir/runs/<run_uuid>), or results directories, whose
+              latest sharded run is taken
+        print_results: Whether to print the merged results, as at the end of a harness run
+
+    Returns:
+        The merged results, with the missing and duplicate tasks
+    """
+    manifests = []
+    for path in dirs:
+        path = Path(path)
+        if not (path / MANIFEST_FILE).exists():
+            path = _latest_shard_run(path)
+        manifest = RunManifest.load(path)
+        if manifest.shard is None:
+            raise ValueError(f"The run in {path} is not a shard of a task list")
+        manifests.append(manifest)
+    if not manifests:
+        raise ValueError("No runs to merge")
+
+    merged = MergedRuns()
+    num_shards = manifests[0].shard["num_shards"]
+    all_tasks = manifests[0].shard["tasks"]
+    finished = Counter()
+    for manifest in manifests:
+        shard = manifest.shard
+        if shard["num_shards"] != num_shards or shard["tasks"] != all_tasks:
+            raise ValueError(
+                f"The run in {manifest.run_dir} is a shard of another task list or split"
+            )
+        if shard["index"] in merged.run_dirs:
+            rich_logger.warning(
+                f"⚠️ Shard {shard['index']}/{num_shards} was run more than once: "
+                f"{merged.run_dirs[shard['index']]} and {manifest.run_dir}"
+            )
+        merged.run_dirs.setdefault(shard["index"], str(manifest.run_dir))
+        for task_name, record in manifest.results():
+            finished[task_name] += 1
+            merged.results[task_name] = record
+
+    expected = Counter(all_tasks)
+    merged.missing = dict(expected - finished)
+    merged.duplicates = dict(finished - expected)
+    missing_shards = sorted(set(range(num_shards)) - set(merged.run_dirs))
+    if missing_shards:
+        rich_logger.warning(f"⚠️ Missing shards (of {num_shards}): {missing_shards}")
+    if merged.missing:
+        rich_logger.warning(
+            f"⚠️ {sum(merged.missing.values())} task runs without result: "
+            f"{', '.join(sorted(merged.missing))}"
+        )
+    if merged.duplicates:
+        rich_logger.warning(
+            f"⚠️ {sum(merged.duplicates.values())} duplicate task results: "
+            f"{', '.join(sorted(merged.duplicates))}"
+        )
+
+    if print_results:
+        from agisdk.REAL.harness import format_results
+
+        format_results(merged.results)
+    return merged
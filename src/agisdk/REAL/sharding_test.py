@@ -0,0 +1,71 @@
+from collections import Counter
+
+from agisdk.REAL.run_manifest import RunManifest
+from agisdk.REAL.sharding import merge_runs, plan_shards, shard_tasks
+
+# 3 replicas of each task, as with sample_tasks=3
+TASKS = [f"v2.{site}-{i}" for site in ("omnizon", "dashdish") for i in range(1, 6) for _ in range(3)]
+
+
+def test_shards_partition_the_task_list():
+    for num_shards in (1, 2, 3, 7, len(TASKS) + 1):
+        shards = [shard_tasks(TASKS, index, num_shards) for index in range(num_shards)]
+        assert sum((Counter(shard) for shard in shards), Counter()) == Counter(TASKS)
+        assert sum(map(len, shards)) == len(TASKS)
+        # balanced number of tasks without durations
+        assert max(map(len, shards)) - min(map(len, shards)) <= 1
+
+
+def test_shards_partition_the_task_list_with_durations():
+    durations = {task_name: (30.0 if "omnizon" in task_name else 10.0) for task_name in TASKS}
+    assignment = plan_shards(TASKS, 4, durations)
+    shards = [shard_tasks(TASKS, index, 4, assignment) for index in range(4)]
+    assert sum((Counter(shard) for shard in shards), Counter()) == Counter(TASKS)
+    loads = [sum(durations[task_name] for task_name in shard) for shard in shards]
+    assert max(loads) - min(loads) <= max(durations.values())
+
+
+def test_plans_are_deterministic():
+    durations = {task_name: float(len(task_name)) for task_name in TASKS}
+    assert plan_shards(TASKS, 3) == plan_shards(list(TASKS), 3)
+    assert plan_shards(TASKS, 3, durations) == plan_shards(TASKS, 3, dict(durations))
+
+
+def _run_shard(results_dir, index, num_shards, finished):
+    manifest = RunManifest.create(
+        results_dir,
+        f"run-{index}",
+        shard_tasks(TASKS, index, num_shards),
+        config={"shard": {"index": index, "num_shards": num_shards, "tasks": TASKS}},
+    )
+    for task_name in finished(manifest.tasks):
+        manifest.finished(task_name, {"cum_reward": 1, "exp_dir": f"/exp/{task_name}"})
+    return manifest.run_dir
+
+
+def test_merge_runs(tmp_path):
+    run_dirs = [_run_shard(tmp_path, index, 2, list) for index in range(2)]
+    merged = merge_runs(run_dirs, print_results=False)
+    assert merged.complete
+    assert set(merged.results) == set(TASKS)
+    assert sorted(merged.run_dirs) == [0, 1]
+
+
+def test_merge_runs_reports_missing_and_duplicate_tasks(tmp_path):
+    shard_1 = shard_tasks(TASKS, 1, 2)
+    missing_task = shard_1[0]
+    duplicate_task = next(task_name for task_name in shard_1 if task_name != missing_task)
+
+    def finished(tasks):
+        # one run of missing_task did not finish, one run of duplicate_task finished twice
+        tasks = list(tasks)
+        tasks.remove(missing_task)
+        return tasks + [duplicate_task]
+
+    complete = _run_shard(tmp_path, 0, 2, list)
+    partial = _run_shard(tmp_path, 1, 2, finished)
+    merged = merge_runs([complete, partial], print_results=False)
+    assert not merged.complete
+    assert merged.missing == {missing_task: 1}
+    assert merged.duplicates == {duplicate_task: 1}
+    assert sorted(merged.run_dirs) == [0, 1]